@@ -305,9 +305,10 @@ class Artifact:
         os.makedirs(os.path.dirname(os.path.join(self._artifactdir, element.get_artifact_name())), exist_ok=True)
         keys = utils._deduplicate([self._cache_key, self._weak_cache_key])
         for key in keys:
-            path = os.path.join(self._artifactdir, element.get_artifact_name(key=key))
-            with utils.save_file_atomic(path, mode="wb") as f:
+            ref = element.get_artifact_name(key=key)
+            with utils.save_file_atomic(os.path.join(self._artifactdir, ref), mode="wb") as f:
                 f.write(artifact.SerializeToString())
+            self._context.artifactcache.record_ref(ref)
 
         return size
 
@@ -653,7 +654,8 @@ class Artifact:
     def _load_proto(self):
         key = self.get_extract_key()
 
-        proto_path = os.path.join(self._artifactdir, self._element.get_artifact_name(key=key))
+        ref = self._element.get_artifact_name(key=key)
+        proto_path = os.path.join(self._artifactdir, ref)
         artifact = ArtifactProto()
         try:
             with open(proto_path, mode="r+b") as f:
@@ -662,6 +664,7 @@ class Artifact:
             return None
 
         os.utime(proto_path)
+        self._context.artifactcache.use_ref(ref)
 
         return artifact
 
@@ -19,9 +19,14 @@
 #        Tristan Maat <tristan.maat@codethink.co.uk>
 
 import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import grpc
 
 from ._assetcache import AssetCache
+from ._refcatalogue import RefCatalogue
 from ._cas.casremote import BlobNotFound
 from ._exceptions import ArtifactError, AssetCacheError, CASError, CASRemoteError
 from ._protos.buildstream.v2 import artifact_pb2
@@ -30,6 +35,10 @@ from . import utils
 
 REMOTE_ASSET_ARTIFACT_URN_TEMPLATE = "urn:fdc:buildstream.build:2020:artifact:{}"
 
+# The maximum number of artifact queries in flight per remote
+# when checking many elements at once
+_MAX_REMOTE_QUERIES = 16
+
 
 # An ArtifactCache manages artifacts.
 #
@@ -44,6 +53,9 @@ class ArtifactCache(AssetCache):
         self._basedir = context.artifactdir
         os.makedirs(self._basedir, exist_ok=True)
 
+        # Artifacts are listed in LRU order and matched against globs
+        self._catalogue = RefCatalogue(self._basedir)
+
     # preflight():
     #
     # Preflight check.
@@ -78,7 +90,25 @@ class ArtifactCache(AssetCache):
     #     ([str]) - A list of artifact names as generated in LRU order
     #
     def list_artifacts(self, *, glob=None):
-        return [ref for _, ref in sorted(list(self.list_refs_mtimes(self._basedir, glob_expr=glob)))]
+        self._flush_used_refs()
+        try:
+            return [ref for _, ref in self._catalogue.list_refs_mtimes(glob_expr=glob)]
+        except AssetCacheError as e:
+            raise ArtifactError("{}".format(e)) from e
+
+    # rebuild_catalogue():
+    #
+    # Rebuild the catalogue of the artifacts in this cache from the
+    # artifact refs, in case they were modified without updating it.
+    #
+    # Returns:
+    #     (int): The number of artifacts in the catalogue
+    #
+    def rebuild_catalogue(self):
+        try:
+            return self._catalogue.rebuild()
+        except AssetCacheError as e:
+            raise ArtifactError("{}".format(e)) from e
 
     # remove():
     #
@@ -169,19 +199,27 @@ class ArtifactCache(AssetCache):
         errors = []
         # Start by pulling our artifact proto, so that we know which
         # blobs to pull
-        for remote in index_remotes:
-            remote.init()
-            try:
-                element.status("Pulling artifact {} <- {}".format(display_key, remote))
-                response = remote.fetch_blob([uri])
-                if response:
-                    artifact_digest = response.blob_digest
-                    break
-
-                element.info("Remote ({}) does not have artifact {} cached".format(remote, display_key))
-            except AssetCacheError as e:
-                element.warn("Could not pull from remote {}: {}".format(remote, e))
-                errors.append(e)
+        if self.context.race_remotes and len(index_remotes) > 1:
+            artifact_digest = self._race_index_remotes(element, display_key, uri, index_remotes, errors)
+
+            # Pull the blobs from the fastest remotes first
+            storage_remotes = self.sort_remotes_by_latency(storage_remotes)
+        else:
+            for remote in index_remotes:
+                remote.init()
+                try:
+                    element.status("Pulling artifact {} <- {}".format(display_key, remote))
+                    start_time = time.monotonic()
+                    response = remote.fetch_blob([uri])
+                    self.record_remote_latency(remote, time.monotonic() - start_time)
+                    if response:
+                        artifact_digest = response.blob_digest
+                        break
+
+                    element.info("Remote ({}) does not have artifact {} cached".format(remote, display_key))
+                except AssetCacheError as e:
+                    element.warn("Could not pull from remote {}: {}".format(remote, e))
+                    errors.append(e)
 
         if errors and not artifact_digest:
             raise ArtifactError(
@@ -281,6 +319,7 @@ class ArtifactCache(AssetCache):
             return
 
         utils.safe_link(os.path.join(self._basedir, oldref), os.path.join(self._basedir, newref))
+        self.record_ref(newref)
 
     # fetch_missing_blobs():
     #
@@ -312,15 +351,18 @@ class ArtifactCache(AssetCache):
     # Args:
     #     project (Project): The current project
     #     missing_blobs (list): The Digests of the blobs to check
+    #     exclude_storage (RemoteSpec): A CAS endpoint which is known to
+    #                                   have the blobs, push remotes with
+    #                                   the same endpoint are not queried
     #
     # Returns:
     #     (list): The Digests of the blobs missing on at least one push remote
     #
-    def find_missing_blobs(self, project, missing_blobs):
+    def find_missing_blobs(self, project, missing_blobs, *, exclude_storage=None):
         if not missing_blobs:
             return []
 
-        _, push_remotes = self.get_remotes(project.name, True)
+        push_remotes = self.get_push_storage_remotes(project, exclude_storage=exclude_storage)
         remote_missing_blobs_list = []
 
         for remote in push_remotes:
@@ -334,6 +376,32 @@ class ArtifactCache(AssetCache):
 
         return remote_missing_blobs_list
 
+    # get_push_storage_remotes()
+    #
+    # Get the storage remotes that artifacts of a project are pushed to.
+    #
+    # Args:
+    #     project (Project): The project
+    #     exclude_storage (RemoteSpec): A CAS endpoint to exclude, push remotes
+    #                                   with the same URL and instance name
+    #                                   are not returned
+    #
+    # Returns:
+    #     (list): The CASRemotes to push to
+    #
+    def get_push_storage_remotes(self, project, *, exclude_storage=None):
+        _, push_remotes = self.get_remotes(project.name, True)
+
+        if exclude_storage is not None:
+            push_remotes = [
+                remote
+                for remote in push_remotes
+                if (remote.spec.url, remote.spec.instance_name)
+                != (exclude_storage.url, exclude_storage.instance_name)
+            ]
+
+        return push_remotes
+
     # check_remotes_for_element()
     #
     # Check if the element is available in any of the remotes
@@ -361,6 +429,66 @@ class ArtifactCache(AssetCache):
 
         return False
 
+    # check_remotes_for_elements()
+    #
+    # Check which of the given elements are available in any of the remotes
+    #
+    # This is the bulk variant of check_remotes_for_element(), the queries
+    # are issued concurrently with at most _MAX_REMOTE_QUERIES requests in
+    # flight per remote, and each remote is only queried for the elements
+    # which were not found in the remotes queried before it.
+    #
+    # Args:
+    #    elements (list [Element]): The elements to check
+    #    progress (callable): An optional callback, called once for each element
+    #                         as soon as its remote status is known
+    #
+    # Returns:
+    #    (dict): A dictionary mapping each Element to whether it is available remotely
+    #
+    def check_remotes_for_elements(self, elements, *, progress=None):
+        results = {}
+
+        # Group the elements by project, as the remotes are configured per project
+        projects = {}
+        for element in elements:
+            projects.setdefault(element._get_project().name, []).append(element)
+
+        for project_name, project_elements in projects.items():
+            index_remotes, _ = self.get_remotes(project_name, False)
+
+            remaining = project_elements
+            for remote in index_remotes:
+                if not remaining:
+                    break
+
+                remote.init()
+                found = self._query_remote_bulk(remaining, remote)
+
+                last_remote = remote is index_remotes[-1]
+                missing = []
+                for element in remaining:
+                    if element in found:
+                        results[element] = True
+                    elif last_remote:
+                        results[element] = False
+                    else:
+                        missing.append(element)
+                        continue
+
+                    if progress:
+                        progress()
+
+                remaining = missing
+
+            # Elements of projects without any remotes
+            for element in remaining:
+                results[element] = False
+                if progress:
+                    progress()
+
+        return results
+
     ################################################
     #             Local Private Methods            #
     ################################################
@@ -496,8 +624,11 @@ class ArtifactCache(AssetCache):
         artifact_name = element.get_artifact_name(key=key)
 
         try:
-            # Fetch and parse artifact proto
+            # Fetch and parse artifact proto, the latency of the
+            # storage remote is measured with this small request
+            start_time = time.monotonic()
             self.cas.fetch_blobs(remote, [artifact_digest])
+            self.record_remote_latency(remote, time.monotonic() - start_time)
             artifact = artifact_pb2.Artifact()
             with self.cas.open(artifact_digest, "rb") as f:
                 artifact.ParseFromString(f.read())
@@ -507,6 +638,7 @@ class ArtifactCache(AssetCache):
             os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
             with utils.save_file_atomic(artifact_path, mode="wb") as f:
                 f.write(artifact.SerializeToString())
+            self.record_ref(artifact_name)
 
             if str(artifact.files):
                 self.cas._fetch_directory(remote, artifact.files)
@@ -529,6 +661,111 @@ class ArtifactCache(AssetCache):
 
         return True
 
+    # _race_index_remotes()
+    #
+    # Query all index remotes for an artifact concurrently, and
+    # return the artifact digest from whichever remote reports that
+    # it has the artifact first. The requests to the other remotes
+    # are cancelled.
+    #
+    # Args:
+    #    element (Element): The element whose artifact is being pulled
+    #    display_key (str): The abbreviated cache key to display
+    #    uri (str): The URI of the artifact
+    #    index_remotes (list [AssetRemote]): The index remotes to query
+    #    errors (list): A list to append the errors of the failed requests to
+    #
+    # Returns:
+    #    (Digest): The artifact digest, or None if no remote has the artifact
+    #
+    def _race_index_remotes(self, element, display_key, uri, index_remotes, errors):
+        element.status(
+            "Pulling artifact {} <- {}".format(display_key, ", ".join(str(remote) for remote in index_remotes))
+        )
+
+        # Completed requests are reported from the gRPC threads through this queue
+        completed = queue.Queue()
+
+        def report(remote, future, start_time):
+            completed.put((remote, future, time.monotonic() - start_time))
+
+        # Connect to all the remotes before sending any request, such
+        # that the latency of a remote does not include the connection
+        # setup of the others
+        for remote in index_remotes:
+            remote.init()
+
+        futures = []
+        try:
+            for remote in index_remotes:
+                start_time = time.monotonic()
+                future = remote.fetch_blob_future([uri])
+                futures.append(future)
+                future.add_done_callback(
+                    lambda done, remote=remote, start_time=start_time: report(remote, done, start_time)
+                )
+
+            for _ in futures:
+                remote, future, latency = completed.get()
+                try:
+                    response = future.result()
+                except AssetCacheError as e:
+                    element.warn("Could not pull from remote {}: {}".format(remote, e))
+                    errors.append(e)
+                    continue
+
+                self.record_remote_latency(remote, latency)
+                if response:
+                    return response.blob_digest
+
+                element.info("Remote ({}) does not have artifact {} cached".format(remote, display_key))
+        finally:
+            # Cancel the requests which are still in flight
+            for future in futures:
+                future.cancel()
+
+        return None
+
+    # _query_remote_bulk()
+    #
+    # Query a remote for the artifacts of many elements concurrently
+    #
+    # Args:
+    #    elements (list [Element]): The elements to query
+    #    remote (AssetRemote): The remote to query
+    #
+    # Returns:
+    #    (set): The elements whose artifacts are available in the remote
+    #
+    # Raises:
+    #    ArtifactError: If any of the queries fails
+    #
+    def _query_remote_bulk(self, elements, remote):
+        found = set()
+
+        # Avoid spawning threads for a single query
+        if len(elements) == 1:
+            element = elements[0]
+            if self._query_remote(element.get_artifact_name(), remote):
+                found.add(element)
+            return found
+
+        with ThreadPoolExecutor(max_workers=min(len(elements), _MAX_REMOTE_QUERIES)) as pool:
+            futures = {
+                pool.submit(self._query_remote, element.get_artifact_name(), remote): element for element in elements
+            }
+            try:
+                for future in as_completed(futures):
+                    if future.result():
+                        found.add(futures[future])
+            except BaseException:
+                # Don't wait for the pending queries on failure
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return found
+
     # _query_remote()
     #
     # Args:
@@ -16,9 +16,8 @@
 #  Authors:
 #        Raoul Hidalgo Charman <raoul.hidalgocharman@codethink.co.uk>
 #
-import os
-import re
-from typing import List, Dict, Tuple, Iterable, Optional
+import threading
+from typing import List, Dict, Set, Tuple, Iterable, Optional
 import grpc
 
 from . import utils
@@ -27,6 +26,7 @@ from ._cas import CASRemote, CASCache
 from ._exceptions import AssetCacheError, RemoteError
 from ._remotespec import RemoteSpec, RemoteType
 from ._remote import BaseRemote
+from ._refcatalogue import RefCatalogue
 from ._protos.build.bazel.remote.asset.v1 import remote_asset_pb2, remote_asset_pb2_grpc
 from ._protos.google.rpc import code_pb2
 
@@ -114,28 +114,32 @@ class AssetRemote(BaseRemote):
     #     AssetCacheError: If the upstream has a problem
     #
     def fetch_blob(self, uris, *, qualifiers=None):
-        request = remote_asset_pb2.FetchBlobRequest()
-        if self.spec.instance_name:
-            request.instance_name = self.spec.instance_name
-        request.uris.extend(uris)
-        if qualifiers:
-            request.qualifiers.extend(qualifiers)
+        request = self._fetch_blob_request(uris, qualifiers)
 
         try:
             response = self.fetch_service.FetchBlob(request)
         except grpc.RpcError as e:
-            if e.code() == grpc.StatusCode.NOT_FOUND:
-                return None
+            return _fetch_blob_error(e)
 
-            raise AssetCacheError("FetchBlob failed with status {}: {}".format(e.code().name, e.details())) from e
+        return _fetch_blob_response(response)
 
-        if response.status.code == code_pb2.NOT_FOUND:
-            return None
-
-        if response.status.code != code_pb2.OK:
-            raise AssetCacheError("FetchBlob failed with response status {}".format(response.status.code))
-
-        return response
+    # fetch_blob_future():
+    #
+    # Resolve URIs to a CAS blob digest asynchronously, this is
+    # otherwise the same as fetch_blob().
+    #
+    # Args:
+    #    uris (list of str): The URIs to resolve. Multiple URIs should represent
+    #                        the same content available at different locations.
+    #    qualifiers (list of Qualifier): Optional qualifiers sub-specifying the
+    #                                    content to fetch.
+    #
+    # Returns
+    #    (FetchBlobFuture): A future for the asset server response
+    #
+    def fetch_blob_future(self, uris, *, qualifiers=None):
+        request = self._fetch_blob_request(uris, qualifiers)
+        return FetchBlobFuture(self.fetch_service.FetchBlob.future(request))
 
     # fetch_directory():
     #
@@ -250,6 +254,92 @@ class AssetRemote(BaseRemote):
         except grpc.RpcError as e:
             raise AssetCacheError("PushDirectory failed with status {}: {}".format(e.code().name, e.details())) from e
 
+    # _fetch_blob_request():
+    #
+    # Create a FetchBlobRequest for the given URIs and qualifiers
+    #
+    def _fetch_blob_request(self, uris, qualifiers):
+        request = remote_asset_pb2.FetchBlobRequest()
+        if self.spec.instance_name:
+            request.instance_name = self.spec.instance_name
+        request.uris.extend(uris)
+        if qualifiers:
+            request.qualifiers.extend(qualifiers)
+        return request
+
+
+# FetchBlobFuture()
+#
+# The result of AssetRemote.fetch_blob_future(), wrapping
+# the underlying gRPC future.
+#
+# Args:
+#    future (grpc.Future): The gRPC future of the FetchBlob request
+#
+class FetchBlobFuture:
+    def __init__(self, future):
+        self._future = future
+
+    # add_done_callback():
+    #
+    # Args:
+    #    callback (callable): A callable, called with this FetchBlobFuture
+    #                         once the request completes or is cancelled
+    #
+    def add_done_callback(self, callback):
+        self._future.add_done_callback(lambda _: callback(self))
+
+    # cancel():
+    #
+    # Cancel the request, if it has not completed yet.
+    #
+    def cancel(self):
+        self._future.cancel()
+
+    # result():
+    #
+    # Wait for the response of the request.
+    #
+    # Returns
+    #    (FetchBlobResponse): The asset server response or None if the resource
+    #                         is not available.
+    #
+    # Raises:
+    #     AssetCacheError: If the upstream has a problem
+    #
+    def result(self):
+        try:
+            response = self._future.result()
+        except grpc.RpcError as e:
+            return _fetch_blob_error(e)
+
+        return _fetch_blob_response(response)
+
+
+# _fetch_blob_response()
+#
+# Interpret a FetchBlobResponse
+#
+def _fetch_blob_response(response):
+    if response.status.code == code_pb2.NOT_FOUND:
+        return None
+
+    if response.status.code != code_pb2.OK:
+        raise AssetCacheError("FetchBlob failed with response status {}".format(response.status.code))
+
+    return response
+
+
+# _fetch_blob_error()
+#
+# Interpret an error raised by a FetchBlob request
+#
+def _fetch_blob_error(e):
+    if e.code() == grpc.StatusCode.NOT_FOUND:
+        return None
+
+    raise AssetCacheError("FetchBlob failed with status {}: {}".format(e.code().name, e.details())) from e
+
 
 # RemotePair()
 #
@@ -299,8 +389,20 @@ class AssetCache:
         self._has_fetch_remotes: bool = False
         self._has_push_remotes: bool = False
 
+        # Latency statistics of the remotes in this session, as
+        # (number of requests, total seconds) tuples keyed by remote url
+        self._remote_latencies: Dict[str, Tuple[int, float]] = {}
+        self._remote_latencies_lock = threading.Lock()
+
         self._basedir = None
 
+        # The catalogue of the local refs, if they are listed
+        self._catalogue: Optional[RefCatalogue] = None
+
+        # Refs used since the catalogue was last updated
+        self._used_refs: Set[str] = set()
+        self._used_refs_lock = threading.Lock()
+
     # release_resources():
     #
     # Release resources used by AssetCache.
@@ -314,6 +416,10 @@ class AssetCache:
             if remote.storage:
                 remote.storage.close()
 
+        if self._catalogue:
+            self._flush_used_refs()
+            self._catalogue.close()
+
     # setup_remotes():
     #
     # Sets up which remotes to use
@@ -383,6 +489,58 @@ class AssetCache:
 
         return index_remotes, storage_remotes
 
+    # record_remote_latency():
+    #
+    # Record the time it took for a remote to respond to a request
+    #
+    # Args:
+    #    remote (BaseRemote): The remote
+    #    seconds (float): The time in seconds it took for the remote to respond
+    #
+    def record_remote_latency(self, remote: BaseRemote, seconds: float):
+        with self._remote_latencies_lock:
+            count, total = self._remote_latencies.get(remote.spec.url, (0, 0.0))
+            self._remote_latencies[remote.spec.url] = (count + 1, total + seconds)
+
+    # get_remote_latency():
+    #
+    # Get the average latency measured for a remote in this session
+    #
+    # Args:
+    #    remote (BaseRemote): The remote
+    #
+    # Returns:
+    #    (float): The average time in seconds it took for the remote to
+    #             respond, or None if no requests were made to the remote
+    #
+    def get_remote_latency(self, remote: BaseRemote) -> Optional[float]:
+        with self._remote_latencies_lock:
+            try:
+                count, total = self._remote_latencies[remote.spec.url]
+            except KeyError:
+                return None
+
+        return total / count
+
+    # sort_remotes_by_latency():
+    #
+    # Sort remotes by the average latency measured for them in this session,
+    # remotes for which no latency was measured yet are sorted last while
+    # preserving their configured order.
+    #
+    # Args:
+    #    remotes (list): The remotes to sort
+    #
+    # Returns:
+    #    (list): The sorted remotes
+    #
+    def sort_remotes_by_latency(self, remotes: List[BaseRemote]) -> List[BaseRemote]:
+        def latency_key(remote):
+            latency = self.get_remote_latency(remote)
+            return (latency is None, latency or 0.0)
+
+        return sorted(remotes, key=latency_key)
+
     # has_fetch_remotes():
     #
     # Check whether any remote repositories are available for fetching.
@@ -429,40 +587,6 @@ class AssetCache:
             # Check whether the specified element's project has fetch remotes
             return bool(index_remotes and storage_remotes)
 
-    # list_refs_mtimes()
-    #
-    # List refs in a directory, given a base path. Also returns the
-    # associated mtimes
-    #
-    # Args:
-    #    base_path (str): Base path to traverse over
-    #    glob_expr (str|None): Optional glob expression to match against files
-    #
-    # Returns:
-    #     (iter (mtime, filename)]): iterator of tuples of mtime and refs
-    #
-    def list_refs_mtimes(self, base_path, *, glob_expr=None):
-        path = base_path
-        if glob_expr is not None:
-            globdir = os.path.dirname(glob_expr)
-            if not any(c in "*?[" for c in globdir):
-                # path prefix contains no globbing characters so
-                # append the glob to optimise the os.walk()
-                path = os.path.join(base_path, globdir)
-
-        regexer = None
-        if glob_expr:
-            expression = utils._glob2re(glob_expr)
-            regexer = re.compile(expression)
-
-        for root, _, files in os.walk(path):
-            for filename in files:
-                ref_path = os.path.join(root, filename)
-                relative_path = os.path.relpath(ref_path, base_path)  # Relative to refs head
-                if regexer is None or regexer.match(relative_path):
-                    # Obtain the mtime (the time a file was last modified)
-                    yield (os.path.getmtime(ref_path), relative_path)
-
     # remove_ref()
     #
     # Removes a ref.
@@ -481,6 +605,68 @@ class AssetCache:
         try:
             utils._remove_path_with_parents(self._basedir, ref)
         except FileNotFoundError as e:
+            # The ref may still be in the catalogue if it was removed
+            # without updating the catalogue
+            if self._catalogue:
+                self._catalogue.remove(ref)
             raise AssetCacheError("Could not find ref '{}'".format(ref)) from e
         except OSError as e:
             raise AssetCacheError("System error while removing ref '{}': {}".format(ref, e)) from e
+
+        if self._catalogue:
+            self._catalogue.remove(ref)
+
+    # record_ref()
+    #
+    # Record in the catalogue of the local refs that a ref was written
+    # or that its mtime was updated.
+    #
+    # Args:
+    #    ref (str): The ref
+    #
+    # Raises:
+    #    (AssetCacheError): If the catalogue cannot be updated
+    #
+    def record_ref(self, ref):
+        if self._catalogue:
+            self._catalogue.record(ref)
+
+    # use_ref()
+    #
+    # Record that a ref was used, after its mtime was updated.
+    #
+    # Used refs are only written to the catalogue of the local refs
+    # when they are next listed, or when the cache is released, such
+    # that loading a ref does not write to the catalogue.
+    #
+    # Args:
+    #    ref (str): The ref
+    #
+    def use_ref(self, ref):
+        if self._catalogue:
+            with self._used_refs_lock:
+                self._used_refs.add(ref)
+
+    #######################################################
+    #                  Local Private Methods              #
+    #######################################################
+
+    # _flush_used_refs()
+    #
+    # Write the mtimes of the refs used since the last update to the
+    # catalogue of the local refs.
+    #
+    # Failing to update the catalogue only affects the LRU order of the
+    # refs, it is reported as a warning.
+    #
+    def _flush_used_refs(self):
+        with self._used_refs_lock:
+            refs, self._used_refs = self._used_refs, set()
+
+        if not refs:
+            return
+
+        try:
+            self._catalogue.record_many(sorted(refs))
+        except AssetCacheError as e:
+            self.context.messenger.warn("Failed to record the use of {} refs".format(len(refs)), detail=str(e))
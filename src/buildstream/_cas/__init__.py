@@ -19,3 +19,4 @@
 
 from .cascache import CASCache, CASLogLevel
 from .casremote import CASRemote
+from .fileindex import FileIndex
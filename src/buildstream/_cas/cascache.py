@@ -22,14 +22,17 @@ import itertools
 import os
 import stat
 import contextlib
+import collections
 import time
 from typing import Optional, List
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import grpc
+from google.protobuf.message import DecodeError
 
 from .._protos.google.rpc import code_pb2
-from .._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
+from .._protos.build.bazel.remote.execution.v2 import remote_execution_pb2, remote_execution_pb2_grpc
 from .._protos.build.buildgrid import local_cas_pb2
 
 from .. import utils
@@ -45,6 +48,33 @@ _BUFFER_SIZE = 65536
 # Refresh interval for disk usage of local cache in seconds
 _CACHE_USAGE_REFRESH = 5
 
+# Number of files checked out per task in CASCache.checkout()
+_CHECKOUT_BATCH_SIZE = 256
+
+# Maximum number of threads used to check out files in CASCache.checkout()
+_CHECKOUT_MAX_WORKERS = 8
+
+# Number of digests per FindMissingBlobs request for the local cache
+_FIND_MISSING_BLOBS_BATCH_SIZE = 512
+
+# Maximum number of FindMissingBlobs requests in flight in CASCache.missing_blobs()
+_FIND_MISSING_BLOBS_MAX_IN_FLIGHT = 4
+
+# Default maximum number of FetchMissingBlobs requests in flight
+# while pulling directory trees and blobs
+_FETCH_BATCHES_MAX_IN_FLIGHT = 4
+
+# Number of Directory messages requested per page of GetTree
+_GET_TREE_PAGE_SIZE = 1000
+
+# Maximum total size of the parsed Directory messages kept in memory,
+# in bytes of serialized messages
+_DIRECTORY_CACHE_SIZE = 32 * 1024 * 1024
+
+# Maximum number of entries of the local action cache in each of its
+# 256 subdirectories, the least recently used entries are removed first
+_ACTION_CACHE_SUBDIR_ENTRIES = 64
+
 
 class CASLogLevel(FastEnum):
     WARNING = "warning"
@@ -71,15 +101,22 @@ class CASCache:
         cache_quota=None,
         protect_session_blobs=True,
         log_level=CASLogLevel.WARNING,
-        log_directory=None
+        log_directory=None,
+        fetch_batches=_FETCH_BATCHES_MAX_IN_FLIGHT
     ):
         self.casdir = os.path.join(path, "cas")
         self.tmpdir = os.path.join(path, "tmp")
+        self.actiondir = os.path.join(path, "actions")
         os.makedirs(self.tmpdir, exist_ok=True)
 
         self._cache_usage_monitor = None
         self._cache_usage_monitor_forbidden = False
 
+        self._directory_cache = _DirectoryCache(_DIRECTORY_CACHE_SIZE)
+
+        # Maximum number of blob download batches in flight
+        self._fetch_batches = fetch_batches
+
         self._casd_process_manager = None
         self._casd_channel = None
         if casd:
@@ -186,6 +223,12 @@ class CASCache:
     #
     # Checkout the specified directory digest.
     #
+    # The tree is walked breadth first, creating all directories and
+    # symlinks up front. When files need to be copied, they are checked
+    # out in batches by a pool of worker threads, hard links are cheap
+    # enough to always be created in the calling thread. Small trees
+    # are checked out entirely in the calling thread.
+    #
     # Args:
     #     dest (str): The destination path
     #     tree (Digest): The directory digest to extract
@@ -194,47 +237,47 @@ class CASCache:
     def checkout(self, dest, tree, *, can_link=False):
         os.makedirs(dest, exist_ok=True)
 
-        directory = remote_execution_pb2.Directory()
-
-        with open(self.objpath(tree), "rb") as f:
-            directory.ParseFromString(f.read())
-
-        for filenode in directory.files:
-            # regular file, create hardlink
-            fullpath = os.path.join(dest, filenode.name)
-
-            node_properties = filenode.node_properties
-            if node_properties.HasField("mtime"):
-                mtime = utils._parse_protobuf_timestamp(node_properties.mtime)
-            else:
-                mtime = None
-
-            if can_link and mtime is None:
-                utils.safe_link(self.objpath(filenode.digest), fullpath)
-            else:
-                utils.safe_copy(self.objpath(filenode.digest), fullpath, copystat=False)
-                if mtime is not None:
-                    utils._set_file_mtime(fullpath, mtime)
-
-            if filenode.is_executable:
-                st = os.stat(fullpath)
-                mode = st.st_mode
-                if mode & stat.S_IRUSR:
-                    mode |= stat.S_IXUSR
-                if mode & stat.S_IRGRP:
-                    mode |= stat.S_IXGRP
-                if mode & stat.S_IROTH:
-                    mode |= stat.S_IXOTH
-                os.chmod(fullpath, mode)
-
-        for dirnode in directory.directories:
-            fullpath = os.path.join(dest, dirnode.name)
-            self.checkout(fullpath, dirnode.digest, can_link=can_link)
-
-        for symlinknode in directory.symlinks:
-            # symlink
-            fullpath = os.path.join(dest, symlinknode.name)
-            os.symlink(symlinknode.target, fullpath)
+        pool = None
+        futures = []
+        files = []
+        try:
+            pending = collections.deque([(dest, tree)])
+            while pending:
+                path, digest = pending.popleft()
+                directory = self.get_directory(digest)
+
+                for dirnode in directory.directories:
+                    fullpath = os.path.join(path, dirnode.name)
+                    os.makedirs(fullpath, exist_ok=True)
+                    pending.append((fullpath, dirnode.digest))
+
+                for symlinknode in directory.symlinks:
+                    fullpath = os.path.join(path, symlinknode.name)
+                    os.symlink(symlinknode.target, fullpath)
+
+                for filenode in directory.files:
+                    files.append((os.path.join(path, filenode.name), filenode))
+
+                    if len(files) >= _CHECKOUT_BATCH_SIZE:
+                        if can_link:
+                            self._checkout_files(files, can_link)
+                        else:
+                            if pool is None:
+                                pool = ThreadPoolExecutor(max_workers=_CHECKOUT_MAX_WORKERS)
+                            futures.append(pool.submit(self._checkout_files, files, can_link))
+                        files = []
+
+            # Check out the last batch in this thread while waiting for the pool
+            self._checkout_files(files, can_link)
+
+            for future in futures:
+                future.result()
+        finally:
+            if pool is not None:
+                # Don't start any further batches if we failed
+                for future in futures:
+                    future.cancel()
+                pool.shutdown()
 
     # pull_tree():
     #
@@ -272,6 +315,32 @@ class CASCache:
     def objpath(self, digest):
         return os.path.join(self.casdir, "objects", digest.hash[:2], digest.hash[2:])
 
+    # get_directory():
+    #
+    # Get the parsed Directory message for a directory digest.
+    #
+    # Recently used Directory messages are kept in memory, the returned
+    # message is shared and must not be modified.
+    #
+    # Args:
+    #     digest (Digest): The digest of the Directory
+    #
+    # Returns:
+    #     (Directory): The Directory message
+    #
+    # Raises:
+    #     FileNotFoundError: If the Directory is not in the local cache
+    #
+    def get_directory(self, digest):
+        directory = self._directory_cache.get(digest)
+        if directory is None:
+            directory = remote_execution_pb2.Directory()
+            with open(self.objpath(digest), "rb") as f:
+                directory.ParseFromString(f.read())
+            self._directory_cache.put(digest, directory)
+
+        return directory
+
     # open():
     #
     # Open file read-only by CAS digest and return a corresponding file object.
@@ -407,8 +476,86 @@ class CASCache:
             tree.ParseFromString(f.read())
 
         root_directory = tree.root.SerializeToString()
+        root_digest = utils._message_digest(root_directory)
+
+        # The imported directories are usually read again right away
+        self._directory_cache.put(root_digest, tree.root)
+        for child in tree.children:
+            self._directory_cache.put(utils._message_digest(child.SerializeToString()), child)
+
+        return root_digest
+
+    # get_action_result():
+    #
+    # Look up the result of a previously executed action in the
+    # local action cache.
+    #
+    # A result is only returned if the output directories and the
+    # captured logs it refers to are still complete in the local
+    # cache, stale entries are removed.
+    #
+    # Args:
+    #     action_digest (Digest): The digest of the Action
+    #
+    # Returns:
+    #     (ActionResult): The cached ActionResult, or None
+    #
+    def get_action_result(self, action_digest):
+        refpath = self._action_refpath(action_digest)
+        try:
+            with open(refpath, "rb") as f:
+                result_digest = remote_execution_pb2.Digest.FromString(f.read())
+        except (OSError, DecodeError):
+            return None
+
+        try:
+            with self.open(result_digest, "rb") as f:
+                action_result = remote_execution_pb2.ActionResult.FromString(f.read())
+
+            for output_directory in action_result.output_directories:
+                with self.open(output_directory.tree_digest, "rb") as f:
+                    tree = remote_execution_pb2.Tree.FromString(f.read())
+                root_digest = utils._message_digest(tree.root.SerializeToString())
+                if not self.contains_directory(root_digest, with_files=True):
+                    raise FileNotFoundError("Output directory {} is incomplete".format(output_directory.path))
+
+            logs = [digest for digest in (action_result.stdout_digest, action_result.stderr_digest) if digest.hash]
+            if logs and not self.contains_files(logs):
+                raise FileNotFoundError("Captured logs are missing")
+        except (OSError, DecodeError):
+            # Entries whose blobs were expired are cache misses
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(refpath)
+            return None
+
+        # Mark the entry as recently used
+        with contextlib.suppress(OSError):
+            os.utime(refpath)
 
-        return utils._message_digest(root_directory)
+        return action_result
+
+    # set_action_result():
+    #
+    # Store the result of an executed action in the local action cache.
+    #
+    # The ActionResult message is stored in CAS, and a reference to it
+    # is stored in the action cache directory under the action digest.
+    # The least recently used entries are removed to keep at most
+    # _ACTION_CACHE_SUBDIR_ENTRIES entries in each subdirectory.
+    #
+    # Args:
+    #     action_digest (Digest): The digest of the Action
+    #     action_result (ActionResult): The result of the Action
+    #
+    def set_action_result(self, action_digest, action_result):
+        result_digest = self.add_object(buffer=action_result.SerializeToString())
+
+        refpath = self._action_refpath(action_digest)
+        os.makedirs(os.path.dirname(refpath), exist_ok=True)
+        with utils.save_file_atomic(refpath, "wb", tempdir=self.tmpdir) as f:
+            f.write(result_digest.SerializeToString())
+
+        self._prune_action_cache(os.path.dirname(refpath))
 
     # missing_blobs_for_directory():
     #
@@ -428,6 +575,11 @@ class CASCache:
     #
     # Determine which blobs are missing locally or on the remote.
     #
+    # The blobs are checked in batches, sized according to the limits
+    # of the remote, and a few FindMissingBlobs requests are kept in
+    # flight while `blobs` is consumed, such that the requests overlap
+    # with walking a directory tree with required_blobs_for_directory().
+    #
     # Args:
     #     blobs ([Digest]): List of directory digests to check
     #
@@ -438,20 +590,16 @@ class CASCache:
 
         if remote:
             instance_name = remote.local_cas_instance_name
+            batch_size = remote.find_missing_blobs_batch_size()
         else:
             instance_name = ""
+            batch_size = _FIND_MISSING_BLOBS_BATCH_SIZE
 
         missing_blobs = dict()
-        # Limit size of FindMissingBlobs request
-        for required_blobs_group in _grouper(iter(blobs), 512):
-            request = remote_execution_pb2.FindMissingBlobsRequest(instance_name=instance_name)
-
-            for required_digest in required_blobs_group:
-                d = request.blob_digests.add()
-                d.CopyFrom(required_digest)
 
+        def collect(future):
             try:
-                response = cas.FindMissingBlobs(request)
+                response = future.result()
             except grpc.RpcError as e:
                 if e.code() == grpc.StatusCode.INVALID_ARGUMENT and e.details().startswith("Invalid instance name"):
                     raise CASCacheError("Unsupported buildbox-casd version: FindMissingBlobs failed") from e
@@ -462,6 +610,26 @@ class CASCache:
                 d.CopyFrom(missing_digest)
                 missing_blobs[d.hash] = d
 
+        in_flight = collections.deque()
+        try:
+            # Limit size of FindMissingBlobs request
+            for required_blobs_group in _grouper(iter(blobs), batch_size):
+                request = remote_execution_pb2.FindMissingBlobsRequest(instance_name=instance_name)
+
+                for required_digest in required_blobs_group:
+                    d = request.blob_digests.add()
+                    d.CopyFrom(required_digest)
+
+                in_flight.append(cas.FindMissingBlobs.future(request))
+                if len(in_flight) >= _FIND_MISSING_BLOBS_MAX_IN_FLIGHT:
+                    collect(in_flight.popleft())
+
+            while in_flight:
+                collect(in_flight.popleft())
+        finally:
+            for future in in_flight:
+                future.cancel()
+
         return missing_blobs.values()
 
     # required_blobs_for_directory():
@@ -469,30 +637,109 @@ class CASCache:
     # Generator that returns the Digests of all blobs in the tree specified by
     # the Digest of the toplevel Directory object.
     #
+    # The tree is walked iteratively, depth first, and the Digests are
+    # yielded as soon as each Directory is read.
+    #
     def required_blobs_for_directory(self, directory_digest, *, excluded_subdirs=None):
         if not excluded_subdirs:
             excluded_subdirs = []
 
-        # parse directory, and recursively add blobs
-
-        yield directory_digest
+        # Stack of directories left to walk, the excluded subdirectories
+        # only apply to the toplevel directory
+        pending = [(directory_digest, excluded_subdirs)]
+        while pending:
+            digest, excluded = pending.pop()
 
-        directory = remote_execution_pb2.Directory()
+            yield digest
 
-        with open(self.objpath(directory_digest), "rb") as f:
-            directory.ParseFromString(f.read())
+            directory = self.get_directory(digest)
 
-        for filenode in directory.files:
-            yield filenode.digest
+            for filenode in directory.files:
+                yield filenode.digest
 
-        for dirnode in directory.directories:
-            if dirnode.name not in excluded_subdirs:
-                yield from self.required_blobs_for_directory(dirnode.digest)
+            # Push in reverse order so that subdirectories are walked in order
+            for dirnode in reversed(directory.directories):
+                if dirnode.name not in excluded:
+                    pending.append((dirnode.digest, ()))
 
     ################################################
     #             Local Private Methods            #
     ################################################
 
+    # _action_refpath():
+    #
+    # Return the path of the local action cache entry of an action.
+    #
+    # Args:
+    #     action_digest (Digest): The digest of the Action
+    #
+    # Returns:
+    #     (str): The path of the entry
+    #
+    def _action_refpath(self, action_digest):
+        return os.path.join(self.actiondir, action_digest.hash[:2], action_digest.hash[2:])
+
+    # _prune_action_cache():
+    #
+    # Remove the least recently used entries of a subdirectory of the
+    # local action cache, keeping at most _ACTION_CACHE_SUBDIR_ENTRIES.
+    #
+    # Args:
+    #     subdir (str): The subdirectory of the action cache
+    #
+    def _prune_action_cache(self, subdir):
+        entries = []
+        with os.scandir(subdir) as it:
+            for entry in it:
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    # Removed by a concurrent job
+                    pass
+
+        if len(entries) <= _ACTION_CACHE_SUBDIR_ENTRIES:
+            return
+
+        entries.sort(reverse=True)
+        for _, path in entries[_ACTION_CACHE_SUBDIR_ENTRIES:]:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+
+    # _checkout_files():
+    #
+    # Checkout a batch of files, this is used by checkout().
+    #
+    # Args:
+    #     files (list): A list of (path, FileNode) tuples to checkout
+    #     can_link (bool): Whether we can create hard links in the destination
+    #
+    def _checkout_files(self, files, can_link):
+        for fullpath, filenode in files:
+            node_properties = filenode.node_properties
+            if node_properties.HasField("mtime"):
+                mtime = utils._parse_protobuf_timestamp(node_properties.mtime)
+            else:
+                mtime = None
+
+            if can_link and mtime is None:
+                # regular file, create hardlink
+                utils.safe_link(self.objpath(filenode.digest), fullpath)
+            else:
+                utils.safe_copy(self.objpath(filenode.digest), fullpath, copystat=False)
+                if mtime is not None:
+                    utils._set_file_mtime(fullpath, mtime)
+
+            if filenode.is_executable:
+                st = os.stat(fullpath)
+                mode = st.st_mode
+                if mode & stat.S_IRUSR:
+                    mode |= stat.S_IXUSR
+                if mode & stat.S_IRGRP:
+                    mode |= stat.S_IXGRP
+                if mode & stat.S_IROTH:
+                    mode |= stat.S_IXOTH
+                os.chmod(fullpath, mode)
+
     # _temporary_object():
     #
     # Returns:
@@ -509,13 +756,34 @@ class CASCache:
     #
     # Fetches remote directory and adds it to content addressable store.
     #
-    # This recursively fetches directory objects and files.
+    # This fetches directory objects and files. The directory tree is
+    # streamed from the remote with GetTree, and the blobs of each page
+    # are downloaded while the next pages are being received.
+    #
+    # Remotes which do not implement GetTree fall back to fetching
+    # the directory tree with buildbox-casd before fetching the files.
     #
     # Args:
     #     remote (Remote): The remote to use.
     #     dir_digest (Digest): Digest object for the directory to fetch.
     #
     def _fetch_directory(self, remote, dir_digest):
+        remote.init()
+
+        try:
+            self._stream_directory(remote, dir_digest)
+            return
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.NOT_FOUND:
+                raise BlobNotFound(
+                    dir_digest.hash,
+                    "Failed to fetch directory tree {}: {}: {}".format(dir_digest.hash, e.code().name, e.details()),
+                ) from e
+            if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                raise CASCacheError(
+                    "Failed to fetch directory tree {}: {}: {}".format(dir_digest.hash, e.code().name, e.details())
+                ) from e
+
         local_cas = self.get_local_cas()
 
         request = local_cas_pb2.FetchTreeRequest()
@@ -538,6 +806,63 @@ class CASCache:
         required_blobs = self.required_blobs_for_directory(dir_digest)
         self.fetch_blobs(remote, required_blobs)
 
+    # _stream_directory():
+    #
+    # Fetch a directory tree and its files, downloading the Directory
+    # messages and files referenced by each page of GetTree as blobs,
+    # while the following pages are received.
+    #
+    # Subdirectories which are missing on the remote are omitted by
+    # GetTree, they are reported by the download of their Directory blob.
+    #
+    # Args:
+    #     remote (CASRemote): The remote to use
+    #     dir_digest (Digest): Digest object for the directory to fetch
+    #
+    # Raises:
+    #     (grpc.RpcError): If GetTree fails
+    #     (BlobNotFound): If a blob of the tree is missing on the remote
+    #
+    def _stream_directory(self, remote, dir_digest):
+        cas = remote_execution_pb2_grpc.ContentAddressableStorageStub(remote.channel)
+
+        batch = _CASBatchRead(remote, max_in_flight=self._fetch_batches)
+        batch.add(dir_digest)
+        added = {dir_digest.hash}
+
+        def add(digest):
+            if digest.hash and digest.hash not in added:
+                added.add(digest.hash)
+                batch.add(digest)
+
+        try:
+            page_token = ""
+            while True:
+                request = remote_execution_pb2.GetTreeRequest(
+                    instance_name=remote.spec.instance_name or "",
+                    root_digest=dir_digest,
+                    page_size=_GET_TREE_PAGE_SIZE,
+                    page_token=page_token,
+                )
+
+                page_token = ""
+                for response in cas.GetTree(request):
+                    for directory in response.directories:
+                        for filenode in directory.files:
+                            add(filenode.digest)
+                        for dirnode in directory.directories:
+                            add(dirnode.digest)
+
+                    page_token = response.next_page_token
+
+                if not page_token:
+                    break
+        except BaseException:
+            batch.cancel()
+            raise
+
+        batch.send()
+
     def _fetch_tree(self, remote, digest):
         self.fetch_blobs(remote, [digest])
 
@@ -573,7 +898,8 @@ class CASCache:
 
         remote.init()
 
-        batch = _CASBatchRead(remote)
+        # Keep several batches in flight, unless missing blobs need to be collected
+        batch = _CASBatchRead(remote, max_in_flight=0 if allow_partial else self._fetch_batches)
 
         for digest in digests:
             if digest.hash:
@@ -618,6 +944,16 @@ class CASCache:
         assert not self._cache_usage_monitor_forbidden
         return self._cache_usage_monitor.get_cache_usage()
 
+    # get_directory_cache_usage():
+    #
+    # Fetches the hit rate of the in memory Directory cache.
+    #
+    # Returns:
+    #     (DirectoryCacheUsage): The current status
+    #
+    def get_directory_cache_usage(self):
+        return self._directory_cache.get_usage()
+
     # get_casd_process_manager()
     #
     # Get the underlying buildbox-casd process
@@ -662,6 +998,80 @@ class _CASCacheUsage:
             )
 
 
+# _DirectoryCacheUsage
+#
+# A simple object to report the hit rate of the Directory cache.
+#
+# Args:
+#    hits (int): The number of Directory lookups served from memory
+#    misses (int): The number of Directory lookups which had to be parsed
+#
+class _DirectoryCacheUsage:
+    def __init__(self, hits, misses):
+        self.hits = hits
+        self.misses = misses
+        self.lookups = hits + misses
+        if self.lookups:
+            self.hit_percent = int(self.hits * 100 / self.lookups)
+        else:
+            self.hit_percent = 0
+
+    # Formattable into a human readable string
+    #
+    def __str__(self):
+        return "{} hits, {} misses ({}%)".format(self.hits, self.misses, self.hit_percent)
+
+
+# _DirectoryCache
+#
+# A size bounded, least recently used cache of parsed Directory
+# messages, keyed by digest. This is used from multiple job threads.
+#
+# Args:
+#    max_size (int): The maximum total size of the cached messages,
+#                    in bytes of serialized messages
+#
+class _DirectoryCache:
+    def __init__(self, max_size):
+        self._max_size = max_size
+        self._size = 0
+        self._entries = collections.OrderedDict()  # (Directory, size) tuples keyed by digest hash
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, digest):
+        with self._lock:
+            try:
+                directory, _ = self._entries[digest.hash]
+            except KeyError:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(digest.hash)
+            self._hits += 1
+            return directory
+
+    def put(self, digest, directory):
+        if digest.size_bytes > self._max_size:
+            return
+
+        with self._lock:
+            if digest.hash in self._entries:
+                return
+
+            self._entries[digest.hash] = (directory, digest.size_bytes)
+            self._size += digest.size_bytes
+
+            while self._size > self._max_size:
+                _, (_, size) = self._entries.popitem(last=False)
+                self._size -= size
+
+    def get_usage(self):
+        with self._lock:
+            return _DirectoryCacheUsage(self._hits, self._misses)
+
+
 # _CASCacheUsageMonitor
 #
 # This manages the subprocess that tracks cache usage information via
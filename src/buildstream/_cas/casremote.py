@@ -15,9 +15,12 @@
 #  License along with this library. If not, see <http://www.gnu.org/licenses/>.
 #
 
+import collections
+
 import grpc
 
 from .._protos.google.rpc import code_pb2
+from .._protos.build.bazel.remote.execution.v2 import remote_execution_pb2, remote_execution_pb2_grpc
 from .._protos.build.buildgrid import local_cas_pb2
 
 from .._remote import BaseRemote
@@ -27,10 +30,13 @@ from .._exceptions import CASRemoteError
 # Limit payload to 1 MiB to leave sufficient headroom for metadata.
 _MAX_PAYLOAD_BYTES = 1024 * 1024
 
-# How many digests to put in a single gRPC message.
+# The space taken by a digest in a gRPC message.
 # A 256-bit hash requires 64 bytes of space (hexadecimal encoding).
 # 80 bytes provide sufficient space for hash, size, and protobuf overhead.
-_MAX_DIGESTS = _MAX_PAYLOAD_BYTES / 80
+_DIGEST_BYTES = 80
+
+# How many digests to put in a single gRPC message.
+_MAX_DIGESTS = _MAX_PAYLOAD_BYTES / _DIGEST_BYTES
 
 
 class BlobNotFound(CASRemoteError):
@@ -48,6 +54,9 @@ class CASRemote(BaseRemote):
         self.cascache = cascache
         self.local_cas_instance_name = None
 
+        # The maximum size of batch requests supported by the remote
+        self.max_batch_total_size_bytes = _MAX_PAYLOAD_BYTES
+
     # check_remote
     # _configure_protocols():
     #
@@ -77,6 +86,39 @@ class CASRemote(BaseRemote):
             raise
         self.local_cas_instance_name = response.instance_name
 
+        self.max_batch_total_size_bytes = self._query_max_batch_total_size_bytes()
+
+    # find_missing_blobs_batch_size():
+    #
+    # The number of digests to send in a single FindMissingBlobs
+    # request for this remote, based on the batch size limit
+    # advertised by the remote.
+    #
+    # Returns:
+    #     (int): The number of digests
+    #
+    def find_missing_blobs_batch_size(self):
+        return max(min(self.max_batch_total_size_bytes, _MAX_PAYLOAD_BYTES) // _DIGEST_BYTES, 1)
+
+    # _query_max_batch_total_size_bytes():
+    #
+    # Query the batch size limit of the remote from its capabilities,
+    # falling back to the default if the remote does not specify any.
+    #
+    def _query_max_batch_total_size_bytes(self):
+        capabilities_service = remote_execution_pb2_grpc.CapabilitiesStub(self.channel)
+        request = remote_execution_pb2.GetCapabilitiesRequest()
+        if self.spec.instance_name:
+            request.instance_name = self.spec.instance_name
+
+        try:
+            response = capabilities_service.GetCapabilities(request)
+        except grpc.RpcError:
+            # Not all CAS servers implement the Capabilities service
+            return _MAX_PAYLOAD_BYTES
+
+        return response.cache_capabilities.max_batch_total_size_bytes or _MAX_PAYLOAD_BYTES
+
     # push_message():
     #
     # Push the given protobuf message to a remote.
@@ -98,11 +140,17 @@ class CASRemote(BaseRemote):
 
 # Represents a batch of blobs queued for fetching.
 #
+# If `max_in_flight` is set, requests are sent as soon as they are full
+# and up to `max_in_flight` of them are kept in flight while blobs are
+# being added, such that the download overlaps with producing the digests.
+#
 class _CASBatchRead:
-    def __init__(self, remote):
+    def __init__(self, remote, *, max_in_flight=0):
         self._remote = remote
+        self._max_in_flight = max_in_flight
         self._requests = []
         self._request = None
+        self._in_flight = collections.deque()
         self._sent = False
 
     def add(self, digest):
@@ -116,38 +164,65 @@ class _CASBatchRead:
         request_digest = self._request.blob_digests.add()
         request_digest.CopyFrom(digest)
 
+        if self._max_in_flight and len(self._request.blob_digests) >= _MAX_DIGESTS:
+            try:
+                self._start(self._requests.pop())
+            except BaseException:
+                self.cancel()
+                raise
+            self._request = None
+
     def send(self, *, missing_blobs=None):
         assert not self._sent
+        assert missing_blobs is None or not self._max_in_flight, "Partial fetches cannot be pipelined"
         self._sent = True
 
-        if not self._requests:
-            return
-
         local_cas = self._remote.cascache.get_local_cas()
 
-        for request in self._requests:
-            batch_response = local_cas.FetchMissingBlobs(request)
+        try:
+            for request in self._requests:
+                if self._max_in_flight:
+                    self._start(request)
+                else:
+                    self._check_response(local_cas.FetchMissingBlobs(request), missing_blobs)
+
+            while self._in_flight:
+                self._check_response(self._in_flight.popleft().result(), None)
+        finally:
+            self.cancel()
+
+    def _start(self, request):
+        local_cas = self._remote.cascache.get_local_cas()
 
-            for response in batch_response.responses:
-                if response.status.code == code_pb2.NOT_FOUND:
-                    if missing_blobs is None:
-                        raise BlobNotFound(
-                            response.digest.hash,
-                            "Failed to download blob {}: {}".format(response.digest.hash, response.status.code),
-                        )
+        self._in_flight.append(local_cas.FetchMissingBlobs.future(request))
+        if len(self._in_flight) >= self._max_in_flight:
+            self._check_response(self._in_flight.popleft().result(), None)
+
+    def cancel(self):
+        while self._in_flight:
+            self._in_flight.popleft().cancel()
+
+    def _check_response(self, batch_response, missing_blobs):
+        for response in batch_response.responses:
+            if response.status.code == code_pb2.NOT_FOUND:
+                if missing_blobs is None:
+                    raise BlobNotFound(
+                        response.digest.hash,
+                        "Failed to download blob {}: {}".format(response.digest.hash, response.status.code),
+                    )
 
-                    missing_blobs.append(response.digest)
+                missing_blobs.append(response.digest)
 
-                if response.status.code != code_pb2.OK:
-                    raise CASRemoteError(
-                        "Failed to download blob {}: {}".format(response.digest.hash, response.status.code)
-                    )
-                if response.digest.size_bytes != len(response.data):
-                    raise CASRemoteError(
-                        "Failed to download blob {}: expected {} bytes, received {} bytes".format(
-                            response.digest.hash, response.digest.size_bytes, len(response.data)
-                        )
+            if response.status.code != code_pb2.OK:
+                raise CASRemoteError(
+                    "Failed to download blob {}: {}".format(response.digest.hash, response.status.code)
+                )
+            if response.digest.size_bytes != len(response.data):
+                raise CASRemoteError(
+                    "Failed to download blob {}: expected {} bytes, received {} bytes".format(
+                        response.digest.hash, response.digest.size_bytes, len(response.data)
                     )
+                )
 
 
 # Represents a batch of blobs queued for upload.
@@ -266,6 +266,13 @@ class _ContentAddressableStorageServicer(remote_execution_pb2_grpc.ContentAddres
         except grpc.RpcError as err:
             context.abort(err.code(), err.details())
 
+    def GetTree(self, request, context):
+        self.logger.info("Getting tree '%s'", request.root_digest)
+        try:
+            yield from self.cas.GetTree(request)
+        except grpc.RpcError as err:
+            context.abort(err.code(), err.details())
+
 
 class _CapabilitiesServicer(remote_execution_pb2_grpc.CapabilitiesServicer):
     def __init__(self):
@@ -0,0 +1,429 @@
+#
+#  Copyright (C) 2020 Bloomberg Finance LP
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+from .._protos.google.rpc import code_pb2
+from .._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
+from .._protos.build.buildgrid import local_cas_pb2
+from .. import utils
+from .._exceptions import CASCacheError
+from .._workspacewatcher import query_changes
+
+
+# Number of files captured per CaptureFiles request
+_CAPTURE_BATCH_SIZE = 1024
+
+# Version of the format of the index files, bump when the format changes
+_INDEX_VERSION = 2
+
+
+# FileIndex()
+#
+# A persistent index of the files of local directories imported into CAS,
+# such that importing the same directory again only needs to hash the
+# files which changed since the last import.
+#
+# An index file is kept for every imported directory, mapping the
+# relative path of each regular file to the status of the file when it
+# was captured (device, inode, size, mtime and ctime) and the resulting
+# FileNode. The Directory messages are built from the FileNodes, files
+# whose status changed are captured again with buildbox-casd.
+#
+# The first import of a directory captures the whole tree with
+# buildbox-casd, and the index is only used for the directory if the
+# Directory messages built from the index match the captured tree.
+#
+# Files modified after the previous import started are always captured
+# again, as their mtime may not have changed if they were modified within
+# the timestamp granularity of the filesystem.
+#
+# If the directory is watched by a WorkspaceWatcher, only the directories
+# which changed since the previous import are scanned, the status of the
+# files of the other directories is taken from the index.
+#
+# Args:
+#    cascache (CASCache): The CAS cache to import directories into
+#    indexdir (str): The directory to store the index files in
+#
+class FileIndex:
+    def __init__(self, cascache, indexdir):
+        self._cascache = cascache
+        self._indexdir = indexdir
+        self._lock = threading.Lock()
+
+    # import_directory():
+    #
+    # Import a directory tree into CAS.
+    #
+    # The resulting Directory messages are the same as the ones of a
+    # CasBasedDirectory into which the directory was imported with
+    # import_files().
+    #
+    # Args:
+    #     path (str): Path to directory to import
+    #     properties (list): Optional list of node properties to capture
+    #     watch_socket (str): The socket of the watcher of the directory, if any
+    #
+    # Returns:
+    #     (Digest): The digest of the imported directory, or None if the
+    #               directory cannot be imported with the index
+    #
+    def import_directory(self, path, *, properties=None, watch_socket=None):
+        properties = sorted(properties or [])
+        indexpath = self._index_path(path, properties)
+
+        with self._lock:
+            # Take the time before walking the directory, files modified
+            # after this are not trusted by the next import
+            start_time = int(time.time() * 1e9)
+
+            loaded = self._load(indexpath)
+            if loaded is None:
+                return self._import_initial(path, properties, indexpath, start_time, watch_socket)
+
+            previous_time, index, previous_directories, previous_token = loaded
+            if index is None:
+                # The index cannot represent this directory
+                return None
+
+            token = changes = trees = None
+            if watch_socket:
+                token, changes, trees = query_changes(watch_socket, previous_token)
+
+            if changes is not None:
+                directories, stats = self._rescan(path, previous_directories, index, changes, trees)
+            else:
+                directories, stats = self._scan(path)
+
+            nodes = {}
+            new_index = {}
+            capture = []
+            for relpath, status in stats.items():
+                cached = index.get(relpath)
+                if (
+                    cached is not None
+                    and cached[0] == status
+                    and status[3] < previous_time
+                    and status[4] < previous_time
+                ):
+                    nodes[relpath] = remote_execution_pb2.FileNode.FromString(cached[1])
+                    new_index[relpath] = cached
+                else:
+                    capture.append(relpath)
+
+            # The blobs of unchanged files may have been expired from the
+            # local cache since the previous import
+            missing = {digest.hash for digest in self._cascache.missing_blobs(node.digest for node in nodes.values())}
+            if missing:
+                for relpath in [relpath for relpath, node in nodes.items() if node.digest.hash in missing]:
+                    del nodes[relpath]
+                    del new_index[relpath]
+                    capture.append(relpath)
+
+            for batch_start in range(0, len(capture), _CAPTURE_BATCH_SIZE):
+                batch = capture[batch_start : batch_start + _CAPTURE_BATCH_SIZE]
+                for relpath, node in zip(batch, self._capture_files(path, batch, properties)):
+                    nodes[relpath] = node
+                    new_index[relpath] = (stats[relpath], node.SerializeToString())
+
+            digests, buffers = self._build_directories(directories, nodes)
+
+            missing_directories = [buffers[digest.hash] for digest in self._cascache.missing_blobs(digests.values())]
+            if missing_directories:
+                self._cascache.add_objects(buffers=missing_directories)
+
+            self._save(indexpath, start_time, new_index, directories, token)
+
+        return digests[""]
+
+    ################################################
+    #               Private Methods                #
+    ################################################
+
+    def _index_path(self, path, properties):
+        key = "\0".join([os.path.abspath(path), *properties])
+        return os.path.join(self._indexdir, hashlib.sha256(key.encode()).hexdigest())
+
+    # _scan():
+    #
+    # Walk a directory tree without reading the files.
+    #
+    # Args:
+    #    path (str): The path of the imported directory
+    #    root (str): The relative path of the subdirectory to walk
+    #
+    # Returns:
+    #    (dict): The entries of each directory, keyed by relative path, as
+    #            (name, type, value) tuples where value is the relative
+    #            path of files and directories, or the target of symlinks
+    #    (dict): The status of each regular file, keyed by relative path
+    #
+    def _scan(self, path, root=""):
+        directories = {}
+        stats = {}
+
+        pending = [root]
+        while pending:
+            relpath = pending.pop()
+            directories[relpath] = self._scan_directory(path, relpath, stats)
+            pending.extend(value for _, entrytype, value in directories[relpath] if entrytype == "directory")
+
+        return directories, stats
+
+    # _scan_directory():
+    #
+    # List the entries of a single directory, see _scan(), and add the
+    # status of its regular files to `stats`.
+    #
+    def _scan_directory(self, path, relpath, stats):
+        entries = []
+        with os.scandir(os.path.join(path, relpath)) as it:
+            for entry in it:
+                child = os.path.join(relpath, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    entries.append((entry.name, "directory", child))
+                elif entry.is_symlink():
+                    entries.append((entry.name, "symlink", os.readlink(entry.path)))
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    entries.append((entry.name, "file", child))
+                    stats[child] = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+        return entries
+
+    # _rescan():
+    #
+    # Update the result of a previous _scan() with the paths reported
+    # as changed by the watcher of the directory.
+    #
+    # The parent directories of the changed paths are listed again, as
+    # well as the changed paths which are directories. The directories
+    # in `trees` and the new subdirectories are walked entirely.
+    #
+    # Args:
+    #    path (str): The path of the imported directory
+    #    previous_directories (dict): The directories of the previous scan
+    #    index (dict): The index of the previous import
+    #    changes (set): The relative paths which changed
+    #    trees (set): The relative paths of the directories to walk entirely
+    #
+    # Returns:
+    #    (dict): The entries of each directory, see _scan()
+    #    (dict): The status of each regular file, see _scan()
+    #
+    def _rescan(self, path, previous_directories, index, changes, trees):
+        directories = dict(previous_directories)
+        stats = {relpath: cached[0] for relpath, cached in index.items()}
+
+        dirty = set(changes)
+        dirty.update(os.path.dirname(relpath) for relpath in changes)
+
+        # Relative paths of the directories listed by this scan
+        scanned = set()
+
+        def scan_tree(relpath):
+            subdirectories, substats = self._scan(path, relpath)
+            directories.update(subdirectories)
+            stats.update(substats)
+            scanned.update(subdirectories)
+
+        # Parents are listed before their subdirectories
+        for relpath in sorted(dirty):
+            fullpath = os.path.join(path, relpath)
+            if relpath in scanned or not os.path.isdir(fullpath) or os.path.islink(fullpath):
+                # Already listed, removed or not a directory
+                continue
+
+            if relpath in trees or relpath not in directories:
+                scan_tree(relpath)
+                continue
+
+            directories[relpath] = self._scan_directory(path, relpath, stats)
+            scanned.add(relpath)
+            for _, entrytype, value in directories[relpath]:
+                if entrytype == "directory" and value not in directories:
+                    scan_tree(value)
+
+        # Drop the removed directories and files
+        reachable = {}
+        reachable_stats = {}
+        pending = [""]
+        while pending:
+            relpath = pending.pop()
+            reachable[relpath] = directories[relpath]
+            for _, entrytype, value in directories[relpath]:
+                if entrytype == "directory":
+                    pending.append(value)
+                elif entrytype == "file":
+                    reachable_stats[value] = stats[value]
+
+        return reachable, reachable_stats
+
+    # _capture_files():
+    #
+    # Capture files into CAS.
+    #
+    # Returns:
+    #    (list): A FileNode without name for each file
+    #
+    def _capture_files(self, path, relpaths, properties):
+        request = local_cas_pb2.CaptureFilesRequest()
+        request.path.extend(os.path.join(path, relpath) for relpath in relpaths)
+        request.node_properties.extend(properties)
+
+        response = self._cascache.get_local_cas().CaptureFiles(request)
+
+        if len(response.responses) != len(relpaths):
+            raise CASCacheError(
+                "Expected {} responses from CaptureFiles, got {}".format(len(relpaths), len(response.responses))
+            )
+
+        nodes = []
+        for blob_response in response.responses:
+            if blob_response.status.code == code_pb2.RESOURCE_EXHAUSTED:
+                raise CASCacheError("Cache too full", reason="cache-too-full")
+            if blob_response.status.code != code_pb2.OK:
+                raise CASCacheError(
+                    "Failed to capture blob {}: {}".format(blob_response.path, blob_response.status.code)
+                )
+
+            node = remote_execution_pb2.FileNode()
+            node.digest.CopyFrom(blob_response.digest)
+            node.is_executable = blob_response.is_executable
+            if "mtime" in properties and blob_response.node_properties.HasField("mtime"):
+                node.node_properties.mtime.CopyFrom(blob_response.node_properties.mtime)
+            nodes.append(node)
+
+        return nodes
+
+    # _import_initial():
+    #
+    # Import a directory which has no index yet with buildbox-casd, and
+    # create its index from the captured tree.
+    #
+    # Returns:
+    #    (Digest): The digest of the imported directory, or None if the
+    #              index cannot represent the directory
+    #
+    def _import_initial(self, path, properties, indexpath, start_time, watch_socket):
+        token = None
+        if watch_socket:
+            token, _, _ = query_changes(watch_socket, None)
+
+        directories, stats = self._scan(path)
+        root_digest = self._cascache.import_directory(path, properties=properties)
+
+        nodes = {}
+        captured_directories = set()
+        pending = [("", root_digest)]
+        while pending:
+            relpath, digest = pending.pop()
+            captured_directories.add(relpath)
+            directory = self._cascache.get_directory(digest)
+            for filenode in directory.files:
+                node = remote_execution_pb2.FileNode()
+                node.CopyFrom(filenode)
+                node.ClearField("name")
+                nodes[os.path.join(relpath, filenode.name)] = node
+            for dirnode in directory.directories:
+                pending.append((os.path.join(relpath, dirnode.name), dirnode.digest))
+
+        if nodes.keys() != stats.keys() or captured_directories != directories.keys():
+            # Files were added or removed while importing, try again next time
+            return None
+
+        digests, _ = self._build_directories(directories, nodes)
+        if digests.get("") != root_digest:
+            # The captured tree has properties which are not in the index,
+            # always import this directory without the index
+            self._save(indexpath, start_time, None, None, None)
+            return None
+
+        index = {relpath: (status, nodes[relpath].SerializeToString()) for relpath, status in stats.items()}
+        self._save(indexpath, start_time, index, directories, token)
+
+        return root_digest
+
+    # _build_directories():
+    #
+    # Build the Directory messages of the tree, deepest directories first.
+    #
+    # Returns:
+    #    (dict): The Digest of each directory, keyed by relative path
+    #    (dict): The serialized Directory messages, keyed by hash
+    #
+    def _build_directories(self, directories, nodes):
+        digests = {}
+        buffers = {}
+
+        for relpath in sorted(directories, key=lambda relpath: relpath.count(os.sep) if relpath else -1, reverse=True):
+            directory = remote_execution_pb2.Directory()
+            for name, entrytype, value in sorted(directories[relpath]):
+                if entrytype == "directory":
+                    dirnode = directory.directories.add()
+                    dirnode.name = name
+                    dirnode.digest.CopyFrom(digests[value])
+                elif entrytype == "file":
+                    filenode = directory.files.add()
+                    filenode.CopyFrom(nodes[value])
+                    filenode.name = name
+                else:
+                    symlinknode = directory.symlinks.add()
+                    symlinknode.name = name
+                    symlinknode.target = value
+
+            buffer = directory.SerializeToString()
+            digest = utils._message_digest(buffer)
+            digests[relpath] = digest
+            buffers[digest.hash] = buffer
+
+        return digests, buffers
+
+    # _load():
+    #
+    # Returns:
+    #    (tuple): The start time of the import which saved the index, the
+    #             index, the directories and the token of the watcher of
+    #             the import, or None if there is no index. The index is
+    #             None if the directory cannot be imported with the index.
+    #
+    def _load(self, indexpath):
+        try:
+            with open(indexpath, "rb") as f:
+                version, *loaded = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return None
+
+        if version != _INDEX_VERSION:
+            return None
+
+        return loaded
+
+    def _save(self, indexpath, index_time, index, directories, token):
+        try:
+            os.makedirs(self._indexdir, exist_ok=True)
+            with utils.save_file_atomic(indexpath, "wb") as f:
+                pickle.dump(
+                    (_INDEX_VERSION, index_time, index, directories, token), f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+        except OSError:
+            # Failing to save the index only makes the next import slower
+            pass
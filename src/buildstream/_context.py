@@ -33,9 +33,13 @@ from ._artifactcache import ArtifactCache
 from ._elementsourcescache import ElementSourcesCache
 from ._remotespec import RemoteSpec, RemoteExecutionSpec
 from ._sourcecache import SourceCache
-from ._cas import CASCache, CASLogLevel
+from ._cas import CASCache, CASLogLevel, FileIndex
+from ._workspacewatcher import watch_socket_path
 from .types import _CacheBuildTrees, _PipelineSelection, _SchedulerErrorAction
 from ._workspaces import Workspaces, WorkspaceProjectCache
+from ._yamlcache import YamlCache
+from ._jobdurations import JobDurations
+from .sandbox._operationmultiplexer import OperationMultiplexer
 from .node import Node, MappingNode
 
 
@@ -160,6 +164,9 @@ class Context:
         # Maximum number of retries for network tasks
         self.sched_network_retries: Optional[int] = None
 
+        # Maximum number of element files to read in parallel while loading
+        self.sched_loaders: Optional[int] = None
+
         # What to do when a build fails in non interactive mode
         self.sched_error_action: Optional[str] = None
 
@@ -184,6 +191,19 @@ class Context:
         # Whether or not to cache build trees on artifact creation
         self.cache_buildtrees: Optional[str] = None
 
+        # Whether to record and restore resolved cache keys in pipeline snapshots
+        self.pipeline_snapshots: bool = False
+
+        # Whether to query all artifact index remotes concurrently when pulling
+        self.race_remotes: bool = False
+
+        # Maximum number of blob download batches in flight when pulling
+        self.fetch_batches: int = 4
+
+        # Whether to hash all files of local sources and workspaces again
+        # instead of reusing the digests of unchanged files
+        self.rehash_local_files: bool = False
+
         # Whether directory trees are required for all artifacts in the local cache
         self.require_artifact_directories: bool = True
 
@@ -220,6 +240,10 @@ class Context:
         self._workspaces: Optional[Workspaces] = None
         self._workspace_project_cache: WorkspaceProjectCache = WorkspaceProjectCache()
         self._cascache: Optional[CASCache] = None
+        self._file_index: Optional[FileIndex] = None
+        self._yamlcache: Optional[YamlCache] = None
+        self._job_durations: Optional[JobDurations] = None
+        self._operation_multiplexer: OperationMultiplexer = OperationMultiplexer()
 
     # __enter__()
     #
@@ -242,6 +266,8 @@ class Context:
         if self._sourcecache:
             self._sourcecache.release_resources()
 
+        self._operation_multiplexer.release_resources()
+
         if self._cascache:
             self._cascache.release_resources(self.messenger)
 
@@ -352,7 +378,17 @@ class Context:
         # We need to find the first existing directory in the path of our
         # casdir - the casdir may not have been created yet.
         cache = defaults.get_mapping("cache")
-        cache.validate_keys(["quota", "pull-buildtrees", "cache-buildtrees"])
+        cache.validate_keys(
+            [
+                "quota",
+                "pull-buildtrees",
+                "cache-buildtrees",
+                "pipeline-snapshots",
+                "race-remotes",
+                "fetch-batches",
+                "rehash-local-files",
+            ]
+        )
 
         cas_volume = self.casdir
         while not os.path.exists(cas_volume):
@@ -387,6 +423,23 @@ class Context:
         # Load cache build trees configuration
         self.cache_buildtrees = cache.get_enum("cache-buildtrees", _CacheBuildTrees)
 
+        # Load pipeline snapshots configuration
+        self.pipeline_snapshots = cache.get_bool("pipeline-snapshots")
+
+        # Load remote racing configuration
+        self.race_remotes = cache.get_bool("race-remotes")
+
+        # Load local file hashing configuration
+        self.rehash_local_files = cache.get_bool("rehash-local-files")
+
+        # Load pipelined download configuration
+        self.fetch_batches = cache.get_int("fetch-batches")
+        if self.fetch_batches < 1:
+            provenance = cache.get_scalar("fetch-batches").get_provenance()
+            raise LoadError(
+                "{}: cache.fetch-batches must be at least 1".format(provenance), LoadErrorReason.INVALID_DATA
+            )
+
         # Load logging config
         logging = defaults.get_mapping("logging")
         logging.validate_keys(
@@ -412,12 +465,13 @@ class Context:
 
         # Load scheduler config
         scheduler = defaults.get_mapping("scheduler")
-        scheduler.validate_keys(["on-error", "fetchers", "builders", "pushers", "network-retries"])
+        scheduler.validate_keys(["on-error", "fetchers", "builders", "pushers", "network-retries", "loaders"])
         self.sched_error_action = scheduler.get_enum("on-error", _SchedulerErrorAction)
         self.sched_fetchers = scheduler.get_int("fetchers")
         self.sched_builders = scheduler.get_int("builders")
         self.sched_pushers = scheduler.get_int("pushers")
         self.sched_network_retries = scheduler.get_int("network-retries")
+        self.sched_loaders = scheduler.get_int("loaders")
 
         # Load build config
         build = defaults.get_mapping("build")
@@ -472,6 +526,40 @@ class Context:
 
         return self._sourcecache
 
+    # yamlcache
+    #
+    # The cache of parsed YAML trees, or None if the context
+    # has not been loaded yet.
+    #
+    @property
+    def yamlcache(self) -> Optional[YamlCache]:
+        if not self._yamlcache and self.cachedir:
+            self._yamlcache = YamlCache(os.path.join(self.cachedir, "yaml"))
+
+        return self._yamlcache
+
+    # job_durations
+    #
+    # The record of job durations of previous sessions, or None
+    # if the context has not been loaded yet.
+    #
+    @property
+    def job_durations(self) -> Optional[JobDurations]:
+        if not self._job_durations and self.cachedir:
+            self._job_durations = JobDurations(os.path.join(self.cachedir, "durations"))
+
+        return self._job_durations
+
+    # get_operation_multiplexer():
+    #
+    # Return the multiplexer tracking remote execution operations.
+    #
+    # Returns:
+    #    (OperationMultiplexer): The multiplexer
+    #
+    def get_operation_multiplexer(self) -> OperationMultiplexer:
+        return self._operation_multiplexer
+
     # add_project():
     #
     # Add a project to the context.
@@ -680,9 +768,47 @@ class Context:
                 cache_quota=self.config_cache_quota,
                 log_level=log_level,
                 log_directory=self.logdir,
+                fetch_batches=self.fetch_batches,
             )
         return self._cascache
 
+    # get_file_index()
+    #
+    # Return the index of the files of local directories imported into CAS.
+    #
+    # Returns:
+    #    (FileIndex): The file index
+    #
+    def get_file_index(self) -> FileIndex:
+        if self._file_index is None:
+            self._file_index = FileIndex(self.get_cascache(), os.path.join(self.cachedir, "fileindex"))
+
+        return self._file_index
+
+    # get_workspace_watch_dir()
+    #
+    # Return the directory of the sockets of the workspace watcher.
+    #
+    # Returns:
+    #    (str): The directory of the sockets
+    #
+    def get_workspace_watch_dir(self) -> str:
+        return os.path.join(self.cachedir, "watch")
+
+    # get_workspace_watch_socket()
+    #
+    # Return the socket the workspace watcher listens on for a
+    # workspace directory.
+    #
+    # Args:
+    #    directory: The directory of the workspace
+    #
+    # Returns:
+    #    (str): The path of the socket
+    #
+    def get_workspace_watch_socket(self, directory: str) -> str:
+        return watch_socket_path(self.get_workspace_watch_dir(), directory)
+
     ######################################################
     #                  Private methods                   #
     ######################################################
@@ -0,0 +1,252 @@
+#
+#  Copyright (C) 2020 Bloomberg Finance LP
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library. If not, see <http://www.gnu.org/licenses/>.
+#
+
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .types import _Scope
+
+if TYPE_CHECKING:
+    from .element import Element
+
+
+# DependencyGraph()
+#
+# An immutable index of the dependency graph of loaded elements, built
+# once such that traversals of large graphs only walk integer arrays
+# instead of the dependency lists of every element.
+#
+# Every element reachable from the targets gets a dense integer id, and
+# the build and runtime dependencies of the elements are stored as
+# adjacency arrays in compressed sparse row form: the dependencies of
+# the element with id `i` are `edges[offsets[i]:offsets[i + 1]]`.
+#
+# The traversals yield the elements in the same order as
+# Element._dependencies() does.
+#
+# Args:
+#    targets: The toplevel elements of the graph
+#
+class DependencyGraph:
+    def __init__(self, targets: Iterable["Element"]):
+        self._targets: List["Element"] = list(targets)
+
+        self._elements: List["Element"] = []  # The elements, by id
+        self._ids: Dict["Element", int] = {}  # The ids, by element
+
+        # Assign ids to all the reachable elements
+        pending = list(self._targets)
+        while pending:
+            element = pending.pop()
+            if element not in self._ids:
+                self._ids[element] = len(self._elements)
+                self._elements.append(element)
+                pending.extend(element._dependencies(_Scope.ALL, recurse=False))
+
+        self._build_offsets, self._build_edges = self._adjacency(_Scope.BUILD)
+        self._runtime_offsets, self._runtime_edges = self._adjacency(_Scope.RUN)
+
+        # All the elements, dependencies first
+        self._order: Optional[List["Element"]] = None
+        self._order = self.dependencies(self._targets, _Scope.ALL)
+
+    # __len__()
+    #
+    # Returns:
+    #    The number of elements in the graph
+    #
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    # __contains__()
+    #
+    # Returns:
+    #    Whether the element is in the graph
+    #
+    def __contains__(self, element: "Element") -> bool:
+        return element in self._ids
+
+    # build_dependencies()
+    #
+    # Get the direct build dependencies of an element of the graph.
+    #
+    # Args:
+    #    element: The element
+    #
+    # Returns:
+    #    The build dependencies, in the order they were declared
+    #
+    def build_dependencies(self, element: "Element") -> List["Element"]:
+        return self._neighbours(self._build_offsets, self._build_edges, self._ids[element])
+
+    # runtime_dependencies()
+    #
+    # Get the direct runtime dependencies of an element of the graph.
+    #
+    # Args:
+    #    element: The element
+    #
+    # Returns:
+    #    The runtime dependencies, in the order they were declared
+    #
+    def runtime_dependencies(self, element: "Element") -> List["Element"]:
+        return self._neighbours(self._runtime_offsets, self._runtime_edges, self._ids[element])
+
+    # dependencies()
+    #
+    # Get the dependencies of multiple elements of the graph in the
+    # specified scope, including the elements themselves unless the
+    # scope is _Scope.BUILD, never yielding an element twice.
+    #
+    # This is equivalent to calling Element._dependencies() on every
+    # target with a shared `visited` argument.
+    #
+    # Args:
+    #    targets: The elements to get the dependencies of
+    #    scope: The scope to get the dependencies in
+    #
+    # Returns:
+    #    The elements, dependencies first
+    #
+    def dependencies(self, targets: Sequence["Element"], scope: int) -> List["Element"]:
+        if scope == _Scope.ALL and self._order is not None and list(targets) == self._targets:
+            return list(self._order)
+
+        elements = self._elements
+
+        # Elements visited in the build scope and in the runtime scope
+        visited_build = bytearray(len(elements))
+        visited_runtime = bytearray(len(elements))
+
+        result = []
+        for target in targets:
+            target_id = self._ids[target]
+            if scope == _Scope.NONE:
+                result.append(target)
+                continue
+            if scope in (_Scope.BUILD, _Scope.ALL) and visited_build[target_id]:
+                continue
+            if scope in (_Scope.RUN, _Scope.ALL) and visited_runtime[target_id]:
+                continue
+
+            stack = [(target_id, scope, self._start(target_id, scope, visited_build, visited_runtime))]
+            while stack:
+                element_id, element_scope, deps = stack[-1]
+
+                # Dependencies are traversed in the runtime scope, except
+                # for the dependencies of elements in the _Scope.ALL scope
+                for dep_id in deps:
+                    if element_scope == _Scope.ALL:
+                        dep_scope = _Scope.ALL
+                        if visited_build[dep_id] or visited_runtime[dep_id]:
+                            continue
+                    else:
+                        dep_scope = _Scope.RUN
+                        if visited_runtime[dep_id]:
+                            continue
+
+                    stack.append((dep_id, dep_scope, self._start(dep_id, dep_scope, visited_build, visited_runtime)))
+                    break
+                else:
+                    stack.pop()
+                    # The element itself is not part of its build scope
+                    if element_scope != _Scope.BUILD:
+                        result.append(elements[element_id])
+
+        return result
+
+    # reachable()
+    #
+    # Get the elements reachable from elements of the graph through
+    # their build and runtime dependencies, without traversing the
+    # `excluded` elements.
+    #
+    # Args:
+    #    targets: The elements to start from
+    #    excluded: The elements not to traverse, nor include
+    #
+    # Returns:
+    #    A mask of the reachable elements, indexed by id, see mask_elements()
+    #
+    def reachable(self, targets: Iterable["Element"], excluded: Iterable["Element"] = ()) -> bytearray:
+        mask = bytearray(len(self._elements))
+        for element in excluded:
+            element_id = self._ids.get(element)
+            if element_id is not None:
+                mask[element_id] = 2
+
+        pending = [self._ids[target] for target in targets]
+        while pending:
+            element_id = pending.pop()
+            if mask[element_id]:
+                continue
+            mask[element_id] = 1
+            pending.extend(self._build_edges[self._build_offsets[element_id] : self._build_offsets[element_id + 1]])
+            pending.extend(
+                self._runtime_edges[self._runtime_offsets[element_id] : self._runtime_offsets[element_id + 1]]
+            )
+
+        return mask
+
+    # mask_elements()
+    #
+    # Filter elements with a mask returned by reachable().
+    #
+    # Args:
+    #    elements: The elements to filter
+    #    mask: The mask of the elements to keep
+    #
+    # Returns:
+    #    The elements of the graph which are in the mask, in the same order
+    #
+    def mask_elements(self, elements: Iterable["Element"], mask: bytearray) -> List["Element"]:
+        ids = self._ids
+        return [element for element in elements if element in ids and mask[ids[element]] == 1]
+
+    ################################################
+    #               Private Methods                #
+    ################################################
+
+    # Build the adjacency arrays of the dependencies in a given scope
+    def _adjacency(self, scope: int) -> Tuple[array, array]:
+        offsets = array("L", [0])
+        edges = array("L")
+        for element in self._elements:
+            edges.extend(self._ids[dep] for dep in element._dependencies(scope, recurse=False))
+            offsets.append(len(edges))
+
+        return offsets, edges
+
+    def _neighbours(self, offsets: array, edges: array, element_id: int) -> List["Element"]:
+        return [self._elements[dep_id] for dep_id in edges[offsets[element_id] : offsets[element_id + 1]]]
+
+    # Mark an element as visited in a scope, and get the ids of the
+    # dependencies to traverse
+    def _start(self, element_id: int, scope: int, visited_build: bytearray, visited_runtime: bytearray):
+        build_deps = self._build_edges[self._build_offsets[element_id] : self._build_offsets[element_id + 1]]
+        runtime_deps = self._runtime_edges[self._runtime_offsets[element_id] : self._runtime_offsets[element_id + 1]]
+
+        if scope == _Scope.ALL:
+            visited_build[element_id] = 1
+            visited_runtime[element_id] = 1
+            return iter(build_deps + runtime_deps)
+        elif scope == _Scope.BUILD:
+            visited_build[element_id] = 1
+            return iter(build_deps)
+        else:
+            visited_runtime[element_id] = 1
+            return iter(runtime_deps)
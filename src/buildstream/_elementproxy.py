@@ -28,6 +28,7 @@ if TYPE_CHECKING:
     from .sandbox import Sandbox
     from .source import Source
     from .element import Element  # pylint: disable=cyclic-import
+    from .storage._casbaseddirectory import CasBasedDirectory
 
 
 # ElementProxy()
@@ -182,3 +183,19 @@ class ElementProxy(PluginProxy):
         return element._stage_artifact(
             sandbox, path=path, action=action, include=include, exclude=exclude, orphans=orphans, owner=owner
         )
+
+    ##############################################################
+    #                Core Plugin Internal APIs                   #
+    ##############################################################
+    #
+    # Some functions the core element plugins call on their
+    # dependencies, refer to the Element class for their
+    # documentation.
+    #
+    def _get_full_name(self) -> str:
+        return cast("Element", self._plugin)._get_full_name()
+
+    def _get_split_files(
+        self, include: Optional[List[str]] = None, exclude: Optional[List[str]] = None, orphans: bool = True
+    ) -> "CasBasedDirectory":
+        return cast("Element", self._plugin)._get_split_files(include=include, exclude=exclude, orphans=orphans)
@@ -1197,6 +1197,25 @@ def workspace_list(app):
         app.stream.workspace_list()
 
 
+##################################################################
+#                     Workspace Watch Command                    #
+##################################################################
+@workspace.command(name="watch", short_help="Watch open workspaces for changes")
+@click.pass_obj
+def workspace_watch(app):
+    """Watch open workspaces for changes until interrupted
+
+    While this command runs, staging a workspace only scans the
+    directories of the workspace which changed since the workspace
+    was last staged, instead of the whole workspace.
+
+    This requires inotify and is only supported on Linux.
+    """
+
+    with app.initialized():
+        app.stream.workspace_watch()
+
+
 #############################################################
 #                     Artifact Commands                     #
 #############################################################
@@ -1615,3 +1634,20 @@ def artifact_delete(app, artifacts, deps):
     """Remove artifacts from the local cache"""
     with app.initialized():
         app.stream.artifact_delete(artifacts, selection=deps)
+
+
+###################################################################
+#                    Artifact Reindex Command                     #
+###################################################################
+@artifact.command(name="reindex", short_help="Rebuild the catalogue of cached artifacts")
+@click.pass_obj
+def artifact_reindex(app):
+    """Rebuild the catalogue of cached artifacts
+
+    BuildStream keeps a catalogue of the artifacts in the local cache,
+    to list and match them without reading the whole cache. Rebuild it
+    if the artifact refs of the cache were modified or removed by other
+    means than BuildStream.
+    """
+    with app.initialized():
+        app.stream.artifact_reindex()
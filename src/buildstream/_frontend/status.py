@@ -16,6 +16,7 @@
 #
 #  Authors:
 #        Tristan Van Berkom <tristan.vanberkom@codethink.co.uk>
+import datetime
 import os
 import sys
 import curses
@@ -352,8 +353,9 @@ class _StatusHeader:
 
         #
         # Line 1: Session time, project name, session / total elements
+        #         and the estimated remaining time, if known
         #
-        #  ========= 00:00:00 project-name (143/387) =========
+        #  ========= 00:00:00 project-name (143/387) ETA 00:12:34 =========
         #
         session = str(len(self._stream.session_elements))
         total = str(len(self._stream.total_elements))
@@ -374,6 +376,11 @@ class _StatusHeader:
             + self._format_profile.fmt(")")
         )
 
+        remaining = self._estimate_remaining(elapsed)
+        if remaining is not None:
+            size += 13  # Size of " ETA " and the time code
+            text += " " + self._format_profile.fmt("ETA") + " " + self._time_code.render_time(remaining)
+
         line1 = self._centered(text, size, line_length, "=")
 
         #
@@ -458,6 +465,46 @@ class _StatusHeader:
 
         return (text, size)
 
+    # _estimate_remaining()
+    #
+    # Estimate the remaining time of the session from the estimated
+    # durations of the tasks which have not completed yet.
+    #
+    # Each task group is assumed to process its tasks with as much
+    # parallelism as its resources allow, and the groups are assumed
+    # to run concurrently, such that the session completes with the
+    # slowest group.
+    #
+    # Args:
+    #    elapsed (timedelta): The elapsed time of the session
+    #
+    # Returns:
+    #    (timedelta): The estimated remaining time, or None if unknown
+    #
+    def _estimate_remaining(self, elapsed):
+        remaining = None
+
+        for group in self._state.task_groups.values():
+            if not group.estimates:
+                continue
+
+            total = sum(group.estimates.values())
+
+            # Deduct the time already spent by running tasks
+            for task in self._state.tasks.values():
+                if task.action_name == group.name and task.full_name in group.estimates:
+                    running = (elapsed - task.elapsed_offset).total_seconds()
+                    total -= min(running, group.estimates[task.full_name])
+
+            group_remaining = total / max(group.max_parallel_tasks, 1)
+            if remaining is None or group_remaining > remaining:
+                remaining = group_remaining
+
+        if remaining is None:
+            return None
+
+        return datetime.timedelta(seconds=max(remaining, 0))
+
     def _centered(self, text, size, line_length, fill):
         remaining = line_length - size
         remaining -= 2
@@ -660,6 +660,10 @@ class LogLine(Widget):
             status_text += self.content_profile.fmt("failed ") + self._err_profile.fmt(failed) + " " + failed_align
             values["{} Queue".format(group.name)] = status_text
 
+        directory_cache_usage = self.context.get_cascache().get_directory_cache_usage()
+        if directory_cache_usage.lookups:
+            values["Directory Cache"] = self.content_profile.fmt(str(directory_cache_usage))
+
         text += self._format_values(values, style_value=False)
 
         click.echo(text, nl=False, err=True)
@@ -0,0 +1,183 @@
+#
+#  Copyright (C) 2020 Codethink Limited
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import json
+import os
+import threading
+
+from . import utils
+
+
+# Rewrite the file once it holds this many times more records than there
+# are distinct (action, element) pairs
+_COMPACT_RATIO = 4
+
+# Never bother compacting files smaller than this many records
+_COMPACT_MIN_RECORDS = 1000
+
+# Weight of a newly recorded duration in the estimate of an element, the
+# weight of older durations decays by (1 - _SMOOTHING_FACTOR) with every
+# new record
+_SMOOTHING_FACTOR = 0.5
+
+
+# JobDurations()
+#
+# A record of how long the jobs of previous sessions took for each
+# element, used to estimate how long they will take in future sessions,
+# along with the sizes of the artifacts they produced.
+#
+# The durations are stored in an append-only file of JSON records,
+# one per line, such that concurrent sessions can safely record them.
+# The estimate for each element is an exponentially weighted moving
+# average of its recorded durations, with a smoothing factor of
+# _SMOOTHING_FACTOR, giving more weight to recent ones.
+#
+# Args:
+#    path (str): The file in which the durations are recorded
+#
+class JobDurations:
+    def __init__(self, path):
+        self._path = path
+        self._estimates = {}  # Estimated durations in seconds, keyed by (action name, element name)
+        self._sizes = {}  # Last recorded artifact sizes in bytes, keyed by (action name, element name)
+        self._lock = threading.Lock()
+        self._load()
+
+    # estimate()
+    #
+    # Get the estimated duration of a job
+    #
+    # Args:
+    #    action_name (str): The action name of the job, e.g. "Build"
+    #    element_name (str): The full name of the element
+    #
+    # Returns:
+    #    (float): The estimated duration in seconds, or None if no
+    #             job was recorded for this action and element
+    #
+    def estimate(self, action_name, element_name):
+        with self._lock:
+            return self._estimates.get((action_name, element_name))
+
+    # average()
+    #
+    # Get the average estimated duration of all jobs for an action
+    #
+    # Args:
+    #    action_name (str): The action name of the jobs
+    #
+    # Returns:
+    #    (float): The average duration in seconds, or None if no
+    #             job was recorded for this action
+    #
+    def average(self, action_name):
+        with self._lock:
+            durations = [duration for (action, _), duration in self._estimates.items() if action == action_name]
+
+        if not durations:
+            return None
+
+        return sum(durations) / len(durations)
+
+    # artifact_size()
+    #
+    # Get the size of the artifact produced by the last recorded job
+    #
+    # Args:
+    #    action_name (str): The action name of the job, e.g. "Build"
+    #    element_name (str): The full name of the element
+    #
+    # Returns:
+    #    (int): The artifact size in bytes, or None if no size was
+    #           recorded for this action and element
+    #
+    def artifact_size(self, action_name, element_name):
+        with self._lock:
+            return self._sizes.get((action_name, element_name))
+
+    # record()
+    #
+    # Record the duration of a completed job
+    #
+    # Args:
+    #    action_name (str): The action name of the job, e.g. "Build"
+    #    element_name (str): The full name of the element
+    #    duration (float): The duration of the job in seconds
+    #    artifact_size (int): The size of the artifact produced by the job, if any
+    #
+    def record(self, action_name, element_name, duration, *, artifact_size=None):
+        record = {"action": action_name, "element": element_name, "duration": duration}
+        if artifact_size is not None:
+            record["size"] = artifact_size
+
+        with self._lock:
+            self._add(record)
+            try:
+                os.makedirs(os.path.dirname(self._path), exist_ok=True)
+                with open(self._path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError:
+                # Failing to record a duration is not an error, it
+                # only makes future estimates less accurate.
+                pass
+
+    ################################################
+    #               Private Methods                #
+    ################################################
+
+    def _add(self, record):
+        key = (record["action"], record["element"])
+        previous = self._estimates.get(key)
+        if previous is None:
+            self._estimates[key] = record["duration"]
+        else:
+            self._estimates[key] = previous + _SMOOTHING_FACTOR * (record["duration"] - previous)
+
+        if "size" in record:
+            self._sizes[key] = record["size"]
+
+    def _load(self):
+        n_records = 0
+        try:
+            with open(self._path, "r") as f:
+                for line in f:
+                    try:
+                        self._add(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        # Ignore truncated lines from interrupted sessions
+                        continue
+                    n_records += 1
+        except OSError:
+            return
+
+        if n_records > _COMPACT_MIN_RECORDS and n_records > _COMPACT_RATIO * len(self._estimates):
+            self._compact()
+
+    # Rewrite the file with a single record holding the current
+    # estimate for each action and element
+    def _compact(self):
+        try:
+            with utils.save_file_atomic(self._path, "w") as f:
+                for key, duration in self._estimates.items():
+                    action_name, element_name = key
+                    record = {"action": action_name, "element": element_name, "duration": duration}
+                    if key in self._sizes:
+                        record["size"] = self._sizes[key]
+                    f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass
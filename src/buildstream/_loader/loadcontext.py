@@ -17,6 +17,8 @@
 #  Authors:
 #        Tristan Van Berkom <tristan.vanberkom@codethink.co.uk>
 
+from concurrent.futures import ThreadPoolExecutor
+
 from .._exceptions import LoadError
 from ..exceptions import LoadErrorReason
 from ..types import _ProjectInformation
@@ -193,6 +195,10 @@ class LoadContext:
         # A table of all Loaders, indexed by project name
         self._loaders = {}
 
+        # Files being read ahead of being loaded, when parallel loading is enabled
+        self._prefetch_pool = None
+        self._prefetched = {}
+
     # set_rewritable()
     #
     # Sets whether the projects are to be loaded in a rewritable fashion,
@@ -224,6 +230,60 @@ class LoadContext:
     def set_fetch_subprojects(self, fetch_subprojects):
         self.fetch_subprojects = fetch_subprojects
 
+    # prefetch()
+    #
+    # Start reading the given files in the background, so that their
+    # contents are ready by the time the loader gets around to parsing
+    # them.
+    #
+    # This does nothing unless parallel loading is enabled in the
+    # user configuration.
+    #
+    # Args:
+    #    filenames (iterable): The full paths of the files to read
+    #
+    def prefetch(self, filenames):
+        if not self.context.sched_loaders:
+            return
+
+        if self._prefetch_pool is None:
+            self._prefetch_pool = ThreadPoolExecutor(max_workers=self.context.sched_loaders)
+
+        for filename in filenames:
+            if filename not in self._prefetched:
+                self._prefetched[filename] = self._prefetch_pool.submit(_read_file, filename)
+
+    # take_prefetched()
+    #
+    # Obtain the contents of a file previously passed to prefetch().
+    #
+    # Errors encountered while reading files in the background are
+    # not reported here, instead the file should be read again by
+    # the caller such that errors are raised in the usual order.
+    #
+    # Args:
+    #    filename (str): The full path of the file
+    #
+    # Returns:
+    #    (str): The contents of the file, or None if they are not available
+    #
+    def take_prefetched(self, filename):
+        future = self._prefetched.pop(filename, None)
+        if future is None:
+            return None
+        return future.result()
+
+    # stop_prefetching()
+    #
+    # Wait for any outstanding background reads and discard
+    # any prefetched file contents which were not used.
+    #
+    def stop_prefetching(self):
+        if self._prefetch_pool is not None:
+            self._prefetch_pool.shutdown()
+            self._prefetch_pool = None
+        self._prefetched = {}
+
     # assert_loaders()
     #
     # Asserts that there are no conflicting projects loaded.
@@ -268,3 +328,21 @@ class LoadContext:
     def loaded_projects(self):
         for _, project_loaders in self._loaders.items():
             yield from project_loaders.loaded_projects()
+
+
+# _read_file()
+#
+# Read a file for LoadContext.prefetch(), in a worker thread
+#
+# Args:
+#    filename (str): The full path of the file
+#
+# Returns:
+#    (str): The file contents, or None if the file could not be read
+#
+def _read_file(filename):
+    try:
+        with open(filename) as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
@@ -131,11 +131,18 @@ class Loader:
         #
         target_elements = []
 
-        for target in targets:
-            with PROFILER.profile(Topics.LOAD_PROJECT, target):
-                _junction, name, loader = self._parse_name(target, None)
-                element = loader._load_file(name, None)
-                target_elements.append(element)
+        try:
+            for target in targets:
+                with PROFILER.profile(Topics.LOAD_PROJECT, target):
+                    _junction, name, loader = self._parse_name(target, None)
+                    element = loader._load_file(name, None)
+                    target_elements.append(element)
+
+                    yamlcache = self.load_context.context.yamlcache
+                    if yamlcache:
+                        PROFILER.report(Topics.LOAD_PROJECT, yamlcache.summary)
+        finally:
+            self.load_context.stop_prefetching()
 
         #
         # Now that we've resolved the dependencies, scan them for circular dependencies
@@ -271,7 +278,12 @@ class Loader:
         fullpath = os.path.join(self._basedir, filename)
         try:
             node = _yaml.load(
-                fullpath, shortname=filename, copy_tree=self.load_context.rewritable, project=self.project
+                fullpath,
+                shortname=filename,
+                copy_tree=self.load_context.rewritable,
+                project=self.project,
+                cache=self.load_context.context.yamlcache,
+                contents=self.load_context.take_prefetched(fullpath),
             )
         except LoadError as e:
             if e.reason == LoadErrorReason.MISSING_FILE:
@@ -483,6 +495,8 @@ class Loader:
         top_element.mark_fully_loaded()
 
         dependencies = extract_depends_from_node(top_element.node)
+        self._prefetch_dependencies(dependencies)
+
         # The loader queue is a stack of tuples
         # [0] is the LoadElement instance
         # [1] is a stack of Dependency objects to load
@@ -515,6 +529,7 @@ class Loader:
                         dep_element.mark_fully_loaded()
 
                         dep_deps = extract_depends_from_node(dep_element.node)
+                        self._prefetch_dependencies(dep_deps)
                         loader_queue.append((dep_element, list(reversed(dep_deps)), []))
 
                         # Pylint is not very happy about Cython and can't understand 'node' is a 'MappingNode'
@@ -539,6 +554,24 @@ class Loader:
         # Nothing more in the queue, return the top level element we loaded.
         return top_element
 
+    # _prefetch_dependencies():
+    #
+    # Start reading the files of the given dependencies in the background,
+    # if parallel loading is enabled.
+    #
+    # Only the files of local dependencies which have not been loaded
+    # yet are read ahead, everything else is loaded as usual.
+    #
+    # Args:
+    #    dependencies (list): The Dependency objects about to be loaded
+    #
+    def _prefetch_dependencies(self, dependencies):
+        self.load_context.prefetch(
+            os.path.join(self._basedir, dep.name)
+            for dep in dependencies
+            if not dep.junction and dep.name not in self._elements
+        )
+
     # _check_circular_deps():
     #
     # Detect circular dependencies on LoadElements with
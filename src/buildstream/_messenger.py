@@ -21,7 +21,7 @@ import os
 import datetime
 import threading
 from contextlib import contextmanager
-from typing import Optional, Callable, Iterator, TextIO
+from typing import Optional, Callable, ContextManager, Iterator, TextIO
 
 from . import _signals
 from ._exceptions import BstError
@@ -72,6 +72,9 @@ class _MessengerLocal(threading.local):
         # Level of silent messages depth in this task
         self.silence_scope_depth: int = 0
 
+        # The handler for the idle periods of this task
+        self.idle_handler: Optional[Callable[[], ContextManager[None]]] = None
+
 
 # Messenger()
 #
@@ -105,6 +108,17 @@ class Messenger:
     def set_message_handler(self, handler) -> None:
         self._locals.message_handler = handler
 
+    # set_idle_handler()
+    #
+    # Sets the handler for the periods during which the current task
+    # waits for work done outside of it, see Messenger.idle().
+    #
+    # Args:
+    #    handler: A function returning a context manager, or None
+    #
+    def set_idle_handler(self, handler: Optional[Callable[[], ContextManager[None]]]) -> None:
+        self._locals.idle_handler = handler
+
     # set_state()
     #
     # Sets the State object within the Messenger
@@ -331,6 +345,26 @@ class Messenger:
             message = Message(MessageType.SUCCESS, activity_name, elapsed=elapsed, detail=detail, **kwargs)
             self.message(message)
 
+    # idle()
+    #
+    # Context manager for code which waits for work done outside of
+    # the current task, such as by a remote execution service.
+    #
+    # While the code block runs, the scheduling resources of the task
+    # may be used by other tasks, and the context may block on exit
+    # until they are available again. Outside of a task, this does
+    # nothing.
+    #
+    @contextmanager
+    def idle(self) -> Iterator[None]:
+        handler = self._locals.idle_handler
+        if handler is None:
+            yield
+            return
+
+        with handler():
+            yield
+
     # recorded_messages()
     #
     # Records all messages in a log file while the context manager
@@ -48,8 +48,10 @@ class OverlapCollector:
         # The Element we are staging for, on which we'll issue warnings
         self._element = element  # type: Element
 
-        # The list of sessions
-        self._sessions = []  # type: List[OverlapCollectorSession]
+        # Index of files staged in completed sessions, keyed by their sandbox
+        # relative filename, with the unique ID of the element responsible for
+        # staging each file and the location of the session it was staged in
+        self._staged = {}  # type: Dict[str, Tuple[int, str]]
 
         # The active session, if any
         self._session = None  # type: Optional[OverlapCollectorSession]
@@ -80,11 +82,11 @@ class OverlapCollector:
         # Run code body where staging results can be collected.
         yield
 
-        # Issue warnings for the current session, passing along previously completed sessions
-        self._session.warnings(self._sessions)
+        # Issue warnings for the current session, passing along files staged in previously completed sessions
+        self._session.warnings(self._staged)
 
-        # Store the newly ended session and end the session
-        self._sessions.append(self._session)
+        # Index the files staged in the newly ended session and end the session
+        self._session.index_staged(self._staged)
         self._session = None
 
     # collect_stage_result()
@@ -125,8 +127,8 @@ class OverlapCollectorSession:
         # Dictionary of files which were ignored (See FileListResult()), keyed by element unique ID
         self._ignored = {}  # type: Dict[int, List[str]]
 
-        # Dictionary of files which were staged, keyed by element unique ID
-        self._files_written = {}  # type: Dict[int, List[str]]
+        # Dictionary of the element IDs which first staged each file, keyed by filename
+        self._staged = {}  # type: Dict[str, int]
 
         # Dictionary of element IDs which overlapped, keyed by the file they overlap on
         self._overlaps = {}  # type: Dict[str, List[int]]
@@ -140,6 +142,7 @@ class OverlapCollectorSession:
     #    result (FileListResult): The result of Element.stage_artifact()
     #
     def collect_stage_result(self, element: "Element", result: FileListResult):
+        element_id = element._unique_id
 
         for overwritten_file in result.overwritten:
 
@@ -152,25 +155,40 @@ class OverlapCollectorSession:
                 #
                 self._overlaps[overwritten_file] = overlap_list = []
 
-                # Search files which were staged in this session, start the
+                # If the file was staged in this session, start the
                 # list off with the bottom most element
                 #
-                for element_id, staged_files in self._files_written.items():
-                    if overwritten_file in staged_files:
-                        overlap_list.append(element_id)
-                        break
+                bottom_id = self._staged.get(overwritten_file)
+                if bottom_id is not None:
+                    overlap_list.append(bottom_id)
 
             # Add the currently staged element to the overlap list, it might be
             # the only element in the list if it overlaps with a file staged
             # from a previous session.
             #
-            overlap_list.append(element._unique_id)
+            overlap_list.append(element_id)
 
         # Record written files and ignored files.
         #
-        self._files_written[element._unique_id] = result.files_written
+        staged = self._staged
+        for written_file in result.files_written:
+            if written_file not in staged:
+                staged[written_file] = element_id
         if result.ignored:
-            self._ignored[element._unique_id] = result.ignored
+            self._ignored[element_id] = result.ignored
+
+    # index_staged()
+    #
+    # Add the files staged in this session to an index of staged files,
+    # replacing the entries of files staged in previous sessions.
+    #
+    # Args:
+    #    staged (dict): The index of files staged in previous sessions
+    #
+    def index_staged(self, staged: "Dict[str, Tuple[int, str]]"):
+        location = self._location
+        for filename, element_id in self._staged.items():
+            staged[os.path.join(location, filename)] = (element_id, location)
 
     # warnings()
     #
@@ -178,9 +196,9 @@ class OverlapCollectorSession:
     # based on the results collected with collect_stage_result().
     #
     # Args:
-    #    sessions (list): List of previously completed sessions
+    #    staged (dict): The index of files staged in previously completed sessions
     #
-    def warnings(self, sessions: List["OverlapCollectorSession"]):
+    def warnings(self, staged: "Dict[str, Tuple[int, str]]"):
 
         # Collect a table of filenames which overlapped something from outside of this session.
         #
@@ -243,7 +261,7 @@ class OverlapCollectorSession:
             #
             for filename, element_id in external_overlaps.items():
                 absolute_filename = os.path.join(self._location, filename)
-                overlapped_id, location = self._search_stage_element(absolute_filename, sessions)
+                overlapped_id, location = self._search_stage_element(absolute_filename, staged)
                 element = Plugin._lookup(element_id)
                 overlapped = Plugin._lookup(overlapped_id)
                 detail += "{}: {} overlaps files previously staged by {} in: {}\n".format(
@@ -259,27 +277,21 @@ class OverlapCollectorSession:
 
     # _search_stage_element()
     #
-    # Search the sessions list for the element responsible for staging the given file
+    # Search the index of previously staged files for the element responsible for staging the given file
     #
     # Args:
     #    filename (str): The sandbox relative file which was overwritten
-    #    sessions (List[OverlapCollectorSession])
+    #    staged (dict): The index of files staged in previously completed sessions
     #
     # Returns:
     #    element_id (int): The unique ID of the element responsible
     #    location (str): The sandbox relative staging location where element_id was staged
     #
-    def _search_stage_element(self, filename: str, sessions: List["OverlapCollectorSession"]) -> Tuple[int, str]:
-        for session in reversed(sessions):
-            for element_id, staged_files in session._files_written.items():
-                if any(
-                    staged_file
-                    for staged_file in staged_files
-                    if os.path.join(session._location, staged_file) == filename
-                ):
-                    return element_id, session._location
-
-        assert False, "Could not find element responsible for staging: {}".format(filename)
+    def _search_stage_element(self, filename: str, staged: "Dict[str, Tuple[int, str]]") -> Tuple[int, str]:
+        try:
+            return staged[filename]
+        except KeyError:
+            assert False, "Could not find element responsible for staging: {}".format(filename)
 
         # Silence the linter with an unreachable return statement
         return None, None
@@ -19,17 +19,14 @@
 #        Jürg Billeter <juerg.billeter@codethink.co.uk>
 #        Tristan Maat <tristan.maat@codethink.co.uk>
 
-import itertools
-
-from collections import OrderedDict
-from operator import itemgetter
-from typing import List, Iterator
+from typing import List, Iterator, Optional
 from pyroaring import BitMap  # pylint: disable=no-name-in-module
 
 from .element import Element
 from .types import _PipelineSelection, _Scope
 
 from ._context import Context
+from ._dependencygraph import DependencyGraph
 from ._exceptions import PipelineError
 
 
@@ -71,11 +68,22 @@ def dependencies(targets: List[Element], scope: int, *, recurse: bool = True) ->
 #    targets: The target Elements
 #    mode: A value from PipelineSelection enumeration
 #    silent: Whether to silence messages
+#    graph: The dependency graph of the targets, if already built
 #
 # Returns:
 #    A list of Elements appropriate for the specified selection mode
 #
-def get_selection(context: Context, targets: List[Element], mode: str, *, silent: bool = True) -> List[Element]:
+def get_selection(
+    context: Context,
+    targets: List[Element],
+    mode: str,
+    *,
+    silent: bool = True,
+    graph: Optional[DependencyGraph] = None,
+) -> List[Element]:
+    def get_graph() -> DependencyGraph:
+        return graph if graph is not None else DependencyGraph(targets)
+
     def redirect_and_log() -> List[Element]:
         # Redirect and log if permitted
         elements: List[Element] = []
@@ -91,7 +99,7 @@ def get_selection(context: Context, targets: List[Element], mode: str, *, silent
         # Keep locally cached elements in the plan if remote artifact cache is used
         # to allow pulling artifact with strict cache key, if available.
         plan_cached = not context.get_strict() and context.artifactcache.has_fetch_remotes()
-        return _Planner().plan(targets, plan_cached)
+        return _Planner(get_graph(), context.job_durations).plan(targets, plan_cached)
 
     # Work around python not having a switch statement; this is
     # much clearer than the if/elif/else block we used to have.
@@ -102,9 +110,9 @@ def get_selection(context: Context, targets: List[Element], mode: str, *, silent
         _PipelineSelection.NONE: lambda: targets,
         _PipelineSelection.REDIRECT: redirect_and_log,
         _PipelineSelection.PLAN: plan,
-        _PipelineSelection.ALL: lambda: list(dependencies(targets, _Scope.ALL)),
-        _PipelineSelection.BUILD: lambda: list(dependencies(targets, _Scope.BUILD)),
-        _PipelineSelection.RUN: lambda: list(dependencies(targets, _Scope.RUN)),
+        _PipelineSelection.ALL: lambda: get_graph().dependencies(targets, _Scope.ALL),
+        _PipelineSelection.BUILD: lambda: get_graph().dependencies(targets, _Scope.BUILD),
+        _PipelineSelection.RUN: lambda: get_graph().dependencies(targets, _Scope.RUN),
     }[mode]()
 
 
@@ -118,6 +126,7 @@ def get_selection(context: Context, targets: List[Element], mode: str, *, silent
 #    targets: List of toplevel targetted elements
 #    elements: The list to remove elements from
 #    except_targets: List of toplevel except targets
+#    graph: The dependency graph of the targets, if already built
 #
 # Returns:
 #    The elements list with the intersected exceptions removed
@@ -164,54 +173,48 @@ def get_selection(context: Context, targets: List[Element], mode: str, *, silent
 # Note how (t2) reintroduces portions of the graph which were otherwise
 # tainted by being depended on indirectly by the (e1) except element.
 #
-def except_elements(targets: List[Element], elements: List[Element], except_targets: List[Element]) -> List[Element]:
+def except_elements(
+    targets: List[Element],
+    elements: List[Element],
+    except_targets: List[Element],
+    *,
+    graph: Optional[DependencyGraph] = None,
+) -> List[Element]:
     if not except_targets:
         return elements
 
-    targeted: List[Element] = list(dependencies(targets, _Scope.ALL))
-    visited: List[Element] = []
-
-    def find_intersection(element: Element) -> Iterator[Element]:
-        if element in visited:
-            return
-        visited.append(element)
-
-        # Intersection elements are those that are also in
-        # 'targeted', as long as we don't recurse into them.
-        if element in targeted:
-            yield element
-        else:
-            for dep in element._dependencies(_Scope.ALL, recurse=False):
-                yield from find_intersection(dep)
+    if graph is None:
+        graph = DependencyGraph(targets)
 
     # Build a list of 'intersection' elements, i.e. the set of
     # elements that lie on the border closest to excepted elements
     # between excepted and target elements.
-    intersection = list(itertools.chain.from_iterable(find_intersection(element) for element in except_targets))
-
-    # Now use this set of elements to traverse the targeted
-    # elements, except 'intersection' elements and their unique
-    # dependencies.
-    queue = []
-    visited = []
-
-    queue.extend(targets)
+    #
+    # Intersection elements are those that are also in the graph
+    # of the targets, as long as we don't recurse into them. The
+    # except targets may lie outside of the graph.
+    intersection = []
+    visited = set()
+    queue = list(except_targets)
     while queue:
         element = queue.pop()
-        if element in visited or element in intersection:
+        if element in visited:
             continue
-        visited.append(element)
+        visited.add(element)
 
-        queue.extend(element._dependencies(_Scope.ALL, recurse=False))
+        if element in graph:
+            intersection.append(element)
+        else:
+            queue.extend(element._dependencies(_Scope.ALL, recurse=False))
 
-    # That looks like a lot, but overall we only traverse (part
-    # of) the graph twice. This could be reduced to once if we
-    # kept track of parent elements, but is probably not
-    # significant.
+    # Now use this set of elements to traverse the targeted
+    # elements, except 'intersection' elements and their unique
+    # dependencies.
+    reachable = graph.reachable(targets, excluded=intersection)
 
     # Ensure that we return elements in the same order they were
     # in before.
-    return [element for element in elements if element in visited]
+    return graph.mask_elements(elements, reachable)
 
 
 # assert_consistent()
@@ -297,44 +300,153 @@ def assert_sources_cached(context: Context, elements: List[Element]):
 # parts need to be built depending on build only dependencies
 # being cached, and depth sorting for more efficient processing.
 #
+# The depth of an element is the largest number of build dependency
+# edges on a path from a toplevel element to the element, runtime
+# dependency edges do not add to the depth. The build dependencies
+# of cached elements are not planned.
+#
+# Elements are sorted by decreasing depth, elements of the same depth
+# are sorted in the order in which a depth first traversal of the
+# dependencies finishes visiting them.
+#
+# The planned elements are also prioritized such that the elements
+# on the critical path of the plan are processed first, see _prioritize().
+#
+# Args:
+#    graph (DependencyGraph): The dependency graph of the elements to plan
+#    job_durations (JobDurations): The durations of previous jobs, if any
+#
 class _Planner:
-    def __init__(self):
-        self.depth_map = OrderedDict()
-        self.visiting_elements = set()
-
-    # Here we want to traverse the same element more than once when
-    # it is reachable from multiple places, with the interest of finding
-    # the deepest occurance of every element
-    def plan_element(self, element, depth):
-        if element in self.visiting_elements:
-            # circular dependency, already being processed
-            return
-
-        prev_depth = self.depth_map.get(element)
-        if prev_depth is not None and prev_depth >= depth:
-            # element and dependencies already processed at equal or greater depth
-            return
-
-        self.visiting_elements.add(element)
-        for dep in element._dependencies(_Scope.RUN, recurse=False):
-            self.plan_element(dep, depth)
-
-        # Dont try to plan builds of elements that are cached already
-        if not element._cached_success():
-            for dep in element._dependencies(_Scope.BUILD, recurse=False):
-                self.plan_element(dep, depth + 1)
-
-        self.depth_map[element] = depth
-        self.visiting_elements.remove(element)
+    def __init__(self, graph, job_durations=None):
+        self.graph = graph
+        self.job_durations = job_durations
 
     def plan(self, roots, plan_cached):
-        for root in roots:
-            self.plan_element(root, 0)
+        order, edges = self._traverse(roots)
+
+        # Compute the longest path to every element, the reverse of
+        # the traversal order visits every element after all of the
+        # elements which depend on it
+        depth_map = {element: 0 for element in order}
+        for element in reversed(order):
+            depth = depth_map[element]
+            for dep, weight in edges[element]:
+                if depth + weight > depth_map[dep]:
+                    depth_map[dep] = depth + weight
 
-        depth_sorted = sorted(self.depth_map.items(), key=itemgetter(1), reverse=True)
+        # Sorting is stable, elements of the same depth keep the traversal order
+        depth_sorted = sorted(order, key=depth_map.__getitem__, reverse=True)
 
         # Set the depth of each element
-        for index, item in enumerate(depth_sorted):
-            item[0]._set_depth(index)
+        for index, element in enumerate(depth_sorted):
+            element._set_depth(index)
+
+        self._prioritize(depth_sorted)
+
+        return [element for element in depth_sorted if plan_cached or not element._cached_success()]
+
+    # _traverse()
+    #
+    # Traverse the dependencies to plan, depth first and without recursion.
+    #
+    # Args:
+    #    roots (list): The toplevel elements
+    #
+    # Returns:
+    #    (list): The elements to plan, in the order in which the
+    #            traversal finished visiting them
+    #    (dict): The dependencies of each element to plan, as (element, weight)
+    #            tuples where weight is 1 for build dependencies and 0 for
+    #            runtime dependencies
+    #
+    def _traverse(self, roots):
+        order = []
+        edges = {}
+
+        def planned_dependencies(element):
+            deps = [(dep, 0) for dep in self.graph.runtime_dependencies(element)]
 
-        return [item[0] for item in depth_sorted if plan_cached or not item[0]._cached_success()]
+            # Dont try to plan builds of elements that are cached already
+            if not element._cached_success():
+                deps.extend((dep, 1) for dep in self.graph.build_dependencies(element))
+
+            return deps
+
+        for root in roots:
+            if root in edges:
+                continue
+
+            edges[root] = planned_dependencies(root)
+            stack = [(root, iter(edges[root]))]
+            while stack:
+                element, deps = stack[-1]
+                for dep, _ in deps:
+                    if dep not in edges:
+                        edges[dep] = planned_dependencies(dep)
+                        stack.append((dep, iter(edges[dep])))
+                        break
+                else:
+                    stack.pop()
+                    order.append(element)
+
+        return order, edges
+
+    # _prioritize()
+    #
+    # Set the scheduling priority of the planned elements.
+    #
+    # Elements are prioritized by the length of the longest chain of builds
+    # which depend on them, the critical path, estimated from the durations
+    # of their previous builds. Elements which were never built before are
+    # assumed to take as long as the average build, or one second if no
+    # build was ever recorded, in which case the critical path amounts to
+    # the number of elements in the chain. Ties are broken by the number
+    # of reverse dependencies in the plan.
+    #
+    # Args:
+    #    elements (list): The planned elements, in depth order
+    #
+    def _prioritize(self, elements):
+        planned = set(elements)
+
+        default_duration = None
+        if self.job_durations is not None:
+            # This is the action name of the BuildQueue
+            default_duration = self.job_durations.average("Build")
+        if default_duration is None:
+            default_duration = 1.0
+
+        def duration(element):
+            if element._cached_success():
+                return 0.0
+            if self.job_durations is not None:
+                estimate = self.job_durations.estimate("Build", element._get_full_name())
+                if estimate is not None:
+                    return estimate
+            return default_duration
+
+        def planned_dependencies(element):
+            deps = self.graph.build_dependencies(element) + self.graph.runtime_dependencies(element)
+            return [dep for dep in dict.fromkeys(deps) if dep in planned]
+
+        planned_deps = {element: planned_dependencies(element) for element in elements}
+        reverse_dependencies = {element: 0 for element in elements}
+        for deps in planned_deps.values():
+            for dep in deps:
+                reverse_dependencies[dep] += 1
+
+        # Walk the plan from the toplevel elements down, such that every
+        # element is visited after all of its reverse dependencies
+        remaining = dict(reverse_dependencies)
+        longest_path = {element: 0.0 for element in elements}
+        pending = [element for element in elements if remaining[element] == 0]
+        while pending:
+            element = pending.pop()
+            critical_path = longest_path[element] + duration(element)
+            element._set_priority((-critical_path, -reverse_dependencies[element]))
+
+            for dep in planned_deps[element]:
+                longest_path[dep] = max(longest_path[dep], critical_path)
+                remaining[dep] -= 1
+                if remaining[dep] == 0:
+                    pending.append(dep)
@@ -0,0 +1,259 @@
+#
+#  Copyright (C) 2020 Codethink Limited
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import hashlib
+import os
+import pickle
+
+from . import utils
+from . import _cachekey
+from ._platform import Platform
+
+
+# Bump this whenever the content of the snapshot entries changes
+#
+_PIPELINE_SNAPSHOT_FORMAT = 1
+
+# The number of snapshots kept for every toplevel project
+#
+_MAX_SNAPSHOTS = 8
+
+
+# PipelineSnapshot()
+#
+# A persistent record of the cache keys resolved for a pipeline.
+#
+# Calculating cache keys requires building the complete cache key
+# dictionary of every element in the pipeline, which involves walking
+# its configuration, variables, environment and public data, and
+# serializing all of it. When BuildStream is run repeatedly against
+# the same project state, as is common in CI, the result is always
+# the same.
+#
+# The snapshot is identified by a digest of everything which is an input
+# to the cache keys and is not specific to a given element: the YAML files
+# which were loaded, the project variables and option values, the element
+# and source plugins in use, along with the package version or directory
+# they were loaded from, and the host platform.
+#
+# For each element, the snapshot records the element's source key and
+# the strict keys of its build dependencies alongside the element's strict
+# and weak keys, the recorded keys are only used if the source key and
+# build dependency keys resolved in the current session are identical.
+# This ensures that sources which depend on the filesystem, such as
+# workspaces or local sources, are always accounted for.
+#
+# Only the calculation of cache keys is skipped, elements are still
+# loaded and their variables expanded as usual.
+#
+# Snapshots are stored in a directory per toplevel project, and only the
+# _MAX_SNAPSHOTS most recently used snapshots of a project are kept.
+#
+# Args:
+#    directory (str): The directory where the snapshots of the project are stored
+#    digest (str): The digest identifying the snapshot
+#
+class PipelineSnapshot:
+    def __init__(self, directory, digest):
+        self._directory = directory
+        self._path = os.path.join(directory, digest)
+        self._entries = {}  # Snapshot entries indexed by element full name
+        self._dirty = False  # Whether new entries were recorded
+
+    # open()
+    #
+    # Open the snapshot for the given elements
+    #
+    # Args:
+    #    context (Context): The invocation context
+    #    elements (list): All of the Elements in the pipeline
+    #
+    # Returns:
+    #    (PipelineSnapshot): The snapshot, or None if snapshots cannot
+    #                        be used in this session
+    #
+    @classmethod
+    def open(cls, context, elements):
+        yamlcache = context.yamlcache
+        if yamlcache is None:
+            return None
+
+        digest = _pipeline_digest(context, yamlcache, elements)
+        project_directory = context.get_toplevel_project().directory
+        project_digest = hashlib.sha256(project_directory.encode("utf-8", errors="surrogateescape")).hexdigest()
+        snapshot = cls(os.path.join(context.cachedir, "snapshots", project_digest), digest)
+        snapshot._load()
+        return snapshot
+
+    # lookup()
+    #
+    # Look up the recorded entry for an element
+    #
+    # Args:
+    #    element (Element): The element
+    #
+    # Returns:
+    #    (tuple): The recorded entry, or None
+    #
+    def lookup(self, element):
+        return self._entries.get(element._get_full_name())
+
+    # record()
+    #
+    # Record the resolved entry for an element
+    #
+    # Args:
+    #    element (Element): The element
+    #    entry (tuple): The entry, as returned by Element._get_snapshot_keys()
+    #
+    def record(self, element, entry):
+        name = element._get_full_name()
+        if self._entries.get(name) != entry:
+            self._entries[name] = entry
+            self._dirty = True
+
+    # save()
+    #
+    # Save the snapshot, if anything new was recorded, and remove
+    # the least recently used snapshots of the project.
+    #
+    def save(self):
+        if not self._dirty:
+            return
+
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            with utils.save_file_atomic(self._path, "wb") as f:
+                pickle.dump(self._entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            # Failing to save a snapshot is not an error, the
+            # cache keys will just be calculated again next time.
+            pass
+        else:
+            self._prune()
+
+        self._dirty = False
+
+    ################################################
+    #               Private Methods                #
+    ################################################
+
+    def _load(self):
+        try:
+            with open(self._path, "rb") as f:
+                self._entries = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self._entries = {}
+            return
+
+        # Mark the snapshot as recently used
+        try:
+            os.utime(self._path)
+        except OSError:
+            pass
+
+    # Remove all but the _MAX_SNAPSHOTS most recently used snapshots
+    def _prune(self):
+        snapshots = []
+        try:
+            with os.scandir(self._directory) as entries:
+                for entry in entries:
+                    # Skip the temporary files of concurrent sessions
+                    if entry.name.startswith("tmp"):
+                        continue
+                    try:
+                        snapshots.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        # Removed by a concurrent session
+                        pass
+        except OSError:
+            return
+
+        snapshots.sort(reverse=True)
+        for _, path in snapshots[_MAX_SNAPSHOTS:]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+# _pipeline_digest()
+#
+# Compute the digest identifying the snapshot of a pipeline
+#
+# Args:
+#    context (Context): The invocation context
+#    yamlcache (YamlCache): The YamlCache through which the project files were loaded
+#    elements (list): All of the Elements in the pipeline
+#
+# Returns:
+#    (str): A hex digest
+#
+def _pipeline_digest(context, yamlcache, elements):
+    # Import this only conditionally, it's not resolved at bash complete time
+    from . import __version__  # pylint: disable=cyclic-import
+
+    projects = []
+    for project in context.get_projects():
+        options = {}
+        project.options.printable_variables(options)
+        projects.append(
+            {
+                "name": project.name,
+                "directory": project.directory,
+                "variables": project.base_variables.strip_node_info(),
+                "options": options,
+            }
+        )
+
+    # Core plugins are covered by the BuildStream version, the plugins
+    # loaded from an origin are fingerprinted by their origin.
+    plugin_kinds = {}
+    for element in elements:
+        project = element._get_project()
+        plugin_kinds[(project.element_factory, element.get_kind())] = type(element)
+        for source in element.sources():
+            project = source._get_project()
+            plugin_kinds[(project.source_factory, source.get_kind())] = type(source)
+
+    plugins = []
+    for (factory, kind), plugin_type in plugin_kinds.items():
+        plugins.append(
+            [
+                plugin_type.__module__,
+                plugin_type.__qualname__,
+                kind,
+                factory.get_plugin_fingerprint(kind),
+                getattr(plugin_type, "BST_ARTIFACT_VERSION", 0),
+            ]
+        )
+    plugins.sort(key=repr)
+
+    h = hashlib.sha256()
+    h.update("{}\0{}\0".format(__version__, _PIPELINE_SNAPSHOT_FORMAT).encode("utf-8"))
+    h.update(yamlcache.digest().encode("utf-8"))
+    h.update(
+        _cachekey.generate_key(
+            {
+                "projects": projects,
+                "plugins": plugins,
+                "host-os": Platform.get_host_os(),
+                "host-arch": Platform.get_host_arch(),
+            }
+        ).encode("utf-8")
+    )
+    return h.hexdigest()
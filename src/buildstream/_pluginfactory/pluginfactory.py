@@ -190,6 +190,25 @@ class PluginFactory:
 
         return origin.get_plugin_paths(kind, self._plugin_type)
 
+    # get_plugin_fingerprint():
+    #
+    # Gets a fingerprint of the origin the plugin is loaded from
+    #
+    # Args:
+    #    kind (str): The plugin kind
+    #
+    # Returns:
+    #    (list): A serializable fingerprint of the plugin's origin, or None
+    #            for the core plugins which are part of BuildStream itself
+    #
+    def get_plugin_fingerprint(self, kind: str):
+        try:
+            origin = self._origins[kind]
+        except KeyError:
+            return None
+
+        return origin.get_plugin_fingerprint(kind, self._plugin_type)
+
     ######################################################
     #                 Private Methods                    #
     ######################################################
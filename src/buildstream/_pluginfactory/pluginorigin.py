@@ -138,6 +138,21 @@ class PluginOrigin:
     def get_plugin_paths(self, kind, plugin_type):
         pass
 
+    # get_plugin_fingerprint():
+    #
+    # Abstract method for describing the state of the origin a plugin
+    # is loaded from, this changes whenever the plugin may have changed.
+    #
+    # Args:
+    #    kind (str): The plugin
+    #    plugin_type (PluginType): The kind of plugin
+    #
+    # Returns:
+    #    (list): A serializable fingerprint of the plugin's origin
+    #
+    def get_plugin_fingerprint(self, kind, plugin_type):
+        pass
+
     # load_config()
     #
     # Abstract method for loading data from the origin node, this
@@ -32,19 +32,7 @@ class PluginOriginJunction(PluginOrigin):
 
     def get_plugin_paths(self, kind, plugin_type):
 
-        # Get access to the project indicated by the junction,
-        # possibly loading it as a side effect.
-        #
-        loader = self.project.loader.get_loader(self._junction, self.provenance_node)
-        project = loader.project
-        project.ensure_fully_loaded()
-
-        # Now get the appropriate PluginFactory object
-        #
-        if plugin_type == PluginType.SOURCE:
-            factory = project.source_factory
-        elif plugin_type == PluginType.ELEMENT:
-            factory = project.element_factory
+        project, factory = self._get_subproject_factory(plugin_type)
 
         # Now ask for the paths from the subproject PluginFactory
         try:
@@ -81,8 +69,45 @@ class PluginOriginJunction(PluginOrigin):
 
         return location, defaults, "junction: {} ({})".format(project_path, display)
 
+    def get_plugin_fingerprint(self, kind, plugin_type):
+        _, factory = self._get_subproject_factory(plugin_type)
+        return factory.get_plugin_fingerprint(kind)
+
     def load_config(self, origin_node):
 
         origin_node.validate_keys(["junction", *PluginOrigin._COMMON_CONFIG_KEYS])
 
         self._junction = origin_node.get_str("junction")
+
+    ##############################################
+    #               Private methods              #
+    ##############################################
+
+    # _get_subproject_factory()
+    #
+    # Get the PluginFactory of the project indicated by the junction
+    #
+    # Args:
+    #    plugin_type (PluginType): The kind of plugin
+    #
+    # Returns:
+    #    (Project): The project indicated by the junction
+    #    (PluginFactory): The factory for the plugin type in that project
+    #
+    def _get_subproject_factory(self, plugin_type):
+
+        # Get access to the project indicated by the junction,
+        # possibly loading it as a side effect.
+        #
+        loader = self.project.loader.get_loader(self._junction, self.provenance_node)
+        project = loader.project
+        project.ensure_fully_loaded()
+
+        # Now get the appropriate PluginFactory object
+        #
+        if plugin_type == PluginType.SOURCE:
+            factory = project.source_factory
+        elif plugin_type == PluginType.ELEMENT:
+            factory = project.element_factory
+
+        return project, factory
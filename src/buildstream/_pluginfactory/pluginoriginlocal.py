@@ -38,6 +38,23 @@ class PluginOriginLocal(PluginOrigin):
 
         return path, defaults, "project directory: {}".format(self._path)
 
+    def get_plugin_fingerprint(self, kind, plugin_type):
+        path = os.path.join(self.project.directory, self._path)
+
+        # Any file in the directory may be imported by the plugin
+        fingerprint = []
+        for root, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                filepath = os.path.join(root, filename)
+                try:
+                    st = os.lstat(filepath)
+                except FileNotFoundError:
+                    continue
+                fingerprint.append([os.path.relpath(filepath, path), st.st_mtime_ns, st.st_size])
+
+        return fingerprint
+
     def load_config(self, origin_node):
 
         origin_node.validate_keys(["path", *PluginOrigin._COMMON_CONFIG_KEYS])
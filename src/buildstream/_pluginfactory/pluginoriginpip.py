@@ -37,6 +37,58 @@ class PluginOriginPip(PluginOrigin):
 
         import pkg_resources
 
+        package = self._get_entry_info(kind, plugin_type)
+
+        location = package.dist.get_resource_filename(
+            pkg_resources._manager, package.module_name.replace(".", os.sep) + ".py"
+        )
+
+        # Also load the defaults - required since setuptools
+        # may need to extract the file.
+        try:
+            defaults = package.dist.get_resource_filename(
+                pkg_resources._manager, package.module_name.replace(".", os.sep) + ".yaml"
+            )
+        except KeyError:
+            # The plugin didn't have an accompanying YAML file
+            defaults = None
+
+        return (
+            os.path.dirname(location),
+            defaults,
+            "python package '{}' at: {}".format(package.dist, package.dist.location),
+        )
+
+    def get_plugin_fingerprint(self, kind, plugin_type):
+        package = self._get_entry_info(kind, plugin_type)
+
+        # Installed packages only change along with their version
+        return [package.dist.project_name, package.dist.version]
+
+    def load_config(self, origin_node):
+
+        origin_node.validate_keys(["package-name", *PluginOrigin._COMMON_CONFIG_KEYS])
+        self._package_name = origin_node.get_str("package-name")
+
+    ##############################################
+    #               Private methods              #
+    ##############################################
+
+    # _get_entry_info()
+    #
+    # Look up the entry point of a plugin in the pip package
+    #
+    # Args:
+    #    kind (str): The plugin
+    #    plugin_type (PluginType): The kind of plugin
+    #
+    # Returns:
+    #    (pkg_resources.EntryPoint): The entry point of the plugin
+    #
+    def _get_entry_info(self, kind, plugin_type):
+
+        import pkg_resources
+
         # Sources and elements are looked up in separate
         # entrypoint groups from the same package.
         #
@@ -84,27 +136,4 @@ class PluginOriginPip(PluginOrigin):
                 reason="plugin-not-found",
             )
 
-        location = package.dist.get_resource_filename(
-            pkg_resources._manager, package.module_name.replace(".", os.sep) + ".py"
-        )
-
-        # Also load the defaults - required since setuptools
-        # may need to extract the file.
-        try:
-            defaults = package.dist.get_resource_filename(
-                pkg_resources._manager, package.module_name.replace(".", os.sep) + ".yaml"
-            )
-        except KeyError:
-            # The plugin didn't have an accompanying YAML file
-            defaults = None
-
-        return (
-            os.path.dirname(location),
-            defaults,
-            "python package '{}' at: {}".format(package.dist, package.dist.location),
-        )
-
-    def load_config(self, origin_node):
-
-        origin_node.validate_keys(["package-name", *PluginOrigin._COMMON_CONFIG_KEYS])
-        self._package_name = origin_node.get_str("package-name")
+        return package
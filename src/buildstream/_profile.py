@@ -58,6 +58,7 @@ class _Profile:
 
         self.key = key
         self.message = message
+        self.notes = []
 
         self.start_time = time.time()
         filename_template = os.path.join(
@@ -93,6 +94,7 @@ class _Profile:
                 "Profile for key: {}".format(self.key),
                 "Started at: {}".format(self.start_time),
                 "\n\t{}".format(self.message) if self.message else "",
+                *("\t{}".format(note) for note in self.notes),
                 "-" * 64,
                 "",  # for a final new line
             ]
@@ -162,6 +164,27 @@ class _Profiler:
             parent_profiler.merge(profiler)
             parent_profiler.start()
 
+    # report()
+    #
+    # Record a note in the log of the innermost active profile, if
+    # it is a profile for the given topic.
+    #
+    # Args:
+    #    topic (str): The topic the note is relevant to
+    #    note (str|callable): The note to record, or a callable returning it
+    #
+    def report(self, topic, note):
+        if not self._is_profile_enabled(topic) or not self._active_profilers:
+            return
+
+        profiler = self._active_profilers[-1]
+        if not profiler.key.startswith(topic + "-"):
+            return
+
+        if callable(note):
+            note = note()
+        profiler.notes.append(note)
+
     def _is_profile_enabled(self, topic):
         return topic in self.enabled_topics or Topics.ALL in self.enabled_topics
 
@@ -174,6 +174,8 @@ class Project:
         if self.directory and load_project:
             with PROFILER.profile(Topics.LOAD_PROJECT, self.directory.replace(os.sep, "-")):
                 self._load(parent_loader=parent_loader, provenance_node=provenance_node)
+                if self._context.yamlcache:
+                    PROFILER.report(Topics.LOAD_PROJECT, self._context.yamlcache.summary)
         else:
             self._fully_loaded = True
 
@@ -743,7 +745,9 @@ class Project:
 
         # Load project local config and override the builtin
         try:
-            self._project_conf = _yaml.load(projectfile, shortname=_PROJECT_CONF_FILE, project=self)
+            self._project_conf = _yaml.load(
+                projectfile, shortname=_PROJECT_CONF_FILE, project=self, cache=self._context.yamlcache
+            )
         except LoadError as e:
             # Raise a more specific error here
             if e.reason == LoadErrorReason.MISSING_FILE:
@@ -819,7 +823,7 @@ class Project:
             )
 
         if self.ref_storage == ProjectRefStorage.PROJECT_REFS:
-            self.junction_refs.load(self.first_pass_config.options)
+            self.junction_refs.load(self.first_pass_config.options, cache=self._context.yamlcache)
 
     # _load_second_pass()
     #
@@ -877,7 +881,7 @@ class Project:
 
         # Load project.refs if it exists, this may be ignored.
         if self.ref_storage == ProjectRefStorage.PROJECT_REFS:
-            self.refs.load(self.options)
+            self.refs.load(self.options, cache=self._context.yamlcache)
 
         # Parse shell options
         shell_options = config.get_mapping("shell")
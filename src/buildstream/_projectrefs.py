@@ -60,10 +60,11 @@ class ProjectRefs:
     #
     # Args:
     #    options (OptionPool): To resolve conditional statements
+    #    cache (YamlCache): The (optional) cache of parsed YAML trees
     #
-    def load(self, options):
+    def load(self, options, *, cache=None):
         try:
-            self._toplevel_node = _yaml.load(self._fullpath, shortname=self._base_name, copy_tree=True)
+            self._toplevel_node = _yaml.load(self._fullpath, shortname=self._base_name, copy_tree=True, cache=cache)
             provenance = self._toplevel_node.get_provenance()
             self._toplevel_save = provenance._toplevel
 
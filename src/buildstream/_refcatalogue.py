@@ -0,0 +1,263 @@
+#
+#  Copyright (C) 2020 Bloomberg Finance LP
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from . import utils
+from ._exceptions import AssetCacheError
+
+
+# Version of the schema of the catalogue, bump when the schema changes
+_CATALOGUE_VERSION = 1
+
+# Seconds to wait for other sessions to release the database
+_BUSY_TIMEOUT = 60
+
+_SCHEMA = """
+CREATE TABLE refs (
+    name TEXT PRIMARY KEY NOT NULL,
+    project TEXT NOT NULL,
+    key TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX refs_mtime ON refs (mtime, name);
+"""
+
+
+# RefCatalogue()
+#
+# An index of the refs stored in a local ref directory, such that refs
+# can be listed in LRU order and matched against glob expressions
+# without walking the ref directory.
+#
+# The catalogue is an SQLite database next to the ref directory, which
+# is updated whenever a ref is written, used or removed. It is built
+# from the ref directory when it does not exist yet, and can be rebuilt
+# with rebuild() if the ref directory was modified by other means.
+#
+# Args:
+#    basedir (str): The ref directory
+#
+# Raises:
+#    (AssetCacheError): If the catalogue cannot be opened
+#
+class RefCatalogue:
+    def __init__(self, basedir):
+        self._basedir = basedir
+        self._path = basedir.rstrip(os.sep) + ".db"
+        self._lock = threading.Lock()
+
+        try:
+            try:
+                self._connection, created = self._open()
+            except sqlite3.DatabaseError:
+                # The catalogue is corrupted, it is only an index and can
+                # be rebuilt from scratch
+                utils.safe_remove(self._path)
+                self._connection, created = self._open()
+        except sqlite3.Error as e:
+            raise AssetCacheError("Failed to open the ref catalogue '{}': {}".format(self._path, e)) from e
+
+        if created:
+            self.rebuild()
+
+    # close()
+    #
+    # Close the database of the catalogue.
+    #
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    # record()
+    #
+    # Record that a ref was written or used, with its current
+    # modification time.
+    #
+    # Args:
+    #    ref (str): The ref, relative to the ref directory
+    #
+    # Raises:
+    #    (AssetCacheError): If the catalogue cannot be updated
+    #
+    def record(self, ref):
+        self.record_many([ref])
+
+    # record_many()
+    #
+    # Record that refs were written or used, with their current
+    # modification times, in a single transaction.
+    #
+    # Args:
+    #    refs (iterable): The refs, relative to the ref directory
+    #
+    # Raises:
+    #    (AssetCacheError): If the catalogue cannot be updated
+    #
+    def record_many(self, refs):
+        rows = []
+        removed = []
+        for ref in refs:
+            try:
+                st = os.stat(os.path.join(self._basedir, ref))
+            except FileNotFoundError:
+                removed.append((ref,))
+                continue
+            rows.append(self._row(ref, st))
+
+        with self._transaction() as connection:
+            connection.executemany("INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?, ?)", rows)
+            connection.executemany("DELETE FROM refs WHERE name = ?", removed)
+
+    # remove()
+    #
+    # Remove a ref from the catalogue.
+    #
+    # Args:
+    #    ref (str): The ref, relative to the ref directory
+    #
+    # Raises:
+    #    (AssetCacheError): If the catalogue cannot be updated
+    #
+    def remove(self, ref):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM refs WHERE name = ?", (ref,))
+
+    # list_refs_mtimes()
+    #
+    # List the refs of the catalogue, in LRU order.
+    #
+    # Args:
+    #    glob_expr (str|None): Optional glob expression to match against refs
+    #
+    # Returns:
+    #    (list [(mtime, ref)]): The refs and their mtimes, least recently used first
+    #
+    # Raises:
+    #    (AssetCacheError): If the catalogue cannot be read
+    #
+    def list_refs_mtimes(self, *, glob_expr=None):
+        query = "SELECT mtime, name FROM refs"
+        parameters = ()
+
+        regexer = None
+        if glob_expr:
+            regexer = re.compile(utils._glob2re(glob_expr))
+
+            # Only read the refs starting with the literal prefix of the glob
+            prefix = re.split(r"[*?\[]", glob_expr, maxsplit=1)[0]
+            if prefix:
+                query += " WHERE name >= ? AND name < ?"
+                parameters = (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+        query += " ORDER BY mtime, name"
+
+        with self._transaction() as connection:
+            rows = connection.execute(query, parameters).fetchall()
+
+        if regexer is None:
+            return rows
+
+        return [(mtime, name) for mtime, name in rows if regexer.match(name)]
+
+    # rebuild()
+    #
+    # Rebuild the catalogue from the ref directory.
+    #
+    # Returns:
+    #    (int): The number of refs in the catalogue
+    #
+    # Raises:
+    #    (AssetCacheError): If the catalogue cannot be updated
+    #
+    def rebuild(self):
+        # Refs recorded by concurrent sessions during the walk are kept
+        start_time = time.time()
+
+        rows = []
+        for root, _, files in os.walk(self._basedir):
+            for filename in files:
+                ref_path = os.path.join(root, filename)
+                try:
+                    st = os.stat(ref_path)
+                except FileNotFoundError:
+                    # Removed by a concurrent session
+                    continue
+                rows.append(self._row(os.path.relpath(ref_path, self._basedir), st))
+
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM refs WHERE mtime < ?", (start_time,))
+            connection.executemany("INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?, ?)", rows)
+
+        return len(rows)
+
+    ################################################
+    #               Private Methods                #
+    ################################################
+
+    # Open the database, and create the schema if needed. Returns the
+    # connection and whether the schema was created.
+    def _open(self):
+        connection = sqlite3.connect(self._path, timeout=_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        try:
+            # The catalogue can be rebuilt, favour speed over durability
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version == _CATALOGUE_VERSION:
+                return connection, False
+
+            connection.executescript(
+                "BEGIN IMMEDIATE;"
+                "DROP INDEX IF EXISTS refs_mtime;"
+                "DROP TABLE IF EXISTS refs;"
+                + _SCHEMA
+                + "PRAGMA user_version = {};".format(_CATALOGUE_VERSION)
+                + "COMMIT;"
+            )
+        except BaseException:
+            connection.close()
+            raise
+
+        return connection, True
+
+    def _row(self, ref, st):
+        project = ref.split(os.sep, 1)[0]
+        key = os.path.basename(ref)
+        return (ref, project, key, st.st_mtime, st.st_size)
+
+    # Run statements in a transaction, serialized across threads
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            try:
+                self._connection.execute("BEGIN")
+                try:
+                    yield self._connection
+                except BaseException:
+                    self._connection.execute("ROLLBACK")
+                    raise
+                self._connection.execute("COMMIT")
+            except sqlite3.Error as e:
+                raise AssetCacheError("Failed to access the ref catalogue '{}': {}".format(self._path, e)) from e
@@ -182,7 +182,11 @@ class RemoteSpec:
     #
     # Opens a gRPC channel based on this spec.
     #
-    def open_channel(self) -> Channel:
+    # Args:
+    #    aio: Whether to open an asyncio channel, which must then be
+    #         used from the event loop it was opened in
+    #
+    def open_channel(self, *, aio: bool = False) -> Channel:
         url = urlparse(self.url)
 
         # Assert port number for RE endpoints
@@ -195,10 +199,11 @@ class RemoteSpec:
                 message = "{}: {}".format(self._spec_node.get_provenance(), message)
             raise RemoteError(message)
 
+        grpc_module = grpc.aio if aio else grpc
         if url.scheme == "http":
-            channel = grpc.insecure_channel("{}:{}".format(url.hostname, url.port or 80))
+            channel = grpc_module.insecure_channel("{}:{}".format(url.hostname, url.port or 80))
         elif url.scheme == "https":
-            channel = grpc.secure_channel("{}:{}".format(url.hostname, url.port or 443), self.credentials)
+            channel = grpc_module.secure_channel("{}:{}".format(url.hostname, url.port or 443), self.credentials)
         else:
             message = "Only 'http' and 'https' protocols are supported, but '{}' was supplied.".format(url.scheme)
             if self._spec_node:
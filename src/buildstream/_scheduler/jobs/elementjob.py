@@ -77,6 +77,9 @@ class ElementJob(Job):
     def parent_complete(self, status, result):
         self._complete_cb(self, self._element, status, self._result)
 
+    def artifact_size(self):
+        return self.queue.artifact_size(self._element, self._result)
+
     def create_child_job(self, *args, **kwargs):
         return ChildElementJob(*args, element=self._element, action_cb=self._action_cb, **kwargs)
 
@@ -22,11 +22,15 @@
 
 # System imports
 import asyncio
+import concurrent.futures
 import datetime
+import functools
 import itertools
 import multiprocessing
 import threading
+import time
 import traceback
+from contextlib import contextmanager
 
 # BuildStream toplevel imports
 from ... import utils
@@ -128,6 +132,7 @@ class Job:
 
         self._task = None  # The task that is run
         self._child = None
+        self._start_time = None  # The time at which the current try was started
 
     # set_name()
     #
@@ -147,6 +152,7 @@ class Job:
         self._pipe_r, pipe_w = multiprocessing.Pipe(duplex=False)
 
         self._tries += 1
+        self._start_time = time.monotonic()
         self._parent_start_listening()
 
         # FIXME: remove the parent/child separation, it's not needed anymore.
@@ -160,6 +166,8 @@ class Job:
             self._message_element_name,
             self._message_element_key,
         )
+        self._child._idle_cb = functools.partial(self._scheduler.job_idle, self)
+        self._child._resume_cb = functools.partial(self._scheduler.job_resume, self)
 
         loop = asyncio.get_event_loop()
 
@@ -267,6 +275,19 @@ class Job:
     def parent_complete(self, status, result):
         raise ImplError("Job '{kind}' does not implement parent_complete()".format(kind=type(self).__name__))
 
+    # artifact_size()
+    #
+    # Abstract method for reporting the size of the artifact produced by
+    # a successful job, which is recorded along with the job's duration.
+    #
+    # This will be executed in the main process after the job finishes.
+    #
+    # Returns:
+    #    (int): The size of the artifact in bytes, or None
+    #
+    def artifact_size(self):
+        return None
+
     # create_child_job()
     #
     # Called by a Job instance to create a child job.
@@ -345,6 +366,17 @@ class Job:
         else:
             status = JobStatus.FAIL
 
+        # Record how long the job took, for estimating the jobs of future sessions
+        if status == JobStatus.OK and self._element is not None and not self._terminated:
+            job_durations = self._scheduler.context.job_durations
+            if job_durations is not None:
+                job_durations.record(
+                    self.action_name,
+                    self._element._get_full_name(),
+                    time.monotonic() - self._start_time,
+                    artifact_size=self.artifact_size(),
+                )
+
         self.parent_complete(status, self._result)
         self._scheduler.job_completed(self, status)
 
@@ -434,6 +466,8 @@ class ChildJob:
 
         self._pipe_w = None  # The write end of a pipe for message passing
         self._thread_id = None  # Thread in which the child executes its action
+        self._idle_cb = None  # Callback to make the job's resources available while it is idle
+        self._resume_cb = None  # Callback to reserve the job's resources again
         self._should_terminate = False
         self._terminate_lock = threading.Lock()
 
@@ -494,6 +528,7 @@ class ChildJob:
         # process to forward messages to the parent process
         self._pipe_w = pipe_w
         self._messenger.set_message_handler(self._child_message_handler)
+        self._messenger.set_idle_handler(self._idle)
 
         # Time, log and and run the action function
         #
@@ -572,6 +607,7 @@ class ChildJob:
                 self._thread_id = None
                 return _ReturnCode.TERMINATED, None
             finally:
+                self._messenger.set_idle_handler(None)
                 self._pipe_w.close()
 
     # terminate()
@@ -597,6 +633,51 @@ class ChildJob:
     #                  Local Private Methods              #
     #######################################################
 
+    # _idle()
+    #
+    # The idle handler of the job, see Messenger.idle().
+    #
+    # While the code block runs, the scheduling resources of the job may
+    # be used by other jobs. They are reserved again for the job before
+    # the context exits, which may block until they are available.
+    #
+    @contextmanager
+    def _idle(self):
+        if self._idle_cb is None or not self._idle_cb():
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            self._reclaim_resources()
+
+    # _reclaim_resources()
+    #
+    # Reserve the resources of the job again after it was idle,
+    # blocking until they are available.
+    #
+    # Termination is deferred until the resources are reserved,
+    # such that they are balanced when the job completes.
+    #
+    def _reclaim_resources(self):
+        future = self._resume_cb()
+        terminate = None
+
+        while True:
+            try:
+                # Wait with a timeout, like for subprocesses, such that
+                # the thread can be interrupted
+                future.result(timeout=1)
+                break
+            except concurrent.futures.TimeoutError:
+                continue
+            except TerminateException as e:
+                terminate = e
+
+        if terminate is not None:
+            raise terminate
+
     # _child_message_handler()
     #
     # A Context delegate for handling messages, this replaces the
@@ -48,6 +48,14 @@ class BuildQueue(Queue):
         # Inform element in main process that assembly is done
         element._assemble_done(status is JobStatus.OK)
 
+    def artifact_size(self, element, result):
+        # _assemble() returns the size of the cached artifact
+        return result
+
+    def estimate_tasks(self, elements):
+        # Cached elements will be skipped
+        super().estimate_tasks([element for element in elements if not element._cached_success()])
+
     def register_pending_element(self, element):
         # Set a "buildable" callback for an element not yet ready
         # to be processed in the build queue.
@@ -148,10 +148,56 @@ class Queue:
     def done(self, job, element, result, status):
         pass
 
+    # artifact_size()
+    #
+    # Abstract method for reporting the size of the artifact produced by
+    # a successful job, which is recorded along with the job's duration.
+    #
+    # Args:
+    #    element (Element): The element which completed processing
+    #    result (any): The return value of the process() implementation
+    #
+    # Returns:
+    #    (int): The size of the artifact in bytes, or None
+    #
+    def artifact_size(self, element, result):
+        return None
+
     #####################################################
     #      Virtual Methods for Queue implementations    #
     #####################################################
 
+    # estimate_tasks()
+    #
+    # Virtual method for estimating how long processing the given elements
+    # in this queue will take, based on the durations of the jobs of previous
+    # sessions. The estimates are reported on the queue's TaskGroup, for the
+    # frontend to estimate the remaining time of the session.
+    #
+    # Queue implementations may override this to exclude elements which
+    # are known to be skipped.
+    #
+    # Args:
+    #    elements (list): The Elements of the session
+    #
+    def estimate_tasks(self, elements):
+        job_durations = self._scheduler.context.job_durations
+        if job_durations is None:
+            return
+
+        default_duration = job_durations.average(self.action_name)
+
+        estimates = {}
+        for element in elements:
+            full_name = element._get_full_name()
+            estimate = job_durations.estimate(self.action_name, full_name)
+            if estimate is None:
+                estimate = default_duration
+            if estimate is not None:
+                estimates[full_name] = estimate
+
+        self._task_group.set_estimates(estimates, self._resources.max_jobs(self.resources))
+
     # register_pending_element()
     #
     # Virtual method for registering a queue specific callback
@@ -228,7 +274,7 @@ class Queue:
             if not reserved:
                 break
 
-            _, element = heapq.heappop(self._ready_queue)
+            _, _, element = heapq.heappop(self._ready_queue)
             ready.append(element)
 
         return [
@@ -345,9 +391,9 @@ class Queue:
 
             # These lists are for bookkeeping purposes for the UI and logging.
             if status == JobStatus.SKIPPED or job.get_terminated():
-                self._task_group.add_skipped_task()
+                self._task_group.add_skipped_task(element._get_full_name())
             elif status == JobStatus.OK:
-                self._task_group.add_processed_task()
+                self._task_group.add_processed_task(element._get_full_name())
             else:
                 self._task_group.add_failed_task(element._get_full_name())
 
@@ -380,11 +426,11 @@ class Queue:
         status = self.status(element)
         if status == QueueStatus.SKIP:
             # Place skipped elements into the done queue immediately
-            self._task_group.add_skipped_task()
+            self._task_group.add_skipped_task(element._get_full_name())
             self._done_queue.append(element)  # Elements to proceed to the next queue
         elif status == QueueStatus.READY:
             # Push elements which are ready to be processed immediately into the queue
-            heapq.heappush(self._ready_queue, (element._depth, element))
+            heapq.heappush(self._ready_queue, (element._priority, element._depth, element))
         else:
             # Register a queue specific callback for pending elements
             self.register_pending_element(element)
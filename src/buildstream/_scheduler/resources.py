@@ -34,6 +34,23 @@ class Resources:
             ResourceType.UPLOAD: set(),
         }
 
+    # max_jobs()
+    #
+    # The maximum number of jobs requiring a set of resources
+    # which can run at the same time
+    #
+    # Args:
+    #    resources (set): A set of ResourceTypes
+    #
+    # Returns:
+    #    (int): The maximum number of jobs
+    #
+    def max_jobs(self, resources):
+        limits = [self._max_resources[resource] for resource in resources if self._max_resources[resource] > 0]
+        if not limits:
+            return 1
+        return min(limits)
+
     # reserve()
     #
     # Reserves a set of resources
@@ -28,7 +28,9 @@ import signal
 import datetime
 import multiprocessing.forkserver
 import sys
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Local imports
 from .resources import Resources
@@ -39,6 +41,11 @@ from ..plugin import Plugin
 from .. import _signals
 
 
+# Maximum number of jobs which can be idle at the same time, waiting
+# for work done elsewhere while other jobs use their resources
+_MAX_IDLE_JOBS = 256
+
+
 # A decent return code for Scheduler.run()
 class SchedStatus(FastEnum):
     SUCCESS = 0
@@ -108,6 +115,10 @@ class Scheduler:
 
         self._sched_handle = None  # Whether a scheduling job is already scheduled or not
 
+        self._idle_jobs = 0  # Number of jobs whose resources are used by other jobs while they are idle
+        self._idle_jobs_lock = threading.Lock()  # Lock for the number of idle jobs, which is updated by jobs
+        self._reclaims = deque()  # Idle jobs waiting for their resources to be reserved again
+
         self._ticker_callback = ticker_callback
         self._interrupt_callback = interrupt_callback
 
@@ -179,7 +190,9 @@ class Scheduler:
             # hadn't set it before.
             # FIXME: this should be done in a cleaner way
             with _signals.suspendable(lambda: None, lambda: None), _signals.terminator(lambda: None):
-                with ThreadPoolExecutor(max_workers=sum(self.resources._max_resources.values())) as pool:
+                # Idle jobs keep their thread, allow for as many more threads
+                max_workers = sum(self.resources._max_resources.values()) + _MAX_IDLE_JOBS
+                with ThreadPoolExecutor(max_workers=max_workers) as pool:
                     self.loop.set_default_executor(pool)
                     # Run the queues
                     self._sched()
@@ -302,10 +315,88 @@ class Scheduler:
 
         self._sched()
 
+    # job_idle()
+    #
+    # Called from the thread of a job when it starts waiting for work
+    # done outside of the job, to make the resources of the job available
+    # to other jobs.
+    #
+    # Args:
+    #    job (Job): The idle job
+    #
+    # Returns:
+    #    (bool): Whether the resources of the job were made available, in
+    #            which case job_resume() must be called once it is done waiting
+    #
+    def job_idle(self, job):
+        with self._idle_jobs_lock:
+            if self._idle_jobs >= _MAX_IDLE_JOBS:
+                return False
+            self._idle_jobs += 1
+
+        self.loop.call_soon_threadsafe(self._release_idle_job, job)
+        return True
+
+    # job_resume()
+    #
+    # Called from the thread of an idle job to reserve its resources again.
+    #
+    # Idle jobs get their resources before new jobs are started.
+    #
+    # Args:
+    #    job (Job): The idle job
+    #
+    # Returns:
+    #    (Future): A future which is completed once the resources are reserved
+    #
+    def job_resume(self, job):
+        future = Future()
+        self.loop.call_soon_threadsafe(self._reclaim_idle_job, job, future)
+        return future
+
     #######################################################
     #                  Local Private Methods              #
     #######################################################
 
+    # _release_idle_job()
+    #
+    # Release the resources of a job which became idle
+    #
+    # Args:
+    #    job (Job): The idle job
+    #
+    def _release_idle_job(self, job):
+        self.resources.release(job.queue.resources)
+        self._sched()
+
+    # _reclaim_idle_job()
+    #
+    # Queue an idle job to reserve its resources again
+    #
+    # Args:
+    #    job (Job): The idle job
+    #    future (Future): The future to complete once the resources are reserved
+    #
+    def _reclaim_idle_job(self, job, future):
+        self._reclaims.append((job, future))
+        self._sched()
+
+    # _sched_reclaims()
+    #
+    # Reserve the resources of idle jobs which are waiting for them,
+    # in the order they asked for them.
+    #
+    def _sched_reclaims(self):
+        while self._reclaims:
+            job, future = self._reclaims[0]
+            if not self.resources.reserve(job.queue.resources):
+                break
+
+            self._reclaims.popleft()
+            with self._idle_jobs_lock:
+                self._idle_jobs -= 1
+            future.set_result(None)
+
     # _abort_on_casd_failure()
     #
     # Abort if casd failed while running.
@@ -414,6 +505,9 @@ class Scheduler:
             #
             self._sched_handle = None
 
+            # Idle jobs need their resources to complete, even when terminating
+            self._sched_reclaims()
+
             if not self.terminated:
 
                 #
@@ -0,0 +1,169 @@
+#
+#  Copyright (C) 2020 Codethink Limited
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import re
+
+from . import utils
+
+
+# Characters which make a glob component something other than a literal
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+# The inline flags prefixed by utils._glob2re(), which must be
+# given to re.compile() instead when combining multiple globs
+_GLOB_FLAGS = "(?ms)"
+
+
+# SplitRules()
+#
+# A matcher for the split rules of an element, which classifies
+# file paths into the split domains they belong to.
+#
+# The globs of all domains are compiled into a single trie of path
+# components. The literal leading components of each glob are walked
+# in the trie, and only the remainder of a glob, starting from its
+# first component with wildcards, is matched as a regular expression
+# against the remainder of the path. Each path is thus classified in
+# a single walk of its components, only matching the regular
+# expressions which apply to the directories it is in.
+#
+# This classifies paths exactly like matching each domain's globs
+# with utils._glob2re() against the absolute path.
+#
+# Args:
+#    rules (dict): A list of globs for each domain name
+#
+class SplitRules:
+    def __init__(self, rules):
+        self.domains = list(rules.keys())  # The domain names, in order
+
+        self._root = _Node()
+        self._domain_sets = {}  # Shared frozensets of domains, to save memory
+
+        for domain, globs in rules.items():
+            for glob in globs:
+                self._add(domain, glob)
+
+        self._root.finalize(self._intern)
+
+    # match()
+    #
+    # Get the split domains a file belongs to
+    #
+    # Args:
+    #    path (str): The path of the file, relative to the artifact root
+    #
+    # Returns:
+    #    (frozenset): The names of the domains which claim the file
+    #
+    def match(self, path):
+        # Absolute path is required for matching
+        filename = "/" + path
+        components = filename.split("/")
+
+        matches = None
+        node = self._root
+        start = 0
+        for component in components:
+            # Match the globs with wildcards against the remaining path
+            for regex, domains in node.patterns:
+                if regex.match(filename, start):
+                    matches = domains if matches is None else matches | domains
+
+            node = node.children.get(component)
+            if node is None:
+                break
+            start += len(component) + 1
+        else:
+            if node.domains:
+                matches = node.domains if matches is None else matches | node.domains
+
+        if matches is None:
+            return self._intern(frozenset())
+        return self._intern(matches)
+
+    ################################################
+    #               Private Methods                #
+    ################################################
+
+    def _add(self, domain, glob):
+        components = glob.split("/")
+
+        node = self._root
+        for index, component in enumerate(components):
+            if _GLOB_CHARS.search(component):
+                # Leave the remainder of the glob, which may span
+                # multiple components, to a regular expression
+                node.add_pattern(domain, "/".join(components[index:]))
+                return
+            node = node.children.setdefault(component, _Node())
+
+        node.add_domain(domain)
+
+    def _intern(self, domains):
+        return self._domain_sets.setdefault(domains, domains)
+
+
+# _Node()
+#
+# A node in the trie of path components
+#
+class _Node:
+    def __init__(self):
+        self.children = {}  # Child nodes by path component
+        self.domains = frozenset()  # The domains of the globs ending at this node
+        self.patterns = []  # (regex, domains) tuples for globs with wildcards in the remainder
+
+        self._patterns = {}  # Lists of globs with wildcards by domain, until finalized
+
+    def add_domain(self, domain):
+        self.domains = self.domains | {domain}
+
+    def add_pattern(self, domain, glob):
+        self._patterns.setdefault(domain, []).append(glob)
+
+    # finalize()
+    #
+    # Compile the globs with wildcards of this node and its children,
+    # combining the globs of each domain into a single regular expression.
+    #
+    # Args:
+    #    intern (callable): A function returning a shared frozenset
+    #
+    def finalize(self, intern):
+        self.domains = intern(self.domains)
+        self.patterns = [
+            (
+                re.compile("(?:" + "|".join(_glob_regex(glob) for glob in globs) + ")", re.MULTILINE | re.DOTALL),
+                intern(frozenset([domain])),
+            )
+            for domain, globs in self._patterns.items()
+        ]
+        self._patterns = None
+
+        for child in self.children.values():
+            child.finalize(intern)
+
+
+# _glob_regex()
+#
+# Convert a glob to a regular expression without inline flags
+#
+def _glob_regex(glob):
+    regex = utils._glob2re(glob)
+    assert regex.startswith(_GLOB_FLAGS)
+    return regex[len(_GLOB_FLAGS) :]
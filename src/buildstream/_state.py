@@ -42,6 +42,10 @@ class TaskGroup:
         self.skipped_tasks: int = 0  # Number of skipped tasks
         self.failed_tasks: List[str] = []  # List of element full names which failed
 
+        # Estimated durations in seconds of the tasks yet to complete, by full name
+        self.estimates: Dict[str, float] = {}
+        self.max_parallel_tasks: int = 1  # Maximum number of tasks processed in parallel
+
         #
         # Private members
         #
@@ -51,14 +55,32 @@ class TaskGroup:
     # Core-facing APIs to drive notifications #
     ###########################################
 
+    # set_estimates()
+    #
+    # Set the estimated durations of the tasks in this TaskGroup
+    #
+    # Args:
+    #    estimates: The estimated durations in seconds, by task full name
+    #    max_parallel_tasks: The maximum number of tasks processed in parallel
+    #
+    # This is a core-facing API and should not be called from the frontend
+    #
+    def set_estimates(self, estimates: Dict[str, float], max_parallel_tasks: int) -> None:
+        self.estimates = estimates
+        self.max_parallel_tasks = max_parallel_tasks
+
     # add_processed_task()
     #
     # Update the TaskGroup's count of processed tasks and notify of changes
     #
+    # Args:
+    #    full_name: The full name of the task
+    #
     # This is a core-facing API and should not be called from the frontend
     #
-    def add_processed_task(self) -> None:
+    def add_processed_task(self, full_name: str) -> None:
         self.processed_tasks += 1
+        self.estimates.pop(full_name, None)
         for cb in self._state._task_groups_changed_cbs:
             cb()
 
@@ -66,10 +88,14 @@ class TaskGroup:
     #
     # Update the TaskGroup's count of skipped tasks and notify of changes
     #
+    # Args:
+    #    full_name: The full name of the task
+    #
     # This is a core-facing API and should not be called from the frontend
     #
-    def add_skipped_task(self) -> None:
+    def add_skipped_task(self, full_name: str) -> None:
         self.skipped_tasks += 1
+        self.estimates.pop(full_name, None)
 
         for cb in self._state._task_groups_changed_cbs:
             cb()
@@ -87,6 +113,7 @@ class TaskGroup:
     #
     def add_failed_task(self, full_name: str) -> None:
         self.failed_tasks.append(full_name)
+        self.estimates.pop(full_name, None)
 
         for cb in self._state._task_groups_changed_cbs:
             cb()
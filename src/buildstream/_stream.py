@@ -33,6 +33,7 @@ from typing import List, Tuple, Optional, Iterable, Callable
 
 from ._artifactelement import verify_artifact_ref, ArtifactElement
 from ._artifactproject import ArtifactProject
+from ._dependencygraph import DependencyGraph
 from ._exceptions import StreamError, ImplError, BstError, ArtifactElementError, ArtifactError
 from ._scheduler import (
     Scheduler,
@@ -45,12 +46,15 @@ from ._scheduler import (
     ArtifactPushQueue,
 )
 from .element import Element
+from ._pipelinesnapshot import PipelineSnapshot
 from ._profile import Topics, PROFILER
 from ._project import ProjectRefStorage
 from ._remotespec import RemoteSpec
 from ._state import State
 from .types import _KeyStrength, _PipelineSelection, _Scope, _HostMount
 from .plugin import Plugin
+from ._workspaces import Workspaces
+from ._workspacewatcher import WorkspaceWatcher
 from . import utils, _yaml, _site, _pipeline
 
 
@@ -792,6 +796,16 @@ class Stream:
         if not ref_removed:
             self._context.messenger.info("No artifacts were removed")
 
+    # artifact_reindex()
+    #
+    # Rebuild the catalogue of the artifacts in the local cache
+    #
+    def artifact_reindex(self):
+        with self._context.messenger.timed_activity("Rebuilding the artifact catalogue"):
+            count = self._artifacts.rebuild_catalogue()
+
+        self._context.messenger.info("Indexed {} artifacts".format(count))
+
     # source_checkout()
     #
     # Checkout sources of the target element to the specified location
@@ -1086,6 +1100,51 @@ class Stream:
 
         _yaml.roundtrip_dump({"workspaces": workspaces})
 
+    # workspace_watch
+    #
+    # Watch the open workspaces for changes until interrupted, such that
+    # staging a workspace only scans the directories which changed since
+    # it was last staged.
+    #
+    # The watched workspaces are updated when workspaces are opened or
+    # closed.
+    #
+    def workspace_watch(self):
+        self._assert_project("Unable to locate workspaces")
+
+        workspaces = self._context.get_workspaces()
+
+        def update_watcher():
+            watcher.update([workspace_.get_absolute_path() for _, workspace_ in workspaces.list()])
+            self._context.messenger.info(
+                "Watching {} workspaces".format(len(watcher.directories())), detail="\n".join(watcher.directories())
+            )
+
+        def reload_workspaces():
+            nonlocal workspaces
+            try:
+                workspaces = Workspaces(self._project, self._context.get_workspace_project_cache())
+            except BstError as e:
+                self._context.messenger.warn("Failed to reload workspaces: {}".format(e))
+                return
+
+            update_watcher()
+
+        try:
+            watcher = WorkspaceWatcher(self._context.get_workspace_watch_dir())
+        except OSError as e:
+            raise StreamError("Failed to watch workspaces: {}".format(e)) from e
+
+        with watcher:
+            try:
+                watcher.watch_config(workspaces.get_filename(), reload_workspaces)
+                update_watcher()
+            except OSError as e:
+                raise StreamError("Failed to watch workspaces: {}".format(e)) from e
+
+            with suppress(KeyboardInterrupt):
+                watcher.run()
+
     # redirect_element_names()
     #
     # Takes a list of element names and returns a list where elements have been
@@ -1366,9 +1425,9 @@ class Stream:
     def _resolve_cached_remotely(self, targets):
         with self._context.messenger.simple_task("Querying remotes for cached status", silent_nested=True) as task:
             task.set_maximum_progress(len(targets))
-            for element in targets:
-                element._cached_remotely()
-                task.add_current_progress()
+            cached = self._artifacts.check_remotes_for_elements(targets, progress=task.add_current_progress)
+            for element, cached_remotely in cached.items():
+                element._set_cached_remotely(cached_remotely)
 
     # _load_tracking()
     #
@@ -1578,9 +1637,12 @@ class Stream:
 
         # Now move on to loading primary selection.
         #
-        self._resolve_elements(self.targets)
-        selected = _pipeline.get_selection(self._context, self.targets, selection, silent=False)
-        selected = _pipeline.except_elements(self.targets, selected, except_elements)
+        # Index the dependency graph once for all the traversals of the targets
+        graph = DependencyGraph(self.targets)
+
+        self._resolve_elements(self.targets, graph=graph)
+        selected = _pipeline.get_selection(self._context, self.targets, selection, silent=False, graph=graph)
+        selected = _pipeline.except_elements(self.targets, selected, except_elements, graph=graph)
 
         if selection == _PipelineSelection.PLAN and dynamic_plan:
             # We use a dynamic build plan, only request artifacts of top-level targets,
@@ -1600,8 +1662,9 @@ class Stream:
     #
     # Args:
     #    targets (list of Element): The list of toplevel element targets
+    #    graph (DependencyGraph): The dependency graph of the targets, if already built
     #
-    def _resolve_elements(self, targets):
+    def _resolve_elements(self, targets, *, graph=None):
         with self._context.messenger.simple_task("Resolving cached state", silent_nested=True) as task:
             # We need to go through the project to access the loader
             #
@@ -1611,12 +1674,24 @@ class Stream:
             if task and self._project:
                 task.set_maximum_progress(self._project.loader.loaded)
 
+            if graph is None:
+                graph = DependencyGraph(targets)
+            elements = graph.dependencies(targets, _Scope.ALL)
+
+            # Restore previously calculated cache keys, if enabled
+            snapshot = None
+            if self._context.pipeline_snapshots:
+                snapshot = PipelineSnapshot.open(self._context, elements)
+
             # XXX: Now that Element._update_state() can trigger recursive update_state calls
             # it is possible that we could get a RecursionError. However, this is unlikely
             # to happen, even for large projects (tested with the Debian stack). Although,
             # if it does become a problem we may have to set the recursion limit to a
             # greater value.
-            for element in _pipeline.dependencies(targets, _Scope.ALL):
+            for element in elements:
+                if snapshot and not isinstance(element, ArtifactElement):
+                    element._set_snapshot_keys(snapshot.lookup(element))
+
                 # Determine initial element state.
                 element._initialize_state()
 
@@ -1628,6 +1703,13 @@ class Stream:
                 if task:
                     task.add_current_progress()
 
+            if snapshot:
+                for element in elements:
+                    entry = element._get_snapshot_keys()
+                    if entry and not isinstance(element, ArtifactElement):
+                        snapshot.record(element, entry)
+                snapshot.save()
+
     # _reset()
     #
     # Resets the internal state related to a given scheduler run.
@@ -1694,6 +1776,10 @@ class Stream:
         if announce_session and self._session_start_callback is not None:
             self._session_start_callback()
 
+        # Estimate the duration of the session for the frontend
+        for queue in self.queues:
+            queue.estimate_tasks(self.session_elements)
+
         self._running = True
         status = self._scheduler.run(self.queues, self._context.get_cascache().get_casd_process_manager())
         self._running = False
@@ -427,6 +427,16 @@ class Workspaces:
             else:
                 raise
 
+    # get_filename():
+    #
+    # Get the workspaces.yml file path.
+    #
+    # Returns:
+    #    (str): The path to workspaces.yml file.
+    #
+    def get_filename(self):
+        return os.path.join(self._bst_directory, "workspaces.yml")
+
     # save_config()
     #
     # Dump the current workspace element to the project configuration
@@ -441,7 +451,7 @@ class Workspaces:
             "workspaces": {element: workspace.to_dict() for element, workspace in self._workspaces.items()},
         }
         os.makedirs(self._bst_directory, exist_ok=True)
-        _yaml.roundtrip_dump(config, self._get_filename())
+        _yaml.roundtrip_dump(config, self.get_filename())
 
     # _load_config()
     #
@@ -453,7 +463,7 @@ class Workspaces:
     # Raises: LoadError if there was a problem with the workspace config
     #
     def _load_config(self):
-        workspace_file = self._get_filename()
+        workspace_file = self.get_filename()
         try:
             node = _yaml.load(workspace_file, shortname="workspaces.yml")
         except LoadError as e:
@@ -525,12 +535,3 @@ class Workspaces:
             "last_build": node.get_str("last_build", default=None),
         }
         return Workspace.from_dict(self._toplevel_project, dictionary)
-
-    # _get_filename():
-    #
-    # Get the workspaces.yml file path.
-    #
-    # Returns:
-    #    (str): The path to workspaces.yml file.
-    def _get_filename(self):
-        return os.path.join(self._bst_directory, "workspaces.yml")
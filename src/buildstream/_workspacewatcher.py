@@ -0,0 +1,462 @@
+#
+#  Copyright (C) 2020 Bloomberg Finance LP
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import json
+import os
+import selectors
+import socket
+import struct
+import uuid
+
+# Inotify event masks, see inotify(7)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_EXCL_UNLINK = 0x04000000
+_IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+    | _IN_DONT_FOLLOW
+    | _IN_EXCL_UNLINK
+)
+
+# struct inotify_event, without the name which follows it
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Timeout for the exchange with a client, in seconds
+_CLIENT_TIMEOUT = 5
+
+
+# watch_socket_path()
+#
+# Get the path of the socket the watcher of a workspace listens on.
+#
+# Args:
+#    rundir (str): The directory of the sockets of the watcher
+#    directory (str): The directory of the workspace
+#
+# Returns:
+#    (str): The path of the socket
+#
+def watch_socket_path(rundir, directory):
+    name = hashlib.sha256(os.path.abspath(directory).encode()).hexdigest()[:32]
+    return os.path.join(rundir, name + ".sock")
+
+
+# query_changes()
+#
+# Ask the watcher of a workspace for the paths which changed since
+# a previous query.
+#
+# Args:
+#    socket_path (str): The socket of the watcher of the workspace
+#    token (str): The token returned by the previous query, or None
+#
+# Returns:
+#    (str): The token to pass to the next query, or None if the
+#           workspace is not being watched
+#    (set): The relative paths of the entries which changed, or None
+#           if the whole workspace must be scanned
+#    (set): The relative paths of the directories which must be
+#           scanned entirely, or None if the whole workspace must be
+#           scanned
+#
+def query_changes(socket_path, token):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(_CLIENT_TIMEOUT)
+            sock.connect(socket_path)
+            sock.sendall((token or "").encode() + b"\n")
+            with sock.makefile("rb") as f:
+                reply = json.loads(f.readline())
+    except (OSError, ValueError):
+        # The watcher is not running
+        return None, None, None
+
+    if reply.get("changes") is None:
+        return reply.get("token"), None, None
+
+    return reply["token"], set(reply["changes"]), set(reply["trees"])
+
+
+# _Inotify()
+#
+# A minimal binding of the Linux inotify API.
+#
+# Raises:
+#    (OSError): If inotify is not available
+#
+class _Inotify:
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        try:
+            self._inotify_add_watch = libc.inotify_add_watch
+            self._inotify_rm_watch = libc.inotify_rm_watch
+            inotify_init1 = libc.inotify_init1
+        except AttributeError as e:
+            raise OSError(errno.ENOSYS, "inotify is not supported on this platform") from e
+
+        self._inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self._fd = inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def fileno(self):
+        return self._fd
+
+    def close(self):
+        os.close(self._fd)
+
+    def add_watch(self, path, mask):
+        wd = self._inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd):
+        # Fails if the watch was already removed by the kernel
+        self._inotify_rm_watch(self._fd, wd)
+
+    # read_events()
+    #
+    # Read the pending events.
+    #
+    # Returns:
+    #    (list): The (watch descriptor, mask, name) of each event
+    #
+    def read_events(self):
+        events = []
+        while True:
+            try:
+                buffer = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return events
+
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(buffer[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+
+
+# A workspace being watched
+#
+class _WatchedWorkspace:
+    def __init__(self, directory, listener):
+        self.directory = directory
+        self.listener = listener
+
+        # Watch descriptors, keyed by relative path of the directory
+        self.watches = {}
+
+        # The sequence number of the last change of each relative path,
+        # and whether the whole directory at that path must be scanned
+        self.changes = {}
+
+        # Tokens with older sequence numbers require a full scan
+        self.valid_since = 0
+
+        # Whether changes can no longer be tracked, e.g. because
+        # the workspace directory was removed
+        self.broken = False
+
+
+# WorkspaceWatcher()
+#
+# Watches workspace directories with inotify and records the paths
+# which changed, for the FileIndex to only scan the parts of workspaces
+# which changed since they were last imported.
+#
+# Every watched workspace gets a socket, see watch_socket_path(), on
+# which query_changes() gets the changes since a token returned by a
+# previous query. Pending inotify events are processed before replying,
+# such that all changes made before the query are reported.
+#
+# Tokens are only valid for the session of the watcher in which they
+# were returned, and a full scan is required if events were lost.
+#
+# Args:
+#    rundir (str): The directory of the sockets of the watcher
+#
+# Raises:
+#    (OSError): If inotify is not available
+#
+class WorkspaceWatcher:
+    def __init__(self, rundir):
+        self._rundir = rundir
+        self._session = uuid.uuid4().hex
+        self._sequence = 0
+        self._inotify = _Inotify()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._inotify, selectors.EVENT_READ, self._process_events)
+
+        self._workspaces = {}  # Watched workspaces, keyed by directory
+        self._watches = {}  # (workspace, relative path) of each watch descriptor
+
+        # Watch of the directory of a configuration file, and callback
+        self._config_watch = None
+        self._config_name = None
+        self._config_callback = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # close()
+    #
+    # Stop watching all workspaces and remove their sockets.
+    #
+    def close(self):
+        for directory in list(self._workspaces):
+            self._unwatch(directory)
+        self._selector.close()
+        self._inotify.close()
+
+    # watch_config()
+    #
+    # Call a function whenever a configuration file is written, e.g.
+    # to update the watched workspaces.
+    #
+    # Args:
+    #    filename (str): The path of the configuration file
+    #    callback (callable): The function to call
+    #
+    def watch_config(self, filename, callback):
+        directory, self._config_name = os.path.split(filename)
+        os.makedirs(directory, exist_ok=True)
+        self._config_watch = self._inotify.add_watch(directory, _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_ONLYDIR)
+        self._config_callback = callback
+
+    # update()
+    #
+    # Set the workspace directories to watch.
+    #
+    # Args:
+    #    directories (list): The workspace directories
+    #
+    def update(self, directories):
+        directories = {os.path.abspath(directory) for directory in directories}
+
+        for directory in set(self._workspaces) - directories:
+            self._unwatch(directory)
+        for directory in directories - set(self._workspaces):
+            if os.path.isdir(directory):
+                self._watch(directory)
+
+    # directories()
+    #
+    # Returns:
+    #    (list): The watched workspace directories
+    #
+    def directories(self):
+        return list(self._workspaces)
+
+    # run()
+    #
+    # Process events and queries until interrupted.
+    #
+    def run(self):
+        while True:
+            for key, _ in self._selector.select():
+                key.data()
+
+    ################################################
+    #               Private Methods                #
+    ################################################
+
+    def _watch(self, directory):
+        os.makedirs(self._rundir, exist_ok=True)
+        socket_path = watch_socket_path(self._rundir, directory)
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+        listener.bind(socket_path)
+        listener.listen()
+
+        workspace = _WatchedWorkspace(directory, listener)
+        self._workspaces[directory] = workspace
+
+        # Changes made before the watches are in place are not recorded,
+        # tokens returned before cannot be used for this workspace
+        self._sequence += 1
+        workspace.valid_since = self._sequence + 1
+        self._add_watches(workspace, "")
+
+        self._selector.register(listener, selectors.EVENT_READ, lambda: self._reply(workspace))
+
+    def _unwatch(self, directory):
+        workspace = self._workspaces.pop(directory)
+
+        self._selector.unregister(workspace.listener)
+        workspace.listener.close()
+        try:
+            os.unlink(watch_socket_path(self._rundir, directory))
+        except FileNotFoundError:
+            pass
+
+        self._remove_watches(workspace, "")
+
+    # Watch a directory of a workspace and its subdirectories
+    def _add_watches(self, workspace, relpath):
+        pending = [relpath]
+        while pending:
+            relpath = pending.pop()
+            try:
+                wd = self._inotify.add_watch(os.path.join(workspace.directory, relpath), _WATCH_MASK)
+            except FileNotFoundError:
+                # Removed in the meantime, the removal is reported by its parent
+                continue
+            except OSError:
+                # Most likely the limit of inotify watches was reached
+                workspace.broken = True
+                return
+
+            workspace.watches[relpath] = wd
+            self._watches[wd] = (workspace, relpath)
+
+            try:
+                with os.scandir(os.path.join(workspace.directory, relpath)) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(os.path.join(relpath, entry.name))
+            except FileNotFoundError:
+                continue
+
+    # Stop watching a directory of a workspace and its subdirectories
+    def _remove_watches(self, workspace, relpath):
+        prefix = os.path.join(relpath, "")
+        for path in list(workspace.watches):
+            if not relpath or path == relpath or path.startswith(prefix):
+                wd = workspace.watches.pop(path)
+                del self._watches[wd]
+                self._inotify.rm_watch(wd)
+
+    def _process_events(self):
+        for wd, mask, name in self._inotify.read_events():
+            if mask & _IN_Q_OVERFLOW:
+                # Events were lost, all workspaces must be scanned again
+                self._sequence += 1
+                for workspace in self._workspaces.values():
+                    workspace.changes = {}
+                    workspace.valid_since = self._sequence + 1
+                continue
+
+            if wd == self._config_watch:
+                if name == self._config_name:
+                    self._config_callback()
+                continue
+
+            try:
+                workspace, relpath = self._watches[wd]
+            except KeyError:
+                # Events of watches which were removed
+                continue
+
+            if mask & _IN_IGNORED:
+                if workspace.watches.get(relpath) == wd:
+                    del workspace.watches[relpath]
+                del self._watches[wd]
+                continue
+
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                if not relpath:
+                    # The workspace directory itself is gone
+                    workspace.broken = True
+                # Otherwise the change is reported by the parent directory
+                continue
+
+            self._sequence += 1
+            path = os.path.join(relpath, name)
+            tree = False
+
+            if mask & _IN_ISDIR:
+                if mask & (_IN_MOVED_FROM | _IN_DELETE):
+                    self._remove_watches(workspace, path)
+                if mask & (_IN_MOVED_TO | _IN_CREATE):
+                    # Entries created before the watch was added are not
+                    # reported, the whole directory must be scanned
+                    self._add_watches(workspace, path)
+                    tree = True
+
+            previous = workspace.changes.get(path)
+            workspace.changes[path] = (self._sequence, tree or (previous is not None and previous[1]))
+
+    def _reply(self, workspace):
+        connection, _ = workspace.listener.accept()
+        with connection:
+            try:
+                connection.settimeout(_CLIENT_TIMEOUT)
+                with connection.makefile("rb") as f:
+                    token = f.readline().decode().strip()
+
+                # Report all changes made before the query
+                self._process_events()
+
+                connection.sendall(json.dumps(self._changes(workspace, token)).encode() + b"\n")
+            except (OSError, UnicodeDecodeError):
+                pass
+
+    def _changes(self, workspace, token):
+        if workspace.broken:
+            return {"token": None, "changes": None}
+
+        reply = {"token": "{}:{}".format(self._session, self._sequence), "changes": None}
+
+        session, _, sequence = token.partition(":")
+        if session != self._session or not sequence.isdigit() or int(sequence) + 1 < workspace.valid_since:
+            return reply
+
+        sequence = int(sequence)
+        changes = [(path, tree) for path, (change, tree) in workspace.changes.items() if change > sequence]
+
+        reply["changes"] = [path for path, _ in changes]
+        reply["trees"] = [path for path, tree in changes if tree]
+        return reply
@@ -2,4 +2,11 @@ from typing import Optional
 
 from .node import MappingNode
 
-def load(filename: str, shortname: str, copy_tree: bool = False, project: Optional[object] = None) -> MappingNode: ...
+def load(
+    filename: str,
+    shortname: str,
+    copy_tree: bool = False,
+    project: Optional[object] = None,
+    cache: Optional[object] = None,
+    contents: Optional[str] = None,
+) -> MappingNode: ...
@@ -32,7 +32,7 @@ from ruamel import yaml
 from ._exceptions import LoadError
 from .exceptions import LoadErrorReason
 from . cimport node
-from .node cimport MappingNode, ScalarNode, SequenceNode
+from .node cimport MappingNode, Node, ScalarNode, SequenceNode
 
 
 # These exceptions are intended to be caught entirely within
@@ -250,13 +250,16 @@ cdef class Representer:
 #    copy_tree (bool): Whether to make a copy, preserving the original toplevels
 #                      for later serialization
 #    project (Project): The (optional) project to associate the parsed YAML with
+#    cache (YamlCache): The (optional) cache of parsed YAML trees
+#    contents (str): The contents of the file, if they were already read
 #
 # Returns (dict): A loaded copy of the YAML file with provenance information
 #
 # Raises: LoadError
 #
-cpdef MappingNode load(str filename, str shortname, bint copy_tree=False, object project=None):
-    cdef MappingNode data
+cpdef MappingNode load(str filename, str shortname, bint copy_tree=False, object project=None, object cache=None,
+                       str contents=None):
+    cdef MappingNode data = None
 
     if not shortname:
         shortname = filename
@@ -270,13 +273,26 @@ cpdef MappingNode load(str filename, str shortname, bint copy_tree=False, object
     cdef Py_ssize_t file_number = node._create_new_file(filename, shortname, displayname, project)
 
     try:
-        with open(filename) as f:
-            contents = f.read()
+        if contents is None:
+            with open(filename) as f:
+                contents = f.read()
+
+        if cache is not None:
+            encoded = cache.get(filename, contents)
+            if encoded is not None:
+                data = _decode_tree(encoded, file_number)
+                node._set_root_node_for_file(file_number, data)
+
+        if data is None:
+            data = load_data(contents,
+                             file_index=file_number,
+                             file_name=filename)
 
-        data = load_data(contents,
-                         file_index=file_number,
-                         file_name=filename,
-                         copy_tree=copy_tree)
+            if cache is not None:
+                cache.put(filename, contents, _encode_tree(data))
+
+        if copy_tree:
+            data = data.clone()
 
         return data
     except FileNotFoundError as e:
@@ -329,6 +345,85 @@ cpdef MappingNode load_data(str data, int file_index=node._SYNTHETIC_FILE_INDEX,
     return contents
 
 
+# _encode_tree()
+#
+# Encode a loaded tree in a compact form made of plain python types,
+# suitable for being pickled by the YamlCache.
+#
+# Each node is encoded as a (line, column, value) tuple, where value is
+# a dict for mappings, a list for sequences and a str (or None) for scalars.
+#
+# Provenance file indices are not encoded, they are provided again when
+# decoding the tree with _decode_tree().
+#
+# Args:
+#    tree (MappingNode): The toplevel node of a loaded file
+#
+# Returns:
+#    (tuple): The encoded tree
+#
+def _encode_tree(MappingNode tree):
+    return _encode_node(tree)
+
+
+# _decode_tree()
+#
+# Decode a tree previously encoded with _encode_tree()
+#
+# Args:
+#    encoded (tuple): The encoded tree
+#    file_index (int): The file index to record in the decoded nodes
+#
+# Returns:
+#    (MappingNode): The decoded toplevel node
+#
+def _decode_tree(tuple encoded, int file_index):
+    return <MappingNode> _decode_node(encoded, file_index)
+
+
+cdef tuple _encode_node(Node target):
+    cdef dict mapping
+    cdef list sequence
+    cdef str key
+    cdef Node child
+
+    if type(target) is MappingNode:
+        mapping = {}
+        for key, child in (<MappingNode> target).value.items():
+            mapping[key] = _encode_node(child)
+        return (target.line, target.column, mapping)
+    elif type(target) is SequenceNode:
+        sequence = []
+        for child in (<SequenceNode> target).value:
+            sequence.append(_encode_node(child))
+        return (target.line, target.column, sequence)
+    else:
+        return (target.line, target.column, (<ScalarNode> target).value)
+
+
+cdef Node _decode_node(tuple encoded, int file_index):
+    cdef int line = encoded[0]
+    cdef int column = encoded[1]
+    cdef object value = encoded[2]
+    cdef dict mapping
+    cdef list sequence
+    cdef str key
+    cdef tuple child
+
+    if type(value) is dict:
+        mapping = {}
+        for key, child in (<dict> value).items():
+            mapping[key] = _decode_node(child, file_index)
+        return MappingNode.__new__(MappingNode, file_index, line, column, mapping)
+    elif type(value) is list:
+        sequence = []
+        for child in (<list> value):
+            sequence.append(_decode_node(child, file_index))
+        return SequenceNode.__new__(SequenceNode, file_index, line, column, sequence)
+    else:
+        return ScalarNode.__new__(ScalarNode, file_index, line, column, value)
+
+
 ###############################################################################
 
 # Roundtrip code
@@ -0,0 +1,169 @@
+#
+#  Copyright (C) 2020 Codethink Limited
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library. If not, see <http://www.gnu.org/licenses/>.
+#
+
+import hashlib
+import os
+import pickle
+
+from . import utils
+
+
+# Bump this whenever the encoding produced by _yaml._encode_tree() changes
+#
+_YAML_CACHE_FORMAT = 2
+
+
+# YamlCache()
+#
+# A persistent cache of parsed YAML trees.
+#
+# Parsing YAML through the ruamel C parser and the Representer is
+# expensive, and every invocation of BuildStream loads every element,
+# project.conf and include file of the projects involved.
+#
+# The YamlCache stores the already parsed trees on disk, in the compact
+# encoding produced by `_yaml._encode_tree()`, such that unchanged files
+# never need to be parsed again.
+#
+# There is a single cache entry per loaded file, stored at a path derived
+# from the path of the file. Every entry records a key computed from the
+# contents of the file and the BuildStream version, and is overwritten
+# when the file is modified, such that the cache only grows with the
+# number of distinct files ever loaded.
+#
+# Provenance is not stored in the cache, the file index of the loaded
+# file is applied when the tree is decoded.
+#
+# Args:
+#    directory (str): The directory in which to store the cache entries
+#
+class YamlCache:
+    def __init__(self, directory):
+        self.hits = 0  # Number of files resolved from the cache
+        self.misses = 0  # Number of files which had to be parsed
+
+        self._directory = directory
+        self._salt = None
+        self._loaded_keys = set()  # The keys of all files looked up in this session
+
+    # get()
+    #
+    # Look up the encoded tree of a YAML file
+    #
+    # Args:
+    #    filename (str): The full path of the loaded file
+    #    contents (str): The contents of the loaded file
+    #
+    # Returns:
+    #    (object): The encoded tree, or None if it was not cached
+    #
+    def get(self, filename, contents):
+        key = self._entry_key(filename, contents)
+        path = self._entry_path(filename)
+        self._loaded_keys.add(key)
+        try:
+            with open(path, "rb") as f:
+                entry_key, encoded = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, EOFError, TypeError, ValueError, pickle.UnpicklingError):
+            # A corrupted entry is treated as a miss and overwritten
+            # once the file has been parsed again
+            self.misses += 1
+            return None
+
+        if entry_key != key:
+            # The file was modified, or cached by another version
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return encoded
+
+    # put()
+    #
+    # Store the encoded tree of a YAML file
+    #
+    # Args:
+    #    filename (str): The full path of the loaded file
+    #    contents (str): The contents of the loaded file
+    #    encoded (object): The encoded tree, as returned by `_yaml._encode_tree()`
+    #
+    def put(self, filename, contents, encoded):
+        path = self._entry_path(filename)
+        entry = (self._entry_key(filename, contents), encoded)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with utils.save_file_atomic(path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            # Failing to populate the cache is not an error, the
+            # file will just be parsed again next time.
+            pass
+
+    # digest()
+    #
+    # Compute a digest of the paths and contents of all files
+    # which were loaded through this cache in this session.
+    #
+    # Returns:
+    #    (str): A hex digest
+    #
+    def digest(self):
+        h = hashlib.sha256()
+        for key in sorted(self._loaded_keys):
+            h.update(key.encode("utf-8"))
+        return h.hexdigest()
+
+    # summary()
+    #
+    # Returns:
+    #    (str): A human readable summary of the cache hits and misses
+    #
+    def summary(self):
+        return "YAML cache: {} hits, {} misses".format(self.hits, self.misses)
+
+    ################################################
+    #               Private Methods                #
+    ################################################
+
+    # _entry_key()
+    #
+    # Compute the key of the cache entry for a given file
+    #
+    def _entry_key(self, filename, contents):
+        if self._salt is None:
+            # Import this only conditionally, it's not resolved at bash complete time
+            from . import __version__  # pylint: disable=cyclic-import
+
+            self._salt = "{}\0{}\0".format(__version__, _YAML_CACHE_FORMAT)
+
+        h = hashlib.sha256()
+        h.update(self._salt.encode("utf-8"))
+        h.update(os.path.abspath(filename).encode("utf-8"))
+        h.update(b"\0")
+        h.update(contents.encode("utf-8", errors="surrogateescape"))
+        return h.hexdigest()
+
+    # _entry_path()
+    #
+    # Compute the path of the cache entry for a given file
+    #
+    def _entry_path(self, filename):
+        name = hashlib.sha256(os.path.abspath(filename).encode("utf-8", errors="surrogateescape")).hexdigest()
+        return os.path.join(self._directory, name[:2], name[2:])
@@ -108,9 +108,11 @@ from ._elementproxy import ElementProxy
 from ._elementsources import ElementSources
 from ._loader import Symbol, DependencyType, MetaSource
 from ._overlapcollector import OverlapCollector
+from ._splitrules import SplitRules
 
 from .storage.directory import Directory
 from .storage._filebaseddirectory import FileBasedDirectory
+from .storage._casbaseddirectory import CasBasedDirectory
 from .storage.directory import VirtualDirectoryError
 
 if TYPE_CHECKING:
@@ -261,6 +263,7 @@ class Element(Plugin):
         # Internal instance properties
         #
         self._depth = None  # Depth of Element in its current dependency graph
+        self._priority = (0, 0)  # Scheduling priority of the Element, lower values are processed first
         self._overlap_collector = None  # type: Optional[OverlapCollector]
 
         #
@@ -292,7 +295,8 @@ class Element(Plugin):
         self.__assemble_done = False  # Element is assembled
         self.__pull_done = False  # Whether pull was attempted
         self.__cached_successfully = None  # If the Element is known to be successfully cached
-        self.__splits = None  # Resolved regex objects for computing split domains
+        self.__splits = None  # Resolved SplitRules for computing split domains
+        self.__split_domains = {}  # The split domains of files in the artifact, by relative path
         self.__whitelist_regex = None  # Resolved regex object to check if file is allowed to overlap
         self.__tainted = None  # Whether the artifact is tainted and should not be shared
         self.__required = False  # Whether the artifact is required in the current session
@@ -314,6 +318,7 @@ class Element(Plugin):
         self.__buildable_callback = None  # Callback to BuildQueue
 
         self.__resolved_initial_state = False  # Whether the initial state of the Element has been resolved
+        self.__snapshot_keys = None  # Cache keys recorded in a pipeline snapshot
 
         self.__environment: Dict[str, str] = {}
         self.__variables: Optional[Variables] = None
@@ -1197,6 +1202,17 @@ class Element(Plugin):
             self.__cached_remotely = self.__artifacts.check_remotes_for_element(self)
         return self.__cached_remotely
 
+    # _set_cached_remotely():
+    #
+    # Set whether this element is present in a remote cache, this
+    # is used when the remotes are queried for many elements at once.
+    #
+    # Args:
+    #    cached (bool): Whether this element is present in a remote cache
+    #
+    def _set_cached_remotely(self, cached):
+        self.__cached_remotely = cached
+
     # _get_build_result():
     #
     # Returns:
@@ -1366,6 +1382,36 @@ class Element(Plugin):
         # updated).
         self.__update_cache_keys()
 
+    # _set_snapshot_keys()
+    #
+    # Provide the cache keys recorded for this element in a pipeline
+    # snapshot, this has no effect if the element's cache keys have
+    # already been calculated.
+    #
+    # The recorded keys are only used if the element's source key and
+    # the strict keys of its build dependencies are the same as they
+    # were when the snapshot entry was recorded.
+    #
+    # Args:
+    #    snapshot_keys (tuple): An entry as returned by _get_snapshot_keys(), or None
+    #
+    def _set_snapshot_keys(self, snapshot_keys):
+        self.__snapshot_keys = snapshot_keys
+
+    # _get_snapshot_keys()
+    #
+    # Get the cache keys of this element to record in a pipeline snapshot
+    #
+    # Returns:
+    #    (tuple): An opaque snapshot entry, or None if the cache keys are not yet known
+    #
+    def _get_snapshot_keys(self):
+        if self.__strict_cache_key is None:
+            return None
+
+        dependencies = [[e.project_name, e.name, e.__strict_cache_key] for e in self._dependencies(_Scope.BUILD)]
+        return (self.__sources.get_cache_key(), dependencies, self.__strict_cache_key, self.__weak_cache_key)
+
     # _get_display_key():
     #
     # Returns cache keys for display purposes
@@ -2359,6 +2405,20 @@ class Element(Plugin):
     def _set_depth(self, depth):
         self._depth = depth
 
+    # _set_priority()
+    #
+    # Set the scheduling priority of the Element.
+    #
+    # Among the Elements which are ready to be processed in a queue, those
+    # with the lowest priority are processed first, followed by those with
+    # the lowest depth.
+    #
+    # Args:
+    #    priority (tuple): The priority
+    #
+    def _set_priority(self, priority):
+        self._priority = priority
+
     # _update_ready_for_runtime_and_cached()
     #
     # An Element becomes ready for runtime and cached once the following criteria
@@ -2410,6 +2470,31 @@ class Element(Plugin):
     def _walk_artifact_files(self):
         yield from self.__artifact.get_files().walk()
 
+    # _get_split_files()
+    #
+    # Get the files of the element's artifact which are selected
+    # by the given split domains, as in compute_manifest().
+    #
+    # Args:
+    #    include (list): An optional list of domains to include files from
+    #    exclude (list): An optional list of domains to exclude files from
+    #    orphans (bool): Whether to include files not spoken for by split domains
+    #
+    # Returns:
+    #    (CasBasedDirectory): A directory with the selected files
+    #
+    def _get_split_files(self, include=None, exclude=None, orphans=True):
+        self.__assert_cached()
+
+        files_vdir = self.__artifact.get_files()
+        split_filter = self.__split_filter_func(include, exclude, orphans)
+        if not split_filter:
+            return files_vdir
+
+        split_vdir = CasBasedDirectory(self._get_context().get_cascache())
+        split_vdir.import_files(files_vdir, filter_callback=split_filter, report_written=False, can_link=True)
+        return split_vdir
+
     # _get_artifact()
     #
     # Return the Element's Artifact object
@@ -2900,7 +2985,7 @@ class Element(Plugin):
             if plugin_conf is not None:
                 # Load the plugin's accompanying .yaml file if one was provided
                 try:
-                    defaults = _yaml.load(plugin_conf, os.path.basename(plugin_conf))
+                    defaults = _yaml.load(plugin_conf, os.path.basename(plugin_conf), cache=project._context.yamlcache)
                 except LoadError as e:
                     if e.reason != LoadErrorReason.MISSING_FILE:
                         raise e
@@ -3058,10 +3143,7 @@ class Element(Plugin):
     def __init_splits(self):
         bstdata = self.get_public_data("bst")
         splits = bstdata.get_mapping("split-rules")
-        self.__splits = {
-            domain: re.compile("^(?:" + "|".join([utils._glob2re(r) for r in rules.as_str_list()]) + ")$")
-            for domain, rules in splits.items()
-        }
+        self.__splits = SplitRules({domain: rules.as_str_list() for domain, rules in splits.items()})
 
     # __split_filter():
     #
@@ -3069,36 +3151,29 @@ class Element(Plugin):
     # specified split domains. This is used by `__split_filter_func()` to create
     # a filter callback.
     #
+    # The split domains of each file are remembered, such that files are only
+    # matched against the split rules once, no matter how many times the artifact
+    # is staged or its manifest computed.
+    #
     # Args:
-    #    element_domains (list): All domains for this element
-    #    include (list): A list of domains to include files from
-    #    exclude (list): A list of domains to exclude files from
+    #    include (frozenset): A set of domains to include files from
+    #    exclude (frozenset): A set of domains to exclude files from
     #    orphans (bool): Whether to include files not spoken for by split domains
     #    path (str): The relative path of the file
     #
     # Returns:
     #    (bool): Whether to include the specified file
     #
-    def __split_filter(self, element_domains, include, exclude, orphans, path):
-        # Absolute path is required for matching
-        filename = os.path.join(os.sep, path)
+    def __split_filter(self, include, exclude, orphans, path):
+        domains = self.__split_domains.get(path)
+        if domains is None:
+            domains = self.__splits.match(path)
+            self.__split_domains[path] = domains
 
-        include_file = False
-        exclude_file = False
-        claimed_file = False
+        if not domains:
+            return orphans
 
-        for domain in element_domains:
-            if self.__splits[domain].match(filename):
-                claimed_file = True
-                if domain in include:
-                    include_file = True
-                if domain in exclude:
-                    exclude_file = True
-
-        if orphans and not claimed_file:
-            include_file = True
-
-        return include_file and not exclude_file
+        return not domains.isdisjoint(include) and domains.isdisjoint(exclude)
 
     # __split_filter_func():
     #
@@ -3122,7 +3197,7 @@ class Element(Plugin):
         if not self.__splits:
             self.__init_splits()
 
-        element_domains = list(self.__splits.keys())
+        element_domains = self.__splits.domains
         if not include:
             include = element_domains
         if not exclude:
@@ -3130,13 +3205,13 @@ class Element(Plugin):
 
         # Ignore domains that dont apply to this element
         #
-        include = [domain for domain in include if domain in element_domains]
-        exclude = [domain for domain in exclude if domain in element_domains]
+        include = frozenset(domain for domain in include if domain in element_domains)
+        exclude = frozenset(domain for domain in exclude if domain in element_domains)
 
-        # The arguments element_domains, include, exclude, and orphans are
-        # the same for all files. Use `partial` to create a function with
-        # the required callback signature: a single `path` parameter.
-        return partial(self.__split_filter, element_domains, include, exclude, orphans)
+        # The arguments include, exclude, and orphans are the same for
+        # all files. Use `partial` to create a function with the required
+        # callback signature: a single `path` parameter.
+        return partial(self.__split_filter, include, exclude, orphans)
 
     def __compute_splits(self, include=None, exclude=None, orphans=True):
         filter_func = self.__split_filter_func(include=include, exclude=exclude, orphans=orphans)
@@ -3209,32 +3284,41 @@ class Element(Plugin):
 
         # Calculate the strict cache key
         dependencies = [[e.project_name, e.name, e.__strict_cache_key] for e in self._dependencies(_Scope.BUILD)]
-        self.__strict_cache_key = self._calculate_cache_key(dependencies)
 
-        if self.__strict_cache_key is None:
-            # Cache keys cannot be calculated yet as a build dependency doesn't
-            # have a cache key yet.
-            return
+        snapshot_keys = self.__snapshot_keys
+        self.__snapshot_keys = None
 
-        # Calculate weak cache key
-        #
-        # Weak cache key includes names of direct build dependencies
-        # so as to only trigger rebuilds when the shape of the
-        # dependencies change.
-        #
-        # Some conditions cause dependencies to be strict, such
-        # that this element will be rebuilt anyway if the dependency
-        # changes even in non strict mode, for these cases we just
-        # encode the dependency's weak cache key instead of it's name.
-        #
-        dependencies = [
-            [e.project_name, e.name, e._get_cache_key(strength=_KeyStrength.WEAK)]
-            if self.BST_STRICT_REBUILD or e in self.__strict_dependencies
-            else [e.project_name, e.name]
-            for e in self._dependencies(_Scope.BUILD)
-        ]
+        if snapshot_keys is not None and snapshot_keys[:2] == (self.__sources.get_cache_key(), dependencies):
+            # The keys recorded in the pipeline snapshot were calculated from
+            # the same inputs, no need to calculate them again.
+            _, _, self.__strict_cache_key, self.__weak_cache_key = snapshot_keys
+        else:
+            self.__strict_cache_key = self._calculate_cache_key(dependencies)
+
+            if self.__strict_cache_key is None:
+                # Cache keys cannot be calculated yet as a build dependency doesn't
+                # have a cache key yet.
+                return
 
-        self.__weak_cache_key = self._calculate_cache_key(dependencies)
+            # Calculate weak cache key
+            #
+            # Weak cache key includes names of direct build dependencies
+            # so as to only trigger rebuilds when the shape of the
+            # dependencies change.
+            #
+            # Some conditions cause dependencies to be strict, such
+            # that this element will be rebuilt anyway if the dependency
+            # changes even in non strict mode, for these cases we just
+            # encode the dependency's weak cache key instead of it's name.
+            #
+            dependencies = [
+                [e.project_name, e.name, e._get_cache_key(strength=_KeyStrength.WEAK)]
+                if self.BST_STRICT_REBUILD or e in self.__strict_dependencies
+                else [e.project_name, e.name]
+                for e in self._dependencies(_Scope.BUILD)
+            ]
+
+            self.__weak_cache_key = self._calculate_cache_key(dependencies)
 
         # As the strict cache key has already been calculated, it should always
         # be possible to calculate the weak cache key as well.
@@ -33,8 +33,19 @@ The default configuration and possible options are as such:
      :language: yaml
 """
 
+import hashlib
 import os
-from buildstream import Element
+import pickle
+
+from buildstream import Element, utils
+from buildstream.storage._casbaseddirectory import CasBasedDirectory
+from buildstream.storage.directory import _DiffType
+from buildstream._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
+
+
+# The number of compose elements for which the selections of
+# the last incremental composition are recorded
+_MAX_RECORDED_SPLITS = 64
 
 
 # Element implementation for the 'compose' kind.
@@ -58,7 +69,7 @@ class ComposeElement(Element):
     BST_FORBID_SOURCES = True
 
     def configure(self, node):
-        node.validate_keys(["integrate", "include", "exclude", "include-orphans"])
+        node.validate_keys(["integrate", "include", "exclude", "include-orphans", "incremental"])
 
         # We name this variable 'integration' only to avoid
         # collision with the Element.integrate() method.
@@ -67,6 +78,10 @@ class ComposeElement(Element):
         self.exclude = node.get_str_list("exclude")
         self.include_orphans = node.get_bool("include-orphans")
 
+        # Incremental composition produces the same output, it
+        # does not contribute to the cache key.
+        self.incremental = node.get_bool("incremental")
+
     def preflight(self):
         pass
 
@@ -91,6 +106,9 @@ class ComposeElement(Element):
         manifest = set()
 
         require_split = self.include or self.exclude or not self.include_orphans
+        if require_split and self.incremental:
+            return self._assemble_incremental(sandbox)
+
         if require_split:
             with self.timed_activity("Computing split", silent_nested=True):
                 for dep in self.dependencies():
@@ -99,7 +117,6 @@ class ComposeElement(Element):
                     )
                     manifest.update(files)
 
-        # Make a snapshot of all the files.
         vbasedir = sandbox.get_virtual_directory()
         modified_files = set()
         removed_files = set()
@@ -111,9 +128,8 @@ class ComposeElement(Element):
             with self.timed_activity("Integrating sandbox"):
                 if require_split:
 
-                    # Make a snapshot of all the files before integration-commands are run.
-                    snapshot = set(vbasedir.list_relative_paths())
-                    vbasedir.mark_unmodified()
+                    # Keep the tree as it was before integration-commands are run.
+                    original = CasBasedDirectory(vbasedir.cas_cache, digest=vbasedir._get_digest())
 
                 with sandbox.batch(0):
                     for dep in self.dependencies():
@@ -121,16 +137,14 @@ class ComposeElement(Element):
 
                 if require_split:
                     # Calculate added, modified and removed files
-                    post_integration_snapshot = vbasedir.list_relative_paths()
-                    modified_files = set(vbasedir.list_modified_paths())
-                    basedir_contents = set(post_integration_snapshot)
-                    for path in manifest:
-                        if path in snapshot and path not in basedir_contents:
+                    for path, change in original._diff(vbasedir):
+                        if change == _DiffType.ADDED:
+                            added_files.add(path)
+                        elif change == _DiffType.MODIFIED:
+                            modified_files.add(path)
+                        elif path in manifest:
                             removed_files.add(path)
 
-                    for path in basedir_contents:
-                        if path not in snapshot:
-                            added_files.add(path)
                     self.info(
                         "Integration modified {}, added {} and removed {} files".format(
                             len(modified_files), len(added_files), len(removed_files)
@@ -158,6 +172,88 @@ class ComposeElement(Element):
         # now collect the rest of the manifest.
         #
 
+        def import_filter(path):
+            return path in manifest
+
+        with self.timed_activity("Creating composition", detail=self._composition_detail(), silent_nested=True):
+            self.info("Composing {} files".format(len(manifest)))
+            installdir.import_files(vbasedir, filter_callback=import_filter, can_link=True)
+
+        # And we're done
+        return os.path.join(os.sep, "buildstream", "install")
+
+    # _assemble_incremental()
+    #
+    # Assemble the composition without listing the files of the sandbox.
+    #
+    # The files selected by the split rules are collected per dependency
+    # into a selection tree, reusing the selections of the last successful
+    # composition for the dependencies which did not change since. The
+    # staged files are then imported in the composition if their paths
+    # are in the selection, or if they were added by the integration
+    # commands, comparing the trees by digest so that only the parts
+    # which differ are walked.
+    #
+    # This produces the same composition as the regular assembly.
+    #
+    def _assemble_incremental(self, sandbox):
+        cascache = self._get_context().get_cascache()
+        vbasedir = sandbox.get_virtual_directory()
+
+        last_splits = self._load_splits()
+        splits = {}
+        reused = 0
+
+        selection = CasBasedDirectory(cascache)
+        with self.timed_activity("Computing split", silent_nested=True):
+            for dep in self.dependencies():
+                name = dep._get_full_name()
+                key = self._split_key(dep)
+
+                split_files = None
+                if name in last_splits and last_splits[name][0] == key:
+                    digest = remote_execution_pb2.Digest(hash=last_splits[name][1], size_bytes=last_splits[name][2])
+                    if cascache.contains_directory(digest, with_files=False):
+                        split_files = CasBasedDirectory(cascache, digest=digest)
+                        reused += 1
+
+                if split_files is None:
+                    split_files = dep._get_split_files(
+                        include=self.include, exclude=self.exclude, orphans=self.include_orphans
+                    )
+
+                digest = split_files._get_digest()
+                splits[name] = (key, digest.hash, digest.size_bytes)
+                selection._add_paths(split_files)
+
+        self.info("Reused the split of {} out of {} dependencies".format(reused, len(splits)))
+
+        # Run any integration commands provided by the dependencies
+        # once they are all staged and ready
+        original = None
+        if self.integration:
+            with self.timed_activity("Integrating sandbox"):
+                original = CasBasedDirectory(cascache, digest=vbasedir._get_digest())
+                with sandbox.batch(0):
+                    for dep in self.dependencies():
+                        dep.integrate(sandbox)
+
+        with self.timed_activity("Creating composition", detail=self._composition_detail(), silent_nested=True):
+            composition = CasBasedDirectory(cascache)
+            composition._import_selected(vbasedir, selection, original=original)
+
+            installdir = vbasedir.descend("buildstream", "install", create=True)
+            installdir.import_files(composition, report_written=False, can_link=True)
+
+        self._save_splits(splits)
+
+        return os.path.join(os.sep, "buildstream", "install")
+
+    # _composition_detail()
+    #
+    # Describe the selection of files in the composition
+    #
+    def _composition_detail(self):
         lines = []
         if self.include:
             lines.append("Including files from domains: " + ", ".join(self.include))
@@ -172,17 +268,77 @@ class ComposeElement(Element):
         else:
             lines.append("Excluding orphaned files")
 
-        detail = "\n".join(lines)
+        return "\n".join(lines)
 
-        def import_filter(path):
-            return path in manifest
-
-        with self.timed_activity("Creating composition", detail=detail, silent_nested=True):
-            self.info("Composing {} files".format(len(manifest)))
-            installdir.import_files(vbasedir, filter_callback=import_filter, can_link=True)
-
-        # And we're done
-        return os.path.join(os.sep, "buildstream", "install")
+    # _split_key()
+    #
+    # The key identifying the selection of files of a dependency, which
+    # depends on the dependency's artifact and the selected domains.
+    #
+    def _split_key(self, dep):
+        return "{}/{}/{}/{}".format(
+            dep.get_artifact_name(),
+            ",".join(sorted(self.include)),
+            ",".join(sorted(self.exclude)),
+            self.include_orphans,
+        )
+
+    # _splits_path()
+    #
+    # The file in which the selections of the last successful
+    # composition of this element are recorded.
+    #
+    def _splits_path(self):
+        context = self._get_context()
+        name = hashlib.sha256(self._get_full_name().encode("utf-8")).hexdigest()
+        return os.path.join(context.cachedir, "compose", name)
+
+    def _load_splits(self):
+        try:
+            with open(self._splits_path(), "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return {}
+
+    def _save_splits(self, splits):
+        path = self._splits_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with utils.save_file_atomic(path, "wb") as f:
+                pickle.dump(splits, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            # Failing to record the selections is not an error, they
+            # will just be computed again next time.
+            return
+
+        self._prune_splits(os.path.dirname(path))
+
+    # _prune_splits()
+    #
+    # Only keep the selections recorded for the _MAX_RECORDED_SPLITS
+    # most recently composed elements.
+    #
+    def _prune_splits(self, directory):
+        records = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # Skip the temporary files of concurrent compositions
+                    if entry.name.startswith("tmp"):
+                        continue
+                    try:
+                        records.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        pass
+        except OSError:
+            return
+
+        records.sort(reverse=True)
+        for _, path in records[_MAX_RECORDED_SPLITS:]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
 
 
 # Plugin entry point
@@ -66,10 +66,16 @@ class LocalSource(Source):
         #
         # As a core plugin, we use some private API to optimize file hashing.
         #
-        # * Use Source._cache_directory() to prepare a Directory
-        # * Do the regular staging activity into the Directory
+        # * Use Source._import_local_directory() to only hash the files
+        #   which changed since the directory was last imported
+        # * Otherwise use Source._cache_directory() to prepare a Directory
+        #   and do the regular staging activity into the Directory
         # * Use the hash of the cached digest as the unique key
         #
+        if not self.__digest and os.path.isdir(self.fullpath) and not os.path.islink(self.fullpath):
+            with self.timed_activity("Staging local files into CAS"):
+                self.__digest = self._import_local_directory(self.fullpath)
+
         if not self.__digest:
             with self._cache_directory() as directory:
                 self.__do_stage(directory)
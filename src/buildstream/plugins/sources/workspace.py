@@ -70,10 +70,17 @@ class WorkspaceSource(Source):
         #
         # As a core plugin, we use some private API to optimize file hashing.
         #
-        # * Use Source._cache_directory() to prepare a Directory
-        # * Do the regular staging activity into the Directory
+        # * Use Source._import_local_directory() to only hash the files
+        #   which changed since the workspace was last imported, asking
+        #   `bst workspace watch` which directories changed if it runs
+        # * Otherwise use Source._cache_directory() to prepare a Directory
+        #   and do the regular staging activity into the Directory
         # * Use the hash of the cached digest as the unique key
         #
+        if not self.__digest and os.path.isdir(self.path):
+            with self.timed_activity("Staging local files"):
+                self.__digest = self._import_local_directory(self.path, properties=["mtime"], watched=True)
+
         if not self.__digest:
             with self._cache_directory() as directory:
                 self.__do_stage(directory)
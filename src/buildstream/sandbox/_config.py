@@ -37,6 +37,7 @@ if TYPE_CHECKING:
 #    build_arch: A canonical machine architecture name, as defined by Platform.canonicalize_arch()
 #    build_uid: The UID for the sandbox process
 #    build_gid: The GID for the sandbox process
+#    action_cache: Whether results of commands may be reused from the local action cache
 #
 # If the build_uid or build_gid is unspecified, then the underlying sandbox implementation
 # does not guarantee what UID/GID will be used, but generally UID/GID 0 will be used in a
@@ -46,14 +47,24 @@ if TYPE_CHECKING:
 # the specified UID/GID, if the underlying sandbox implementation does not support UID/GID
 # control, then an error will be raised when attempting to configure the sandbox.
 #
+# The action_cache setting does not affect the output of the sandbox, it is not
+# part of the dictionary representation and does not affect the cache key.
+#
 class SandboxConfig:
     def __init__(
-        self, *, build_os: str, build_arch: str, build_uid: Optional[int] = None, build_gid: Optional[int] = None
+        self,
+        *,
+        build_os: str,
+        build_arch: str,
+        build_uid: Optional[int] = None,
+        build_gid: Optional[int] = None,
+        action_cache: bool = True
     ):
         self.build_os = build_os
         self.build_arch = build_arch
         self.build_uid = build_uid
         self.build_gid = build_gid
+        self.action_cache = action_cache
 
     # to_dict():
     #
@@ -111,7 +122,7 @@ class SandboxConfig:
     #
     @classmethod
     def new_from_node(cls, config: "MappingNode[Node]", *, platform: Optional[Platform] = None) -> "SandboxConfig":
-        config.validate_keys(["build-uid", "build-gid", "build-os", "build-arch"])
+        config.validate_keys(["build-uid", "build-gid", "build-os", "build-arch", "action-cache"])
 
         build_os: str
         build_arch: str
@@ -134,5 +145,12 @@ class SandboxConfig:
 
         build_uid = config.get_int("build-uid", None)
         build_gid = config.get_int("build-gid", None)
+        action_cache = config.get_bool("action-cache", True)
 
-        return cls(build_os=build_os, build_arch=build_arch, build_uid=build_uid, build_gid=build_gid)
+        return cls(
+            build_os=build_os,
+            build_arch=build_arch,
+            build_uid=build_uid,
+            build_gid=build_gid,
+            action_cache=action_cache,
+        )
@@ -0,0 +1,208 @@
+#
+#  Copyright (C) 2020 Bloomberg Finance LP
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public
+#  License as published by the Free Software Foundation; either
+#  version 2 of the License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+import grpc
+
+from .._exceptions import SandboxError
+from .._protos.build.bazel.remote.execution.v2 import remote_execution_pb2, remote_execution_pb2_grpc
+from .._protos.google.longrunning import operations_pb2
+
+if TYPE_CHECKING:
+    from .._remotespec import RemoteSpec
+
+
+# OperationMultiplexer()
+#
+# Tracks remote execution operations of all the sandboxes of a session
+# from a single thread, running an asyncio event loop.
+#
+# Execute and WaitExecution streams are handled by the event loop, such
+# that waiting for an operation to complete does not hold a thread for
+# the duration of the remote build.
+#
+class OperationMultiplexer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None  # type: Optional[asyncio.AbstractEventLoop]
+        self._thread = None  # type: Optional[threading.Thread]
+
+        # Channels to the execution services, keyed by URL,
+        # only accessed from the event loop
+        self._channels = {}  # type: Dict[str, grpc.aio.Channel]
+
+    # execute()
+    #
+    # Request the execution of an action, and track the operation
+    # until it is done.
+    #
+    # Args:
+    #    exec_spec (RemoteSpec): The spec of the execution service
+    #    action_digest (Digest): The digest of the action to execute
+    #    name_cb (callable): A function called with the name of the
+    #                        operation once it is known, from the
+    #                        thread of the multiplexer
+    #
+    # Returns:
+    #    (Future): A future for the done Operation, or None if the
+    #              execution service stopped reporting the operation
+    #
+    def execute(
+        self,
+        exec_spec: "RemoteSpec",
+        action_digest: remote_execution_pb2.Digest,
+        name_cb: Callable[[str], None],
+    ) -> Future:
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self._execute(exec_spec, action_digest, name_cb), loop)
+
+    # release_resources()
+    #
+    # Close the channels and stop the thread of the multiplexer.
+    #
+    def release_resources(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        if loop is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(self._close_channels(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    #######################################################
+    #                  Local Private Methods              #
+    #######################################################
+
+    # _ensure_started()
+    #
+    # Start the thread of the multiplexer, if not already started.
+    #
+    # Returns:
+    #    (AbstractEventLoop): The event loop of the multiplexer
+    #
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._loop,), name="OperationMultiplexer", daemon=True
+                )
+                self._thread.start()
+
+            return self._loop
+
+    def _run(self, loop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    # _get_channel()
+    #
+    # Get a channel to an execution service, opening it if needed.
+    #
+    # Args:
+    #    exec_spec (RemoteSpec): The spec of the execution service
+    #
+    # Returns:
+    #    (grpc.aio.Channel): The channel
+    #
+    def _get_channel(self, exec_spec):
+        channel = self._channels.get(exec_spec.url)
+        if channel is None:
+            channel = exec_spec.open_channel(aio=True)
+            self._channels[exec_spec.url] = channel
+
+        return channel
+
+    async def _close_channels(self):
+        channels = list(self._channels.values())
+        self._channels = {}
+        for channel in channels:
+            await channel.close()
+
+    # _execute()
+    #
+    # Execute an action, reattaching to the operation with WaitExecution
+    # when the stream of updates ends before the operation is done.
+    #
+    async def _execute(self, exec_spec, action_digest, name_cb):
+        stub = remote_execution_pb2_grpc.ExecutionStub(self._get_channel(exec_spec))
+        request = remote_execution_pb2.ExecuteRequest(
+            instance_name=exec_spec.instance_name, action_digest=action_digest, skip_cache_lookup=False
+        )
+
+        operation = await self._wait_operation(exec_spec, stub.Execute(request), name_cb)
+        while operation is not None and not operation.done:
+            request = remote_execution_pb2.WaitExecutionRequest(name=operation.name)
+            operation = await self._wait_operation(exec_spec, stub.WaitExecution(request), None, reattach=True)
+
+        return operation
+
+    # _wait_operation()
+    #
+    # Read the updates of an operation from a stream.
+    #
+    # Args:
+    #    exec_spec (RemoteSpec): The spec of the execution service
+    #    call: The Execute or WaitExecution streaming call
+    #    name_cb (callable): A function to call with the name of the operation, or None
+    #    reattach (bool): Whether the call is reattaching to a running operation
+    #
+    # Returns:
+    #    (Operation): The done operation, or the last update of the operation
+    #                 if the stream ended before it was done, or None
+    #
+    async def _wait_operation(self, exec_spec, call, name_cb, *, reattach=False):
+        last_operation = None  # type: Optional[operations_pb2.Operation]
+        try:
+            async for operation in call:
+                if name_cb is not None:
+                    name_cb(operation.name)
+                    name_cb = None
+                if operation.done:
+                    return operation
+                last_operation = operation
+
+        except grpc.RpcError as e:
+            status_code = e.code()
+
+            if status_code in (
+                grpc.StatusCode.INVALID_ARGUMENT,
+                grpc.StatusCode.FAILED_PRECONDITION,
+                grpc.StatusCode.RESOURCE_EXHAUSTED,
+                grpc.StatusCode.INTERNAL,
+                grpc.StatusCode.DEADLINE_EXCEEDED,
+                grpc.StatusCode.UNAVAILABLE,
+            ):
+                raise SandboxError(
+                    "Failed contacting remote execution server at {}."
+                    "{}: {}".format(exec_spec.url, status_code.name, e.details())
+                )
+
+            if reattach and status_code == grpc.StatusCode.UNIMPLEMENTED:
+                raise SandboxError(
+                    "Failed trying to recover from connection loss: "
+                    "server does not support operation status polling recovery."
+                )
+
+        return last_operation
@@ -18,7 +18,8 @@ import os
 import signal
 import subprocess
 import sys
-from contextlib import ExitStack
+import threading
+from contextlib import ExitStack, contextmanager
 
 import psutil
 
@@ -27,7 +28,11 @@ from . import SandboxFlags
 from .._exceptions import SandboxError
 from .._platform import Platform
 from .._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
-from ._sandboxreapi import SandboxREAPI
+from ._sandboxreapi import SandboxREAPI, _STDOUT_FILENO, _STDERR_FILENO
+
+
+# Size of the reads of the output of buildbox-run
+_TEE_CHUNK_SIZE = 64 * 1024
 
 
 # SandboxBuildBoxRun()
@@ -133,12 +138,68 @@ class SandboxBuildBoxRun(SandboxREAPI):
             else:
                 stdin = subprocess.DEVNULL
 
+            # The output of commands whose results are cached in the local
+            # action cache is also stored, such that it can be replayed on
+            # cache hits
+            if "no-logs-capture" in self._capabilities and self._use_action_cache(flags):
+                with ExitStack() as stack:
+                    stdout_pipe, stdout_chunks = stack.enter_context(self._tee_output(stdout, _STDOUT_FILENO))
+                    stderr_pipe, stderr_chunks = stack.enter_context(self._tee_output(stderr, _STDERR_FILENO))
+                    self._run_buildbox(buildbox_command, stdin, stdout_pipe, stderr_pipe, interactive=False)
+
+                action_result = remote_execution_pb2.ActionResult().FromString(result_file.read())
+                if stdout_chunks:
+                    action_result.stdout_digest.CopyFrom(cascache.add_object(buffer=b"".join(stdout_chunks)))
+                if stderr_chunks:
+                    action_result.stderr_digest.CopyFrom(cascache.add_object(buffer=b"".join(stderr_chunks)))
+                return action_result
+
             self._run_buildbox(
                 buildbox_command, stdin, stdout, stderr, interactive=(flags & SandboxFlags.INTERACTIVE),
             )
 
             return remote_execution_pb2.ActionResult().FromString(result_file.read())
 
+    # _tee_output()
+    #
+    # A context manager providing a pipe for the output of buildbox-run,
+    # which is written to a stream as it is received, and also kept.
+    #
+    # Args:
+    #    stream (file): The stream to write the output to, or None
+    #    inherited_fd (int): The file descriptor to write the output to
+    #                        if there is no stream
+    #
+    # Yields:
+    #    (int): The write end of the pipe
+    #    (list): The chunks of output, complete once the context exits
+    #
+    @contextmanager
+    def _tee_output(self, stream, inherited_fd):
+        if stream:
+            stream.flush()
+            output_fd = stream.fileno()
+        else:
+            output_fd = inherited_fd
+
+        read_fd, write_fd = os.pipe()
+        chunks = []
+
+        def copy_output():
+            with open(read_fd, "rb", buffering=0) as pipe, open(output_fd, "wb", closefd=False) as output:
+                for chunk in iter(lambda: pipe.read(_TEE_CHUNK_SIZE), b""):
+                    chunks.append(chunk)
+                    output.write(chunk)
+                    output.flush()
+
+        thread = threading.Thread(target=copy_output, name="buildbox-run output", daemon=True)
+        thread.start()
+        try:
+            yield write_fd, chunks
+        finally:
+            os.close(write_fd)
+            thread.join()
+
     def _run_buildbox(self, argv, stdin, stdout, stderr, *, interactive):
         def kill_proc():
             if process:
@@ -23,6 +23,11 @@ from .._exceptions import ImplError, SandboxError
 from .._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
 
 
+# The file descriptors commands inherit when the sandbox has no streams
+_STDOUT_FILENO = 1
+_STDERR_FILENO = 2
+
+
 # SandboxREAPI()
 #
 # Abstract class providing a skeleton for sandbox implementations based on
@@ -99,7 +104,22 @@ class SandboxREAPI(Sandbox):
         command_digest = cascache.add_object(buffer=command_proto.SerializeToString())
         action = remote_execution_pb2.Action(command_digest=command_digest, input_root_digest=input_root_digest)
 
-        action_result = self._execute_action(action, flags)  # pylint: disable=assignment-from-no-return
+        # Reuse the result of an identical action executed earlier, if any
+        action_digest = None
+        action_result = None
+        if self._use_action_cache(flags):
+            action_digest = cascache.add_object(buffer=action.SerializeToString())
+            action_result = cascache.get_action_result(action_digest)
+
+        if action_result is not None:
+            context.messenger.info("Action result found in local action cache", element_name=self._get_element_name())
+            self._forward_logs(action_result)
+        else:
+            action_result = self._execute_action(action, flags)  # pylint: disable=assignment-from-no-return
+
+            # Only successful results are cached, failed commands are run again
+            if action_digest is not None and action_result.exit_code == 0:
+                cascache.set_action_result(action_digest, action_result)
 
         # Get output of build
         self._process_job_output(
@@ -196,6 +216,59 @@ class SandboxREAPI(Sandbox):
     def _create_batch(self, main_group, flags, *, collect=None):
         return _SandboxREAPIBatch(self, main_group, flags, collect=collect)
 
+    # _use_action_cache()
+    #
+    # Whether the local action cache may be used for a command.
+    #
+    # Commands which are interactive, have network access or have host
+    # files mounted depend on more than their inputs, their results are
+    # never cached. Elements can also opt out with the `action-cache`
+    # sandbox configuration.
+    #
+    # Args:
+    #    flags (SandboxFlags): The flags of the command
+    #
+    # Returns:
+    #    (bool): Whether to use the local action cache
+    #
+    def _use_action_cache(self, flags):
+        if flags & (SandboxFlags.INTERACTIVE | SandboxFlags.NETWORK_ENABLED):
+            return False
+        if self._get_mount_sources():
+            return False
+        return self._get_config().action_cache
+
+    # _forward_logs()
+    #
+    # Write the output of a command captured in its action result
+    # where the output of the command would have been written.
+    #
+    # Args:
+    #    action_result (ActionResult): The result of the command
+    #
+    def _forward_logs(self, action_result):
+        cascache = self._get_context().get_cascache()
+        stdout, stderr = self._get_output()
+
+        for digest, raw, stream, inherited_fd in (
+            (action_result.stdout_digest, action_result.stdout_raw, stdout, _STDOUT_FILENO),
+            (action_result.stderr_digest, action_result.stderr_raw, stderr, _STDERR_FILENO),
+        ):
+            if digest.hash:
+                with cascache.open(digest, "rb") as f:
+                    output = f.read()
+            else:
+                output = raw
+
+            if not output:
+                continue
+
+            if stream:
+                stream.write(str(output, "utf-8", errors="ignore"))
+            else:
+                with open(inherited_fd, "wb", closefd=False) as f:
+                    f.write(output)
+
     def _execute_action(self, action, flags):
         raise ImplError("Sandbox of type '{}' does not implement _execute_action()".format(type(self).__name__))
 
@@ -207,7 +280,20 @@ class SandboxREAPI(Sandbox):
 #
 # Command batching by shell script generation.
 #
+# All the commands of the batch are run in a single action. Commands
+# which fail make the script exit with a status identifying the command,
+# such that the failure can be attributed to it. Failures of the script
+# itself, such as failing to change the working directory, make it exit
+# with the status 1.
+#
 class _SandboxREAPIBatch(_SandboxBatch):
+
+    # The exit status of the first command in the script, if it fails
+    FIRST_COMMAND_STATUS = 2
+
+    # The highest exit status of the script
+    MAX_STATUS = 255
+
     def __init__(self, sandbox, main_group, flags, *, collect=None):
         super().__init__(sandbox, main_group, flags, collect=collect)
 
@@ -215,6 +301,7 @@ class _SandboxREAPIBatch(_SandboxBatch):
         self.first_command = None
         self.cwd = None
         self.env = None
+        self.commands = []
 
     def execute(self):
         self.script = ""
@@ -229,10 +316,21 @@ class _SandboxREAPIBatch(_SandboxBatch):
                 detail=self.main_group.combined_label(),
                 element_name=self.sandbox._get_element_name(),
             ):
-                if self.sandbox.run(["sh", "-c", "-e", self.script], self.flags, cwd=first.cwd, env=first.env) != 0:
-                    raise SandboxCommandError("Command failed", collect=self.collect)
+                exitcode = self.sandbox.run(["sh", "-c", "-e", self.script], self.flags, cwd=first.cwd, env=first.env)
+                if exitcode != 0:
+                    command = self._failed_command(exitcode)
+                    if command is None:
+                        raise SandboxCommandError("Command failed", collect=self.collect)
+
+                    cmdline = " ".join(shlex.quote(cmd) for cmd in command.command)
+                    label = command.label or cmdline
+                    raise SandboxCommandError("Command failed", detail=label, collect=self.collect)
 
     def execute_group(self, group):
+        # Preserve the labels of groups in the log
+        if group.label:
+            self.script += "echo {} >&2\n".format(shlex.quote(group.label))
+
         group.execute_children(self)
 
     def execute_command(self, command):
@@ -244,8 +342,8 @@ class _SandboxREAPIBatch(_SandboxBatch):
         else:
             # Change working directory for this command
             if command.cwd != self.cwd:
-                self.script += "mkdir -p {}\n".format(command.cwd)
-                self.script += "cd {}\n".format(command.cwd)
+                self.script += "mkdir -p {} || exit 1\n".format(command.cwd)
+                self.script += "cd {} || exit 1\n".format(command.cwd)
 
             # Update environment for this command
             for key in self.env.keys():
@@ -264,9 +362,34 @@ class _SandboxREAPIBatch(_SandboxBatch):
         self.script += "(set -ex; {})".format(cmdline)
 
         # Error handling
+        status = min(self.FIRST_COMMAND_STATUS + len(self.commands), self.MAX_STATUS)
+        self.commands.append(command)
+
         label = command.label or cmdline
         quoted_label = shlex.quote("'{}'".format(label))
-        self.script += " || (echo Command {} failed with exitcode $? >&2 ; exit 1)\n".format(quoted_label)
+        self.script += " || (echo Command {} failed with exitcode $? >&2 ; exit {})\n".format(quoted_label, status)
 
     def create_empty_file(self, name):
-        self.script += "touch -- {}\n".format(shlex.quote(name))
+        self.script += "touch -- {} || exit 1\n".format(shlex.quote(name))
+
+    # _failed_command()
+    #
+    # Find the command which made the script fail.
+    #
+    # Args:
+    #    exitcode (int): The exit status of the script
+    #
+    # Returns:
+    #    (_SandboxBatchCommand): The command which failed, or None if
+    #                            it cannot be determined
+    #
+    def _failed_command(self, exitcode):
+        index = exitcode - self.FIRST_COMMAND_STATUS
+        if index < 0 or index >= len(self.commands):
+            return None
+
+        # The status is ambiguous for the commands past the highest status
+        if exitcode == self.MAX_STATUS and len(self.commands) > index + 1:
+            return None
+
+        return self.commands[index]
@@ -18,6 +18,7 @@
 #  Authors:
 #        Jim MacArthur <jim.macarthur@codethink.co.uk>
 
+import concurrent.futures
 import shutil
 from functools import partial
 
@@ -56,69 +57,30 @@ class SandboxRemote(SandboxREAPI):
     def run_remote_command(self, channel, action_digest):
         # Sends an execution request to the remote execution server.
         #
-        # This function blocks until it gets a response from the server.
+        # This function blocks until it gets a response from the server,
+        # the operation is tracked by the operation multiplexer of the
+        # context in the meantime. The resources of the job are available
+        # to other jobs while waiting.
+        multiplexer = self._get_context().get_operation_multiplexer()
 
-        # Try to create a communication channel to the BuildGrid server.
-        stub = remote_execution_pb2_grpc.ExecutionStub(channel)
-        request = remote_execution_pb2.ExecuteRequest(
-            instance_name=self.exec_spec.instance_name, action_digest=action_digest, skip_cache_lookup=False
-        )
-
-        def __run_remote_command(stub, execute_request=None, running_operation=None):
-            try:
-                last_operation = None
-                if execute_request is not None:
-                    operation_iterator = stub.Execute(execute_request)
-                else:
-                    request = remote_execution_pb2.WaitExecutionRequest(name=running_operation.name)
-                    operation_iterator = stub.WaitExecution(request)
-
-                for operation in operation_iterator:
-                    if not self.operation_name:
-                        self.operation_name = operation.name
-                    if operation.done:
-                        return operation
-                    else:
-                        last_operation = operation
-
-            except grpc.RpcError as e:
-                status_code = e.code()
-
-                if status_code in (
-                    grpc.StatusCode.INVALID_ARGUMENT,
-                    grpc.StatusCode.FAILED_PRECONDITION,
-                    grpc.StatusCode.RESOURCE_EXHAUSTED,
-                    grpc.StatusCode.INTERNAL,
-                    grpc.StatusCode.DEADLINE_EXCEEDED,
-                    grpc.StatusCode.UNAVAILABLE,
-                ):
-                    raise SandboxError(
-                        "Failed contacting remote execution server at {}."
-                        "{}: {}".format(self.exec_spec.url, status_code.name, e.details())
-                    )
-
-                if running_operation and status_code == grpc.StatusCode.UNIMPLEMENTED:
-                    raise SandboxError(
-                        "Failed trying to recover from connection loss: "
-                        "server does not support operation status polling recovery."
-                    )
-
-            return last_operation
+        def set_operation_name(name):
+            self.operation_name = name
 
         # Set up signal handler to trigger cancel_operation on SIGTERM
-        operation = None
         with self._get_context().messenger.timed_activity(
             "Waiting for the remote build to complete", element_name=self._get_element_name()
         ), _signals.terminator(partial(self.cancel_operation, channel)):
-            operation = __run_remote_command(stub, execute_request=request)
-            if operation is None:
-                return None
-            elif operation.done:
-                return operation
-            while operation is not None and not operation.done:
-                operation = __run_remote_command(stub, running_operation=operation)
-
-        return operation
+            future = multiplexer.execute(self.exec_spec, action_digest, set_operation_name)
+            try:
+                with self._get_context().messenger.idle():
+                    while True:
+                        try:
+                            # Wait with a timeout, such that the thread can be interrupted
+                            return future.result(timeout=1)
+                        except concurrent.futures.TimeoutError:
+                            continue
+            finally:
+                future.cancel()
 
     def cancel_operation(self, channel):
         # If we don't have the name can't send request.
@@ -144,8 +106,15 @@ class SandboxRemote(SandboxREAPI):
         cascache = context.get_cascache()
         artifactcache = context.artifactcache
 
+        # Artifact push remotes which share the CAS endpoint of remote
+        # execution already have the output blobs, the artifact can be
+        # pushed from server to server without downloading the files.
+        push_remotes_need_blobs = artifactcache.has_push_remotes() and bool(
+            artifactcache.get_push_storage_remotes(project, exclude_storage=self.storage_spec)
+        )
+
         # Fetch the file blobs if needed
-        if self._output_files_required or artifactcache.has_push_remotes():
+        if self._output_files_required or push_remotes_need_blobs:
             dir_digest = vdir._get_digest()
             required_blobs = cascache.required_blobs_for_directory(dir_digest)
 
@@ -159,7 +128,9 @@ class SandboxRemote(SandboxREAPI):
                     # however, artifact push remotes will need them.
                     # Only fetch blobs that are missing on one or multiple
                     # artifact servers.
-                    blobs_to_fetch = artifactcache.find_missing_blobs(project, local_missing_blobs)
+                    blobs_to_fetch = artifactcache.find_missing_blobs(
+                        project, local_missing_blobs, exclude_storage=self.storage_spec
+                    )
 
                 with CASRemote(self.storage_spec, cascache) as casremote:
                     cascache.fetch_blobs(casremote, blobs_to_fetch)
@@ -250,6 +221,10 @@ class SandboxRemote(SandboxREAPI):
 
         return action_result
 
+    def _use_action_cache(self, flags):
+        # Remote execution relies on the remote action cache
+        return False
+
     def _check_action_cache(self, action_digest):
         # Checks the action cache to see if this artifact has already been built
         #
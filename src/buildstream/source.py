@@ -1142,6 +1142,34 @@ class Source(Plugin):
 
         yield cas_dir
 
+    # _import_local_directory()
+    #
+    # Import a directory of the local filesystem into CAS, only hashing
+    # the files which changed since the directory was last imported.
+    #
+    # This gives the same digest as importing the directory into an
+    # empty directory prepared with _cache_directory().
+    #
+    # Args:
+    #    path (str): The path of the directory to import
+    #    properties (list): Optional list of node properties to capture
+    #    watched (bool): Whether the directory may be watched by `bst workspace watch`
+    #
+    # Returns:
+    #    (Digest): The digest of the imported directory, or None if the
+    #              directory must be imported with Directory.import_files()
+    #
+    def _import_local_directory(self, path, *, properties=None, watched=False):
+        context = self._get_context()
+        if context.rehash_local_files:
+            return None
+
+        watch_socket = None
+        if watched:
+            watch_socket = context.get_workspace_watch_socket(path)
+
+        return context.get_file_index().import_directory(path, properties=properties, watch_socket=watch_socket)
+
     #############################################################
     #                   Local Private Methods                   #
     #############################################################
@@ -32,11 +32,12 @@ import stat
 import tarfile as tarfilelib
 from contextlib import contextmanager
 from io import StringIO
+from typing import Iterator, Optional, Tuple
 from google.protobuf import timestamp_pb2
 
 from .. import utils
 from .._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
-from .directory import Directory, VirtualDirectoryError, _FileType
+from .directory import Directory, VirtualDirectoryError, _DiffType, _FileType
 from ._filebaseddirectory import FileBasedDirectory
 from ..utils import FileListResult, BST_ARBITRARY_TIMESTAMP
 
@@ -172,9 +173,7 @@ class CasBasedDirectory(Directory):
 
     def _populate_index(self, digest):
         try:
-            pb2_directory = remote_execution_pb2.Directory()
-            with open(self.cas_cache.objpath(digest), "rb") as f:
-                pb2_directory.ParseFromString(f.read())
+            pb2_directory = self.cas_cache.get_directory(digest)
         except FileNotFoundError as e:
             raise VirtualDirectoryError("Directory not found in local cache: {}".format(e)) from e
 
@@ -315,6 +314,177 @@ class CasBasedDirectory(Directory):
 
         self.__invalidate_digest()
 
+    # _add_paths():
+    #
+    # Add the paths of another directory to this directory, for use
+    # as a selection with _import_selected().
+    #
+    # Unlike import_files(), this never fails on conflicting entries.
+    # Where a path is a directory in either directory, the result is
+    # a directory with the paths of both.
+    #
+    # Args:
+    #     other: The directory whose paths to add
+    #
+    def _add_paths(self, other: "CasBasedDirectory"):
+        for name, entry in other.index.items():
+            existing_entry = self.index.get(name)
+            if existing_entry is None:
+                self._add_entry(entry)
+            elif entry.type != _FileType.DIRECTORY:
+                # The path is already present
+                continue
+            elif existing_entry.type != _FileType.DIRECTORY:
+                self._add_entry(entry)
+            elif existing_entry.get_digest() != entry.get_digest():
+                self.descend(name)._add_paths(entry.get_directory(other))
+
+    # _import_selected():
+    #
+    # Import the entries of a directory whose paths are present in
+    # a selection directory into this directory.
+    #
+    # Directories are imported if they are in the selection, or if
+    # any of the entries they contain are imported.
+    #
+    # If an original directory is given, entries of the source
+    # directory which are not in the original directory are imported
+    # as well, as are their parent directories. This allows selecting
+    # the files added to the source directory since the original, in
+    # addition to the selected ones.
+    #
+    # Subdirectories are compared by digest, such that only the parts
+    # of the trees which differ are walked.
+    #
+    # Args:
+    #     source: The directory to import entries from
+    #     selection: The directory whose paths to import, or None
+    #     original: The directory to compare the source directory with, or None
+    #
+    def _import_selected(
+        self,
+        source: "CasBasedDirectory",
+        selection: Optional["CasBasedDirectory"],
+        *,
+        original: Optional["CasBasedDirectory"] = None
+    ):
+        for name, entry in source.index.items():
+            selected_entry = selection.index.get(name) if selection is not None else None
+
+            original_entry = None
+            if original is not None:
+                original_entry = original.index.get(name)
+                if original_entry is None:
+                    # Added since the original, import the whole entry
+                    self._add_entry(entry)
+                    continue
+
+            if entry.type != _FileType.DIRECTORY:
+                if selected_entry is not None:
+                    self._add_entry(entry)
+                continue
+
+            # Only compare with the original where the directory changed
+            original_subdir = None
+            if original_entry is not None and original_entry.get_digest() != entry.get_digest():
+                if original_entry.type == _FileType.DIRECTORY:
+                    original_subdir = original_entry.get_directory(original)
+                else:
+                    original_subdir = CasBasedDirectory(self.cas_cache)
+
+            selected_subdir = None
+            if selected_entry is not None and selected_entry.type == _FileType.DIRECTORY:
+                selected_subdir = selected_entry.get_directory(selection)
+
+            if original_subdir is None:
+                if selected_entry is None:
+                    # Nothing in this directory can be imported
+                    continue
+                if selected_subdir is not None and selected_entry.get_digest() == entry.get_digest():
+                    # The whole directory is selected
+                    self._add_entry(entry)
+                    continue
+
+            subdir = self.descend(name, create=True)
+            subdir._import_selected(entry.get_directory(source), selected_subdir, original=original_subdir)
+            if selected_entry is None and subdir.is_empty():
+                self.remove(name)
+
+    # _diff():
+    #
+    # Compute the changes from this directory to another directory.
+    #
+    # Subdirectories are compared by digest, such that identical
+    # subtrees are skipped without being walked. Changes are yielded
+    # as they are found, in no particular order.
+    #
+    # The contents of added and removed directories are reported
+    # as added and removed as well. An entry which changed type is
+    # reported as modified, and the contents of the directory it
+    # replaced or was replaced with as removed or added.
+    #
+    # Modified directories are not reported themselves, only the
+    # changes in them are.
+    #
+    # Args:
+    #     other: The directory to compare this directory with
+    #     prefix: The relative path of this directory, for the yielded paths
+    #
+    # Yields:
+    #     (str, _DiffType): The relative path and type of each change
+    #
+    def _diff(self, other: "CasBasedDirectory", *, prefix: str = "") -> Iterator[Tuple[str, _DiffType]]:
+        if self._get_digest() == other._get_digest():
+            return
+
+        for name, entry in self.index.items():
+            if name not in other.index:
+                path = os.path.join(prefix, name)
+                yield path, _DiffType.REMOVED
+                if entry.type == _FileType.DIRECTORY:
+                    subdir = entry.get_directory(self)
+                    for subpath in subdir._list_prefixed_relative_paths(prefix=path):
+                        if subpath != path:
+                            yield subpath, _DiffType.REMOVED
+
+        for name, other_entry in other.index.items():
+            path = os.path.join(prefix, name)
+            entry = self.index.get(name)
+
+            if entry is None:
+                yield path, _DiffType.ADDED
+                if other_entry.type == _FileType.DIRECTORY:
+                    subdir = other_entry.get_directory(other)
+                    for subpath in subdir._list_prefixed_relative_paths(prefix=path):
+                        if subpath != path:
+                            yield subpath, _DiffType.ADDED
+                continue
+
+            is_dir = entry.type == _FileType.DIRECTORY
+            other_is_dir = other_entry.type == _FileType.DIRECTORY
+
+            if is_dir and other_is_dir:
+                if entry.get_digest() != other_entry.get_digest():
+                    subdir = entry.get_directory(self)
+                    yield from subdir._diff(other_entry.get_directory(other), prefix=path)
+                continue
+
+            if entry == other_entry:
+                continue
+
+            yield path, _DiffType.MODIFIED
+
+            # An entry which changed type, report the contents of the
+            # directory on either side
+            if is_dir:
+                for subpath in entry.get_directory(self)._list_prefixed_relative_paths(prefix=path):
+                    if subpath != path:
+                        yield subpath, _DiffType.REMOVED
+            elif other_is_dir:
+                for subpath in other_entry.get_directory(other)._list_prefixed_relative_paths(prefix=path):
+                    if subpath != path:
+                        yield subpath, _DiffType.ADDED
+
     def _add_new_link_direct(self, name, target):
         self.index[name] = IndexEntry(name, _FileType.SYMLINK, target=target, modified=name in self.index)
 
@@ -438,7 +608,9 @@ class CasBasedDirectory(Directory):
             fileListResult.overwritten.append(relative_pathname)
             return True
 
-    def _partial_import_cas_into_cas(self, source_directory, filter_callback, *, path_prefix="", origin=None, result):
+    def _partial_import_cas_into_cas(
+        self, source_directory, filter_callback, *, path_prefix="", origin=None, result, report_written=True
+    ):
         """ Import files from a CAS-based directory. """
         if origin is None:
             origin = self
@@ -462,19 +634,19 @@ class CasBasedDirectory(Directory):
                     self.__invalidate_digest()
 
                     # However, we still need to iterate over the directory entries
-                    # to fill in `result.files_written`.
-
-                    # Use source subdirectory object if it already exists,
-                    # otherwise create object for destination subdirectory.
-                    # This is based on the assumption that the destination
-                    # subdirectory is more likely to be modified later on
-                    # (e.g., by further import_files() calls).
-                    if entry.buildstream_object:
-                        subdir = entry.buildstream_object
-                    else:
-                        subdir = dest_entry.get_directory(self)
-
-                    subdir.__add_files_to_result(path_prefix=relative_pathname, result=result)
+                    # to fill in `result.files_written`, if requested.
+                    if report_written:
+                        # Use source subdirectory object if it already exists,
+                        # otherwise create object for destination subdirectory.
+                        # This is based on the assumption that the destination
+                        # subdirectory is more likely to be modified later on
+                        # (e.g., by further import_files() calls).
+                        if entry.buildstream_object:
+                            subdir = entry.buildstream_object
+                        else:
+                            subdir = dest_entry.get_directory(self)
+
+                        subdir.__add_files_to_result(path_prefix=relative_pathname, result=result)
                 else:
                     src_subdir = source_directory.descend(name)
                     if src_subdir == origin:
@@ -489,7 +661,12 @@ class CasBasedDirectory(Directory):
                         )
 
                     dest_subdir._partial_import_cas_into_cas(
-                        src_subdir, filter_callback, path_prefix=relative_pathname, origin=origin, result=result
+                        src_subdir,
+                        filter_callback,
+                        path_prefix=relative_pathname,
+                        origin=origin,
+                        result=result,
+                        report_written=report_written,
                     )
 
             if filter_callback and not filter_callback(relative_pathname):
@@ -508,7 +685,8 @@ class CasBasedDirectory(Directory):
                     else:
                         assert entry.type == _FileType.SYMLINK
                         self._add_new_link_direct(name=name, target=entry.target)
-                    result.files_written.append(relative_pathname)
+                    if report_written:
+                        result.files_written.append(relative_pathname)
 
     def import_files(
         self,
@@ -537,11 +715,11 @@ class CasBasedDirectory(Directory):
             external_pathspec = CasBasedDirectory(self.cas_cache, digest=digest)
 
         assert isinstance(external_pathspec, CasBasedDirectory)
-        self._partial_import_cas_into_cas(external_pathspec, filter_callback, result=result)
+        self._partial_import_cas_into_cas(
+            external_pathspec, filter_callback, result=result, report_written=report_written
+        )
 
-        # TODO: No notice is taken of report_written or update_mtime.
-        # Current behaviour is to fully populate the report, which is inefficient,
-        # but still correct.
+        # TODO: No notice is taken of update_mtime.
 
         return result
 
@@ -342,3 +342,23 @@ class _FileType(FastEnum):
     def __str__(self):
         # https://github.com/PyCQA/pylint/issues/2062
         return self.name.lower().replace("_", " ")  # pylint: disable=no-member
+
+
+# _DiffType()
+#
+# Type of a change between two directories
+#
+class _DiffType(FastEnum):
+
+    # The path was added
+    ADDED = 1
+
+    # The path was removed
+    REMOVED = 2
+
+    # The path is present in both directories, but differs
+    MODIFIED = 3
+
+    def __str__(self):
+        # https://github.com/PyCQA/pylint/issues/2062
+        return self.name.lower()  # pylint: disable=no-member
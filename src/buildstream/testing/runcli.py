@@ -53,6 +53,7 @@ from _pytest.capture import MultiCapture, FDCapture, FDCaptureBinary
 from buildstream._frontend import cli as bst_cli
 from buildstream import _yaml, node
 from buildstream._cas import CASCache
+from buildstream._refcatalogue import RefCatalogue
 from buildstream.element import _get_normal_name, _compose_artifact_name
 
 # Special private exception accessor, for test case purposes
@@ -633,12 +634,17 @@ class TestArtifact:
     #
     def remove_artifact_from_cache(self, cache_dir, element_name):
 
-        cache_dir = os.path.join(cache_dir, "artifacts", "refs")
+        refs_dir = os.path.join(cache_dir, "artifacts", "refs")
 
         normal_name = element_name.replace(os.sep, "-")
-        cache_dir = os.path.splitext(os.path.join(cache_dir, "test", normal_name))[0]
+        cache_dir = os.path.splitext(os.path.join(refs_dir, "test", normal_name))[0]
         shutil.rmtree(cache_dir)
 
+        # Keep the catalogue of the artifacts consistent
+        catalogue = RefCatalogue(refs_dir)
+        catalogue.rebuild()
+        catalogue.close()
+
     # is_cached():
     #
     # Check if given element has a cached artifact
@@ -31,7 +31,8 @@ def tree_maker(cas, tree, directory):
 
 
 @pytest.mark.datafiles(DATA_DIR)
-def test_pull(cli, tmpdir, datafiles):
+@pytest.mark.parametrize("fetch_batches", [1, 4])
+def test_pull(cli, tmpdir, datafiles, fetch_batches):
     project_dir = str(datafiles)
 
     # Set up an artifact cache.
@@ -43,6 +44,7 @@ def test_pull(cli, tmpdir, datafiles):
             "scheduler": {"pushers": 1},
             "artifacts": {"servers": [{"url": share.repo, "push": True,}]},
             "cachedir": cache_dir,
+            "cache": {"fetch-batches": fetch_batches},
         }
 
         # Write down the user configuration file
@@ -0,0 +1,58 @@
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import os
+
+import pytest
+
+from buildstream.testing import cli  # pylint: disable=unused-import
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "compose")
+
+
+# Build and check out a compose element, returning the result of
+# the build and the files of the composition
+def build_composition(cli, project, element_name, checkout):
+    build_result = cli.run(project=project, args=["build", element_name])
+    build_result.assert_success()
+
+    result = cli.run(project=project, args=["artifact", "checkout", element_name, "--directory", checkout])
+    result.assert_success()
+
+    files = set()
+    for root, dirnames, filenames in os.walk(checkout):
+        for name in dirnames + filenames:
+            path = os.path.join(root, name)
+            files.add(os.path.relpath(path, checkout))
+            if name in filenames:
+                with open(path) as f:
+                    files.add((os.path.relpath(path, checkout), f.read()))
+
+    return build_result, files
+
+
+@pytest.mark.datafiles(DATA_DIR)
+def test_compose_incremental(datafiles, cli, tmpdir):
+    project = str(datafiles)
+
+    checkout = os.path.join(str(tmpdir), "checkout")
+
+    _, regular = build_composition(cli, project, "compose-regular.bst", checkout + "-regular-first")
+    result, incremental = build_composition(cli, project, "compose-incremental.bst", checkout + "-incremental-first")
+    assert "Reused the split of 0 out of 2 dependencies" in result.stderr
+    assert incremental == regular
+    assert ("usr/bin/hello", "hello\n") in incremental
+    assert "usr/share/doc/README" not in incremental
+
+    # Modify a dependency, only the split of the other one is reused
+    with open(os.path.join(project, "files", "other", "usr", "lib", "libfoo.so"), "w") as f:
+        f.write("libfoo 2\n")
+    with open(os.path.join(project, "files", "other", "usr", "include", "bar.h"), "w") as f:
+        f.write("bar\n")
+
+    _, regular = build_composition(cli, project, "compose-regular.bst", checkout + "-regular-second")
+    result, incremental = build_composition(cli, project, "compose-incremental.bst", checkout + "-incremental-second")
+    assert "Reused the split of 1 out of 2 dependencies" in result.stderr
+    assert incremental == regular
+    assert ("usr/lib/libfoo.so", "libfoo 2\n") in incremental
+    assert ("usr/include/bar.h", "bar\n") in incremental
@@ -0,0 +1 @@
+foo
@@ -202,3 +202,32 @@ def test_artifact_show_element_available_remotely(cli, tmpdir, datafiles):
         result = cli.run(project=project, args=["artifact", "show", element])
         result.assert_success()
         assert "available {}".format(element) in result.output
+
+
+# Test artifact show of many elements, only some of which are in the remote
+@pytest.mark.datafiles(DATA_DIR)
+def test_artifact_show_elements_available_remotely(cli, tmpdir, datafiles):
+    project = str(datafiles)
+    element = "target.bst"
+    dependencies = ["import-bin.bst", "import-dev.bst", "compose-all.bst"]
+
+    # Set up remote and local shares
+    local_cache = os.path.join(str(tmpdir), "artifacts")
+    with create_artifact_share(os.path.join(str(tmpdir), "remote")) as remote:
+        cli.configure(
+            {"artifacts": {"servers": [{"url": remote.repo, "push": True}]}, "cachedir": local_cache,}
+        )
+
+        # Build the dependencies, pushing them to the share
+        result = cli.run(project=project, args=["build", *dependencies])
+        result.assert_success()
+
+        # Delete the artifacts from the local cache
+        result = cli.run(project=project, args=["artifact", "delete", *dependencies])
+        result.assert_success()
+
+        result = cli.run(project=project, args=["artifact", "show", element, *dependencies])
+        result.assert_success()
+        for dependency in dependencies:
+            assert "available {}".format(dependency) in result.output
+        assert "not cached {}".format(element) in result.output
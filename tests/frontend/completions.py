@@ -55,10 +55,11 @@ ARTIFACT_COMMANDS = [
     "pull ",
     "log ",
     "list-contents ",
+    "reindex ",
     "show ",
 ]
 
-WORKSPACE_COMMANDS = ["close ", "list ", "open ", "reset "]
+WORKSPACE_COMMANDS = ["close ", "list ", "open ", "reset ", "watch "]
 
 PROJECT_ELEMENTS = [
     "compose-all.bst",
@@ -79,10 +79,12 @@ def test_push_pull_deps(cli, tmpdir, datafiles, deps, expected_states):
 # Tests that:
 #
 #  * `bst build` pushes all build elements ONLY to configured 'push' cache
-#  * `bst artifact pull` finds artifacts that are available only in the secondary cache
+#  * `bst artifact pull` finds artifacts that are available only in the secondary cache,
+#    both when querying the caches one after the other and concurrently
 #
 @pytest.mark.datafiles(DATA_DIR)
-def test_pull_secondary_cache(cli, tmpdir, datafiles):
+@pytest.mark.parametrize("race_remotes", [False, True], ids=["sequential", "race"])
+def test_pull_secondary_cache(cli, tmpdir, datafiles, race_remotes):
     project = str(datafiles)
 
     with create_artifact_share(os.path.join(str(tmpdir), "artifactshare1")) as share1, create_artifact_share(
@@ -91,7 +93,10 @@ def test_pull_secondary_cache(cli, tmpdir, datafiles):
 
         # Build the target and push it to share2 only.
         cli.configure(
-            {"artifacts": {"servers": [{"url": share1.repo, "push": False}, {"url": share2.repo, "push": True},]}}
+            {
+                "artifacts": {"servers": [{"url": share1.repo, "push": False}, {"url": share2.repo, "push": True},]},
+                "cache": {"race-remotes": race_remotes},
+            }
         )
         result = cli.run(project=project, args=["build", "target.bst"])
         result.assert_success()
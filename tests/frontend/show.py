@@ -550,3 +550,39 @@ def test_strict_dependencies(cli, datafiles, target, expected_state):
     states = cli.get_element_states(project, ["base.bst", target])
     assert states["base.bst"] == "buildable"
     assert states[target] == expected_state
+
+
+# This tests that cache keys restored from a pipeline snapshot
+# are the same as the ones calculated without snapshots, including
+# when the sources of a dependency have changed since the snapshot
+# was recorded.
+#
+@pytest.mark.datafiles(os.path.join(DATA_DIR, "strict-depends"))
+@pytest.mark.parametrize("target", ["non-strict-depends.bst", "strict-depends.bst"])
+def test_pipeline_snapshots(cli, datafiles, target):
+    project = str(datafiles)
+
+    def get_keys():
+        return {element: cli.get_element_key(project, element) for element in ["base.bst", target]}
+
+    expected_keys = get_keys()
+
+    cli.configure({"cache": {"pipeline-snapshots": True}})
+
+    # First run records the snapshot, second run restores it
+    assert get_keys() == expected_keys
+    assert get_keys() == expected_keys
+    assert os.listdir(os.path.join(cli.directory, "snapshots"))
+
+    # Now modify the file, effectively causing the common base.bst
+    # dependency to change it's cache key
+    hello_path = os.path.join(project, "files", "hello.txt")
+    with open(hello_path, "w") as f:
+        f.write("Goodbye")
+
+    changed_keys = get_keys()
+    assert changed_keys["base.bst"] != expected_keys["base.bst"]
+    assert changed_keys[target] != expected_keys[target]
+
+    cli.configure({"cache": {"pipeline-snapshots": False}})
+    assert get_keys() == changed_keys
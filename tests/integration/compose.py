@@ -107,8 +107,9 @@ def create_compose_element(name, path, config=None):
         ),
     ],
 )
+@pytest.mark.parametrize("incremental", [False, True], ids=["full", "incremental"])
 @pytest.mark.skipif(not HAVE_SANDBOX, reason="Only available with a functioning sandbox")
-def test_compose_include(cli, datafiles, include_domains, exclude_domains, expected):
+def test_compose_include(cli, datafiles, include_domains, exclude_domains, expected, incremental):
     project = str(datafiles)
     checkout = os.path.join(cli.directory, "checkout")
     element_path = os.path.join(project, "elements")
@@ -116,7 +117,7 @@ def test_compose_include(cli, datafiles, include_domains, exclude_domains, expec
 
     # Create a yaml configuration from the specified include and
     # exclude domains
-    config = {"include": include_domains, "exclude": exclude_domains}
+    config = {"include": include_domains, "exclude": exclude_domains, "incremental": incremental}
     create_compose_element(element_name, element_path, config=config)
 
     result = cli.run(project=project, args=["source", "track", "compose/amhello.bst"])
@@ -137,7 +138,8 @@ def test_compose_include(cli, datafiles, include_domains, exclude_domains, expec
     HAVE_SANDBOX == "buildbox-run" and BUILDBOX_RUN == "buildbox-run-userchroot",
     reason="Root directory not writable with userchroot",
 )
-def test_compose_run_integration(cli, datafiles):
+@pytest.mark.parametrize("incremental", [False, True], ids=["full", "incremental"])
+def test_compose_run_integration(cli, datafiles, incremental):
     project = str(datafiles)
     checkout = os.path.join(cli.directory, "checkout")
     element_path = os.path.join(project, "elements")
@@ -149,7 +151,7 @@ def test_compose_run_integration(cli, datafiles):
             {"filename": "compose/amhello.bst", "type": "build"},
             {"filename": "compose/test-integration.bst", "type": "build"},
         ],
-        "config": {"include": ["runtime"]},
+        "config": {"include": ["runtime"], "incremental": incremental},
     }
 
     _yaml.roundtrip_dump(element, os.path.join(element_path, element_name))
@@ -51,3 +51,38 @@ def test_build_arch(cli, datafiles):
 
     result = cli.run(project=project, args=["build", element_name])
     assert result.exit_code == 0
+
+
+# Test that rebuilding an element with identical inputs reuses
+# the results of its commands from the local action cache
+@pytest.mark.skipif(not HAVE_SANDBOX, reason="Only available with a functioning sandbox")
+@pytest.mark.datafiles(DATA_DIR)
+@pytest.mark.parametrize(
+    "element_name,expect_cached",
+    [("sandbox/action-cache.bst", True), ("sandbox/action-cache-disabled.bst", False)],
+    ids=["enabled", "disabled"],
+)
+def test_action_cache(cli, datafiles, element_name, expect_cached):
+    project = str(datafiles)
+    checkout = os.path.join(cli.directory, "checkout")
+
+    result = cli.run(project=project, args=["build", element_name])
+    result.assert_success()
+    assert "Action result found in local action cache" not in result.stderr
+
+    # Delete the artifact and build it again
+    result = cli.run(project=project, args=["artifact", "delete", element_name])
+    result.assert_success()
+    result = cli.run(project=project, args=["build", element_name])
+    result.assert_success()
+    assert ("Action result found in local action cache" in result.stderr) == expect_cached
+
+    # The output of the commands is in the build log, even if they were not run
+    result = cli.run(project=project, args=["artifact", "log", element_name])
+    result.assert_success()
+    assert "Installing hello" in result.output
+
+    result = cli.run(project=project, args=["artifact", "checkout", element_name, "--directory", checkout])
+    result.assert_success()
+    with open(os.path.join(checkout, "hello")) as f:
+        assert f.read() == "Hello\n"
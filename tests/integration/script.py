@@ -5,6 +5,7 @@ import os
 import pytest
 
 from buildstream import _yaml
+from buildstream.exceptions import ErrorDomain
 from buildstream.testing import cli_integration as cli  # pylint: disable=unused-import
 from buildstream.testing._utils.site import HAVE_SANDBOX, BUILDBOX_RUN
 
@@ -119,6 +120,29 @@ def test_script_no_root(cli, datafiles):
     assert "/test: Read-only file system" in res.stderr or "/test: Permission denied" in res.stderr
 
 
+# Test that the command which failed is reported when
+# the commands of the element are run as a batch
+@pytest.mark.datafiles(DATA_DIR)
+@pytest.mark.skipif(not HAVE_SANDBOX, reason="Only available with a functioning sandbox")
+def test_script_failed_command(cli, datafiles):
+    project = str(datafiles)
+    element_path = os.path.join(project, "elements")
+    element_name = "script/script-layout.bst"
+
+    create_script_element(
+        element_name,
+        element_path,
+        config={"commands": ["mkdir -p %{install-root}", "test -e /nonexistent-file", "touch %{install-root}/test"]},
+    )
+
+    res = cli.run(project=project, args=["build", element_name])
+    res.assert_main_error(ErrorDomain.STREAM, None)
+    assert cli.get_element_state(project, element_name) == "failed"
+
+    assert "Command failed" in res.stderr
+    assert "test -e /nonexistent-file" in res.stderr
+
+
 @pytest.mark.datafiles(DATA_DIR)
 @pytest.mark.skipif(not HAVE_SANDBOX, reason="Only available with a functioning sandbox")
 def test_script_cwd(cli, datafiles):
@@ -2,8 +2,12 @@ import os
 import time
 from unittest.mock import MagicMock
 
+import pytest
+
+from buildstream import utils
 from buildstream._cas.cascache import CASCache
-from buildstream._cas import casdprocessmanager
+from buildstream._cas import cascache, casdprocessmanager
+from buildstream._protos.build.bazel.remote.execution.v2 import remote_execution_pb2
 from buildstream._messenger import Messenger
 
 
@@ -106,3 +110,157 @@ def test_casd_redirects_stderr_to_file_and_rotate(tmp_path, monkeypatch):
         assert len(existing_log_files) == n_max_log_files
         assert evicted_file not in existing_log_files
         assert existing_log_files[-1].read_text() == "hello\n"
+
+
+# Add a blob to the local CAS directly, without buildbox-casd
+def _add_blob(cache, data):
+    digest = utils._message_digest(data)
+    path = cache.objpath(digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return digest
+
+
+# Add a directory with the given files, subdirectories and symlinks
+def _add_directory(cache, files=(), directories=(), symlinks=()):
+    directory = remote_execution_pb2.Directory()
+    for name, contents, is_executable in files:
+        filenode = directory.files.add(name=name, is_executable=is_executable)
+        filenode.digest.CopyFrom(_add_blob(cache, contents))
+    for name, digest in directories:
+        dirnode = directory.directories.add(name=name)
+        dirnode.digest.CopyFrom(digest)
+    for name, target in symlinks:
+        directory.symlinks.add(name=name, target=target)
+    return _add_blob(cache, directory.SerializeToString())
+
+
+@pytest.mark.parametrize("can_link", [False, True], ids=["copy", "link"])
+def test_checkout(tmp_path, monkeypatch, can_link):
+    # Use tiny batches to exercise the thread pool
+    monkeypatch.setattr(cascache, "_CHECKOUT_BATCH_SIZE", 2)
+
+    # Hard links are always created in the calling thread
+    if can_link:
+        monkeypatch.setattr(cascache, "ThreadPoolExecutor", None)
+
+    cache = CASCache(str(tmp_path.joinpath("cache")), casd=False)
+
+    subdir = _add_directory(
+        cache,
+        files=[("file{}".format(i), "sub {}".format(i).encode(), False) for i in range(10)],
+        symlinks=[("link", "../bin/tool")],
+    )
+    tree = _add_directory(
+        cache,
+        files=[("README", b"readme", False)],
+        directories=[
+            ("bin", _add_directory(cache, files=[("tool", b"#!/bin/sh\n", True)])),
+            ("sub", subdir),
+            ("empty", _add_directory(cache)),
+        ],
+    )
+
+    dest = tmp_path.joinpath("checkout")
+    cache.checkout(str(dest), tree, can_link=can_link)
+
+    checked_out = [
+        os.path.relpath(os.path.join(root, name), str(dest))
+        for root, dirnames, filenames in os.walk(str(dest))
+        for name in dirnames + filenames
+    ]
+    assert sorted(checked_out) == sorted(
+        ["README", "bin", "bin/tool", "empty", "sub", "sub/link"] + ["sub/file{}".format(i) for i in range(10)]
+    )
+    assert dest.joinpath("README").read_bytes() == b"readme"
+    assert dest.joinpath("sub", "file7").read_bytes() == b"sub 7"
+    assert os.readlink(str(dest.joinpath("sub", "link"))) == "../bin/tool"
+    assert os.access(str(dest.joinpath("bin", "tool")), os.X_OK)
+    assert not os.access(str(dest.joinpath("README")), os.X_OK)
+
+
+def test_directory_cache(tmp_path):
+    cache = CASCache(str(tmp_path.joinpath("cache")), casd=False)
+
+    first = _add_directory(cache, files=[("first", b"first", False)])
+    second = _add_directory(cache, files=[("second", b"second", False)])
+
+    # Only leave room for a single directory
+    cache._directory_cache = cascache._DirectoryCache(max(first.size_bytes, second.size_bytes))
+
+    assert cache.get_directory(first).files[0].name == "first"
+    assert cache.get_directory(first).files[0].name == "first"
+    assert cache.get_directory(second).files[0].name == "second"
+    assert cache.get_directory(first).files[0].name == "first"
+
+    usage = cache.get_directory_cache_usage()
+    assert (usage.hits, usage.misses) == (1, 3)
+
+    # Missing directories are not cached
+    with pytest.raises(FileNotFoundError):
+        cache.get_directory(utils._message_digest(b"missing"))
+
+
+def test_required_blobs_for_directory(tmp_path):
+    cache = CASCache(str(tmp_path.joinpath("cache")), casd=False)
+
+    deep = _add_directory(cache, files=[("deep", b"deep", False)])
+    first = _add_directory(cache, files=[("first", b"first", False)], directories=[("deep", deep)])
+    second = _add_directory(cache, files=[("second", b"second", False)])
+    root = _add_directory(cache, files=[("root", b"root", False)], directories=[("first", first), ("second", second)])
+
+    def blob(contents):
+        return utils._message_digest(contents)
+
+    assert list(cache.required_blobs_for_directory(root)) == [
+        root,
+        blob(b"root"),
+        first,
+        blob(b"first"),
+        deep,
+        blob(b"deep"),
+        second,
+        blob(b"second"),
+    ]
+
+    # Excluded subdirectories only apply to the toplevel directory
+    assert list(cache.required_blobs_for_directory(root, excluded_subdirs=["first", "deep"])) == [
+        root,
+        blob(b"root"),
+        second,
+        blob(b"second"),
+    ]
+
+
+
+def test_action_cache_expired(tmp_path):
+    cache = CASCache(str(tmp_path.joinpath("cache")), casd=False)
+
+    # An entry referring to a result which is not in the local cache
+    action_digest = utils._message_digest(b"action")
+    refpath = cache._action_refpath(action_digest)
+    os.makedirs(os.path.dirname(refpath))
+    with open(refpath, "wb") as f:
+        f.write(utils._message_digest(b"expired").SerializeToString())
+
+    assert cache.get_action_result(action_digest) is None
+    assert not os.path.exists(refpath)
+
+
+def test_action_cache_prune(tmp_path, monkeypatch):
+    monkeypatch.setattr(cascache, "_ACTION_CACHE_SUBDIR_ENTRIES", 2)
+
+    cache = CASCache(str(tmp_path.joinpath("cache")), casd=False)
+
+    subdir = os.path.join(cache.actiondir, "00")
+    os.makedirs(subdir)
+    for index in range(4):
+        refpath = os.path.join(subdir, "entry{}".format(index))
+        with open(refpath, "wb"):
+            pass
+        os.utime(refpath, (index, index))
+
+    # Only the most recently used entries are kept
+    cache._prune_action_cache(subdir)
+    assert sorted(os.listdir(subdir)) == ["entry2", "entry3"]
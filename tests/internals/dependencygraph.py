@@ -0,0 +1,82 @@
+from buildstream._dependencygraph import DependencyGraph
+from buildstream.types import _Scope
+
+
+# A minimal element, with only what the graph needs
+class GraphElement:
+    def __init__(self, name, build_deps=(), runtime_deps=()):
+        self.name = name
+        self.build_deps = list(build_deps)
+        self.runtime_deps = list(runtime_deps)
+
+    def _dependencies(self, scope, *, recurse=True):
+        assert not recurse
+        deps = []
+        if scope in (_Scope.BUILD, _Scope.ALL):
+            deps.extend(self.build_deps)
+        if scope in (_Scope.RUN, _Scope.ALL):
+            deps.extend(dep for dep in self.runtime_deps if dep not in deps)
+        return iter(deps)
+
+
+def names(elements):
+    return [element.name for element in elements]
+
+
+#
+#         (app)
+#         /    \
+#  build /      \ runtime
+#       /        \
+#   (compiler)  (lib)
+#       |        |  \
+#       | runtime|   \ build
+#       |        |    \
+#     (base)---(libc) (tool)
+#          runtime
+#
+def graph_elements():
+    libc = GraphElement("libc")
+    base = GraphElement("base", runtime_deps=[libc])
+    tool = GraphElement("tool")
+    compiler = GraphElement("compiler", runtime_deps=[base])
+    lib = GraphElement("lib", build_deps=[tool], runtime_deps=[libc])
+    app = GraphElement("app", build_deps=[compiler], runtime_deps=[lib])
+    return app, lib, compiler
+
+
+def test_dependencies():
+    app, lib, _ = graph_elements()
+    graph = DependencyGraph([app])
+
+    assert len(graph) == 6
+    assert names(graph.dependencies([app], _Scope.ALL)) == ["libc", "base", "compiler", "tool", "lib", "app"]
+    assert names(graph.dependencies([app], _Scope.BUILD)) == ["libc", "base", "compiler"]
+    assert names(graph.dependencies([app], _Scope.RUN)) == ["libc", "lib", "app"]
+    assert names(graph.dependencies([lib, app], _Scope.RUN)) == ["libc", "lib", "app"]
+    assert names(graph.dependencies([lib, app], _Scope.NONE)) == ["lib", "app"]
+
+    assert names(graph.build_dependencies(lib)) == ["tool"]
+    assert names(graph.runtime_dependencies(lib)) == ["libc"]
+
+
+def test_reachable():
+    app, lib, compiler = graph_elements()
+    graph = DependencyGraph([app])
+
+    everything = graph.dependencies([app], _Scope.ALL)
+    reachable = graph.reachable([app], excluded=[compiler])
+    assert names(graph.mask_elements(everything, reachable)) == ["libc", "tool", "lib", "app"]
+
+    reachable = graph.reachable([lib])
+    assert names(graph.mask_elements(everything, reachable)) == ["libc", "tool", "lib"]
+
+
+def test_deep_chain():
+    # Deeper than the recursion limit of Python
+    elements = [GraphElement("element{}.bst".format(index)) for index in range(5000)]
+    for element, dep in zip(elements, elements[1:]):
+        element.runtime_deps = [dep]
+
+    graph = DependencyGraph([elements[0]])
+    assert graph.dependencies([elements[0]], _Scope.RUN) == list(reversed(elements))
@@ -0,0 +1,165 @@
+import os
+import sys
+import threading
+
+import pytest
+
+from buildstream._cas import CASCache, FileIndex
+from buildstream._workspacewatcher import WorkspaceWatcher, watch_socket_path
+from buildstream.storage._casbaseddirectory import CasBasedDirectory
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "storage")
+
+
+@pytest.fixture
+def cas_cache(tmpdir):
+    cache = CASCache(os.path.join(str(tmpdir), "cas"), log_directory=os.path.join(str(tmpdir), "logs"))
+    try:
+        yield cache
+    finally:
+        cache.release_resources()
+
+
+# Import a directory the way local sources do without the index
+def import_files(cas_cache, path, properties=None):
+    directory = CasBasedDirectory(cas_cache)
+    directory.import_files(path, properties=properties)
+    return directory._get_digest()
+
+
+# Run a workspace watcher in a thread
+@pytest.fixture
+def watcher(tmpdir):
+    watcher = WorkspaceWatcher(os.path.join(str(tmpdir), "watch"))
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            for key, _ in watcher._selector.select(timeout=0.1):
+                key.data()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    try:
+        yield watcher
+    finally:
+        stop.set()
+        thread.join()
+        watcher.close()
+
+
+# Count the files captured by the index
+def count_captures(monkeypatch, index):
+    captured = []
+    capture_files = index._capture_files
+
+    def wrapped(path, relpaths, properties):
+        captured.extend(relpaths)
+        return capture_files(path, relpaths, properties)
+
+    monkeypatch.setattr(index, "_capture_files", wrapped)
+    return captured
+
+
+@pytest.mark.parametrize("properties", [None, ["mtime"]])
+@pytest.mark.datafiles(DATA_DIR)
+def test_same_digest(tmpdir, datafiles, cas_cache, properties):
+    original = os.path.join(str(datafiles), "original")
+    index = FileIndex(cas_cache, os.path.join(str(tmpdir), "fileindex"))
+
+    expected = import_files(cas_cache, original, properties)
+
+    # The first import creates the index, the second one uses it
+    assert index.import_directory(original, properties=properties) == expected
+    assert index.import_directory(original, properties=properties) == expected
+
+
+@pytest.mark.datafiles(DATA_DIR)
+def test_only_changed_files(tmpdir, datafiles, cas_cache, monkeypatch):
+    original = os.path.join(str(datafiles), "original")
+    index = FileIndex(cas_cache, os.path.join(str(tmpdir), "fileindex"))
+
+    index.import_directory(original)
+
+    # Make sure the files are older than the import, files modified
+    # during an import are always captured again by the next one
+    for root, _, files in os.walk(original):
+        for name in files:
+            os.utime(os.path.join(root, name), ns=(0, 0), follow_symlinks=False)
+    index.import_directory(original)
+
+    captured = count_captures(monkeypatch, index)
+    assert index.import_directory(original) == import_files(cas_cache, original)
+    assert not captured
+
+    with open(os.path.join(original, "bin", "hello"), "a") as f:
+        f.write("changed")
+    os.utime(os.path.join(original, "bin", "hello"), ns=(0, 0))
+    with open(os.path.join(original, "newfile"), "w") as f:
+        f.write("new")
+
+    assert index.import_directory(original) == import_files(cas_cache, original)
+    assert sorted(captured) == [os.path.join("bin", "hello"), "newfile"]
+
+
+@pytest.mark.datafiles(DATA_DIR)
+def test_changed_file_mtime(tmpdir, datafiles, cas_cache, monkeypatch):
+    original = os.path.join(str(datafiles), "original")
+    index = FileIndex(cas_cache, os.path.join(str(tmpdir), "fileindex"))
+
+    for root, _, files in os.walk(original):
+        for name in files:
+            os.utime(os.path.join(root, name), ns=(0, 0), follow_symlinks=False)
+    index.import_directory(original, properties=["mtime"])
+
+    # The captured file has the mtime of the modified file
+    captured = count_captures(monkeypatch, index)
+    with open(os.path.join(original, "bin", "hello"), "a") as f:
+        f.write("changed")
+    os.utime(os.path.join(original, "bin", "hello"), ns=(1234567890123456789, 1234567890123456789))
+
+    expected = import_files(cas_cache, original, ["mtime"])
+    assert index.import_directory(original, properties=["mtime"]) == expected
+    assert captured == [os.path.join("bin", "hello")]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is only available on Linux")
+@pytest.mark.datafiles(DATA_DIR)
+def test_watched_directory(tmpdir, datafiles, cas_cache, watcher, monkeypatch):
+    original = os.path.join(str(datafiles), "original")
+    index = FileIndex(cas_cache, os.path.join(str(tmpdir), "fileindex"))
+    watch_socket = watch_socket_path(os.path.join(str(tmpdir), "watch"), original)
+    watcher.update([original])
+
+    index.import_directory(original, watch_socket=watch_socket)
+    for root, _, files in os.walk(original):
+        for name in files:
+            os.utime(os.path.join(root, name), ns=(0, 0), follow_symlinks=False)
+    index.import_directory(original, watch_socket=watch_socket)
+
+    scanned = []
+    scan_directory = index._scan_directory
+
+    def wrapped(path, relpath, stats):
+        scanned.append(relpath)
+        return scan_directory(path, relpath, stats)
+
+    monkeypatch.setattr(index, "_scan_directory", wrapped)
+
+    # Nothing changed since the previous import
+    assert index.import_directory(original, watch_socket=watch_socket) == import_files(cas_cache, original)
+    assert not scanned
+
+    with open(os.path.join(original, "bin", "hello"), "a") as f:
+        f.write("changed")
+    os.makedirs(os.path.join(original, "newdir", "subdir"))
+    with open(os.path.join(original, "newdir", "subdir", "newfile"), "w") as f:
+        f.write("new")
+
+    assert index.import_directory(original, watch_socket=watch_socket) == import_files(cas_cache, original)
+    assert sorted(scanned) == [
+        "",
+        "bin",
+        "newdir",
+        os.path.join("newdir", "subdir"),
+    ]
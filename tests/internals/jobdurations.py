@@ -0,0 +1,71 @@
+import os
+
+from buildstream import _jobdurations
+from buildstream._jobdurations import JobDurations
+
+
+def test_record_and_estimate(tmpdir):
+    path = os.path.join(str(tmpdir), "durations")
+
+    durations = JobDurations(path)
+    assert durations.estimate("Build", "base.bst") is None
+    assert durations.average("Build") is None
+
+    durations.record("Build", "base.bst", 10.0)
+    durations.record("Build", "base.bst", 20.0)
+    durations.record("Build", "app.bst", 3.0)
+    durations.record("Pull", "base.bst", 1.0)
+
+    # Recent durations weigh more in the estimate
+    assert durations.estimate("Build", "base.bst") == 15.0
+    assert durations.estimate("Pull", "base.bst") == 1.0
+    assert durations.average("Build") == 9.0
+
+    # Estimates are the same when loaded again
+    durations = JobDurations(path)
+    assert durations.estimate("Build", "base.bst") == 15.0
+    assert durations.estimate("Build", "app.bst") == 3.0
+
+
+def test_truncated_record(tmpdir):
+    path = os.path.join(str(tmpdir), "durations")
+
+    JobDurations(path).record("Build", "base.bst", 10.0)
+    with open(path, "a") as f:
+        f.write('{"action": "Build", "elem')
+
+    assert JobDurations(path).estimate("Build", "base.bst") == 10.0
+
+
+def test_compact(tmpdir, monkeypatch):
+    monkeypatch.setattr(_jobdurations, "_COMPACT_MIN_RECORDS", 5)
+    path = os.path.join(str(tmpdir), "durations")
+
+    durations = JobDurations(path)
+    for _ in range(10):
+        durations.record("Build", "base.bst", 10.0)
+
+    # Loading compacts the file to a single record
+    assert JobDurations(path).estimate("Build", "base.bst") == 10.0
+    with open(path) as f:
+        assert len(f.readlines()) == 1
+    assert JobDurations(path).estimate("Build", "base.bst") == 10.0
+
+
+def test_artifact_size(tmpdir, monkeypatch):
+    monkeypatch.setattr(_jobdurations, "_COMPACT_MIN_RECORDS", 1)
+    path = os.path.join(str(tmpdir), "durations")
+
+    durations = JobDurations(path)
+    durations.record("Build", "base.bst", 10.0, artifact_size=1024)
+    for _ in range(4):
+        durations.record("Build", "base.bst", 10.0)
+    durations.record("Build", "base.bst", 10.0, artifact_size=2048)
+    assert durations.artifact_size("Build", "base.bst") == 2048
+    assert durations.artifact_size("Pull", "base.bst") is None
+
+    # The last recorded size survives compaction
+    assert JobDurations(path).artifact_size("Build", "base.bst") == 2048
+    with open(path) as f:
+        assert len(f.readlines()) == 1
+    assert JobDurations(path).artifact_size("Build", "base.bst") == 2048
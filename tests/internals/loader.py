@@ -5,7 +5,7 @@ import pytest
 from buildstream.exceptions import LoadErrorReason
 from buildstream._exceptions import LoadError
 from buildstream._project import Project
-from buildstream._loader import LoadElement
+from buildstream._loader import LoadElement, DependencyType
 
 from tests.testutils import dummy_context
 
@@ -94,3 +94,46 @@ def test_invalid_directory_load(datafiles):
         loader.load(["elements/"])
 
     assert exc.value.reason == LoadErrorReason.LOADING_DIRECTORY
+
+
+##############################################################
+#  Parallel loading: Test that reading element files ahead   #
+#  of parsing them does not change the loaded result         #
+##############################################################
+def _dependency_names(element):
+    return [(dep.element.name, dep.dep_type) for dep in element.dependencies]
+
+
+@pytest.mark.datafiles(os.path.join(DATA_DIR, "dependencies"))
+@pytest.mark.parametrize("loaders", [0, 4])
+def test_parallel_load(datafiles, tmpdir, loaders):
+
+    basedir = str(datafiles)
+    config = os.path.join(str(tmpdir), "buildstream.conf")
+    with open(config, "w") as f:
+        f.write("scheduler:\n  loaders: {}\n".format(loaders))
+
+    with dummy_context(config=config) as context:
+        loader = Project(basedir, context).loader
+        element = loader.load(["valid.bst"])[0]
+
+        assert _dependency_names(element) == [("first.bst", DependencyType.ALL), ("second.bst", DependencyType.ALL)]
+        second = element.dependencies[1].element
+        assert _dependency_names(second) == [("base.bst", DependencyType.ALL), ("first.bst", DependencyType.ALL)]
+        assert second.node.get_provenance()._shortname == "second.bst"
+
+
+@pytest.mark.datafiles(os.path.join(DATA_DIR, "dependencies"))
+@pytest.mark.parametrize("loaders", [0, 4])
+def test_parallel_load_missing_dependency(datafiles, tmpdir, loaders):
+
+    basedir = str(datafiles)
+    config = os.path.join(str(tmpdir), "buildstream.conf")
+    with open(config, "w") as f:
+        f.write("scheduler:\n  loaders: {}\n".format(loaders))
+
+    with dummy_context(config=config) as context, pytest.raises(LoadError) as exc:
+        Project(basedir, context).loader.load(["target.bst"])
+
+    assert exc.value.reason == LoadErrorReason.MISSING_FILE
+    assert "third.bst [line 4 column 2]" in str(exc.value)
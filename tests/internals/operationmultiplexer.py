@@ -0,0 +1,116 @@
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+from concurrent import futures
+
+import grpc
+import pytest
+
+from buildstream._exceptions import SandboxError
+from buildstream._protos.build.bazel.remote.execution.v2 import remote_execution_pb2, remote_execution_pb2_grpc
+from buildstream._protos.google.longrunning import operations_pb2
+from buildstream._remotespec import RemoteSpec, RemoteType
+from buildstream.sandbox._operationmultiplexer import OperationMultiplexer
+
+
+# An execution service streaming scripted updates of operations
+#
+# Each call of Execute or WaitExecution takes the next list of
+# updates to stream, a StatusCode in the list aborts the call.
+#
+class StubExecutionServicer(remote_execution_pb2_grpc.ExecutionServicer):
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self.requests = []
+
+    def Execute(self, request, context):
+        return self._stream(request, context)
+
+    def WaitExecution(self, request, context):
+        return self._stream(request, context)
+
+    def _stream(self, request, context):
+        self.requests.append(request)
+        for update in self.streams.pop(0):
+            if isinstance(update, grpc.StatusCode):
+                context.abort(update, "Scripted failure")
+            yield update
+
+
+def operation(name, done=False):
+    return operations_pb2.Operation(name=name, done=done)
+
+
+@pytest.fixture
+def multiplexer():
+    multiplexer = OperationMultiplexer()
+    yield multiplexer
+    multiplexer.release_resources()
+
+
+# Run an action against a stub execution service
+#
+# Returns:
+#    (Operation): The done operation
+#    (list): The names reported for the operation
+#    (StubExecutionServicer): The servicer
+#
+def execute(multiplexer, streams):
+    servicer = StubExecutionServicer(streams)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    remote_execution_pb2_grpc.add_ExecutionServicer_to_server(servicer, server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+
+    names = []
+    try:
+        spec = RemoteSpec(RemoteType.ENDPOINT, "http://localhost:{}".format(port), instance_name="test")
+        action_digest = remote_execution_pb2.Digest(hash="0" * 64, size_bytes=1)
+        result = multiplexer.execute(spec, action_digest, names.append).result(timeout=30)
+    finally:
+        server.stop(None)
+
+    return result, names, servicer
+
+
+def test_execute(multiplexer):
+    result, names, servicer = execute(multiplexer, [[operation("op-1"), operation("op-1", done=True)]])
+    assert result == operation("op-1", done=True)
+    assert names == ["op-1"]
+    assert servicer.requests[0].instance_name == "test"
+
+
+def test_reattach(multiplexer):
+    # The stream of updates ends before the operation is done, twice
+    result, names, servicer = execute(
+        multiplexer, [[operation("op-1")], [operation("op-1")], [operation("op-1", done=True)]],
+    )
+    assert result == operation("op-1", done=True)
+    assert names == ["op-1"]
+    assert [type(request) for request in servicer.requests] == [
+        remote_execution_pb2.ExecuteRequest,
+        remote_execution_pb2.WaitExecutionRequest,
+        remote_execution_pb2.WaitExecutionRequest,
+    ]
+    assert servicer.requests[1].name == "op-1"
+
+
+def test_no_operation(multiplexer):
+    result, names, _ = execute(multiplexer, [[]])
+    assert result is None
+    assert not names
+
+
+def test_reattach_unimplemented(multiplexer):
+    with pytest.raises(SandboxError, match="does not support operation status polling"):
+        execute(multiplexer, [[operation("op-1")], [grpc.StatusCode.UNIMPLEMENTED]])
+
+
+def test_unavailable(multiplexer):
+    with pytest.raises(SandboxError, match="UNAVAILABLE"):
+        execute(multiplexer, [[grpc.StatusCode.UNAVAILABLE]])
+
+
+def test_release_unused():
+    # Releasing a multiplexer which never started does nothing
+    OperationMultiplexer().release_resources()
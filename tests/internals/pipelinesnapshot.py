@@ -0,0 +1,72 @@
+import os
+import pickle
+from types import SimpleNamespace
+
+from buildstream._pipelinesnapshot import PipelineSnapshot, _MAX_SNAPSHOTS
+from buildstream._pluginfactory.pluginorigin import PluginType
+from buildstream._pluginfactory.pluginoriginlocal import PluginOriginLocal
+
+
+# A minimal element, with only what the snapshot needs
+class SnapshotElement:
+    def __init__(self, name):
+        self.name = name
+
+    def _get_full_name(self):
+        return self.name
+
+
+def test_record_and_lookup(tmpdir):
+    directory = os.path.join(str(tmpdir), "snapshots")
+    element = SnapshotElement("element.bst")
+
+    snapshot = PipelineSnapshot(directory, "0" * 64)
+    assert snapshot.lookup(element) is None
+    snapshot.record(element, ("source-key", "strict-key"))
+    snapshot.save()
+
+    snapshot = PipelineSnapshot(directory, "0" * 64)
+    snapshot._load()
+    assert snapshot.lookup(element) == ("source-key", "strict-key")
+
+
+def test_prune(tmpdir):
+    directory = os.path.join(str(tmpdir), "snapshots")
+    element = SnapshotElement("element.bst")
+
+    # Snapshots used one after the other
+    os.makedirs(directory)
+    digests = ["{:064x}".format(index) for index in range(_MAX_SNAPSHOTS + 4)]
+    for index, digest in enumerate(digests):
+        path = os.path.join(directory, digest)
+        with open(path, "wb") as f:
+            pickle.dump({}, f)
+        os.utime(path, (index, index))
+
+    # Loading a snapshot marks it as recently used
+    snapshot = PipelineSnapshot(directory, digests[0])
+    snapshot._load()
+
+    snapshot = PipelineSnapshot(directory, "f" * 64)
+    snapshot.record(element, ("new",))
+    snapshot.save()
+
+    expected = {digests[0], "f" * 64} | set(digests[-(_MAX_SNAPSHOTS - 2) :])
+    assert set(os.listdir(directory)) == expected
+
+
+def test_local_plugin_fingerprint(tmpdir):
+    project = SimpleNamespace(directory=str(tmpdir))
+    os.makedirs(os.path.join(str(tmpdir), "plugins", "helpers"))
+    with open(os.path.join(str(tmpdir), "plugins", "element.py"), "w") as f:
+        f.write("plugin")
+
+    origin = PluginOriginLocal()
+    origin.project = project
+    origin._path = "plugins"
+    fingerprint = origin.get_plugin_fingerprint("element", PluginType.ELEMENT)
+
+    # Any file in the plugin directory changes the fingerprint
+    with open(os.path.join(str(tmpdir), "plugins", "helpers", "helper.py"), "w") as f:
+        f.write("helper")
+    assert origin.get_plugin_fingerprint("element", PluginType.ELEMENT) != fingerprint
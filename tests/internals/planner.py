@@ -0,0 +1,90 @@
+from buildstream._dependencygraph import DependencyGraph
+from buildstream._pipeline import _Planner
+from buildstream.types import _Scope
+
+
+# A minimal element, with only what the planner needs
+class PlanElement:
+    def __init__(self, name, *, cached=False):
+        self.name = name
+        self.cached = cached
+        self.build_deps = []
+        self.runtime_deps = []
+        self.depth = None
+        self.priority = None
+        self.queries = 0
+
+    def _dependencies(self, scope, *, recurse=True):
+        assert not recurse
+        self.queries += 1
+        if scope == _Scope.BUILD:
+            return self.build_deps
+        if scope == _Scope.RUN:
+            return self.runtime_deps
+        return self.build_deps + [dep for dep in self.runtime_deps if dep not in self.build_deps]
+
+    def _cached_success(self):
+        return self.cached
+
+    def _set_depth(self, depth):
+        self.depth = depth
+
+    def _set_priority(self, priority):
+        self.priority = priority
+
+    def _get_full_name(self):
+        return self.name
+
+
+def plan_names(roots, plan_cached=False):
+    return [element.name for element in _Planner(DependencyGraph(roots)).plan(roots, plan_cached)]
+
+
+def test_plan_order():
+    base = PlanElement("base")
+    runtime = PlanElement("runtime")
+    libdep = PlanElement("libdep")
+    compiler = PlanElement("compiler")
+
+    lib = PlanElement("lib")
+    lib.build_deps = [base]
+    lib.runtime_deps = [libdep]
+
+    # The build dependencies of cached elements are not planned
+    tool = PlanElement("tool", cached=True)
+    tool.build_deps = [compiler]
+    tool.runtime_deps = [base]
+
+    target = PlanElement("target")
+    target.build_deps = [lib, tool]
+    target.runtime_deps = [runtime]
+
+    assert plan_names([target]) == ["base", "libdep", "lib", "runtime", "target"]
+    assert plan_names([target], plan_cached=True) == ["base", "libdep", "lib", "tool", "runtime", "target"]
+    assert compiler.depth is None
+
+
+def test_deep_chain():
+    # Deeper than the recursion limit of Python
+    elements = [PlanElement("element{}.bst".format(index)) for index in range(5000)]
+    for element, dep in zip(elements, elements[1:]):
+        element.build_deps = [dep]
+
+    planned = _Planner(DependencyGraph([elements[0]])).plan([elements[0]], False)
+    assert planned == list(reversed(elements))
+
+
+def test_diamonds_linear():
+    # Layers of diamonds, where every element depends on both elements
+    # of the next layer at runtime and to build
+    layers = [[PlanElement("{}-{}.bst".format(layer, index)) for index in range(2)] for layer in range(64)]
+    for layer, next_layer in zip(layers, layers[1:]):
+        for element in layer:
+            element.runtime_deps = list(next_layer)
+            element.build_deps = list(next_layer)
+
+    planned = _Planner(DependencyGraph(layers[0])).plan(layers[0], False)
+
+    # Deeper layers come first, and every element is only visited once
+    assert planned == [element for layer in reversed(layers) for element in layer]
+    assert all(element.queries <= 3 for layer in layers for element in layer)
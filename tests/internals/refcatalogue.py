@@ -0,0 +1,133 @@
+import os
+from types import SimpleNamespace
+
+from buildstream._assetcache import AssetCache
+from buildstream._refcatalogue import RefCatalogue
+
+
+# Write a ref with a given mtime
+def write_ref(basedir, ref, mtime):
+    path = os.path.join(basedir, ref)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"artifact")
+    os.utime(path, (mtime, mtime))
+
+
+def list_refs(catalogue, glob_expr=None):
+    return [ref for _, ref in catalogue.list_refs_mtimes(glob_expr=glob_expr)]
+
+
+def test_existing_refs(tmpdir):
+    basedir = os.path.join(str(tmpdir), "refs")
+    write_ref(basedir, "test/hello/0123", 20)
+    write_ref(basedir, "test/base/4567", 10)
+
+    # Refs written before the catalogue existed are indexed
+    catalogue = RefCatalogue(basedir)
+    assert catalogue.list_refs_mtimes() == [(10, "test/base/4567"), (20, "test/hello/0123")]
+    catalogue.close()
+
+
+def test_record_and_remove(tmpdir):
+    basedir = os.path.join(str(tmpdir), "refs")
+    catalogue = RefCatalogue(basedir)
+    assert catalogue.list_refs_mtimes() == []
+
+    write_ref(basedir, "test/hello/0123", 30)
+    write_ref(basedir, "test/base/4567", 20)
+    write_ref(basedir, "other/base/89ab", 10)
+    for ref in ["test/hello/0123", "test/base/4567", "other/base/89ab"]:
+        catalogue.record(ref)
+
+    # Using a ref updates its mtime
+    os.utime(os.path.join(basedir, "other/base/89ab"), (40, 40))
+    catalogue.record("other/base/89ab")
+
+    assert list_refs(catalogue) == ["test/base/4567", "test/hello/0123", "other/base/89ab"]
+    assert list_refs(catalogue, "test/*/*") == ["test/base/4567", "test/hello/0123"]
+    assert list_refs(catalogue, "*/base/*") == ["test/base/4567", "other/base/89ab"]
+    assert list_refs(catalogue, "test/hel") == []
+
+    catalogue.remove("test/hello/0123")
+    assert list_refs(catalogue, "test/**") == ["test/base/4567"]
+    catalogue.close()
+
+    # The catalogue persists
+    catalogue = RefCatalogue(basedir)
+    assert len(catalogue.list_refs_mtimes()) == 2
+    catalogue.close()
+
+
+def test_rebuild(tmpdir):
+    basedir = os.path.join(str(tmpdir), "refs")
+    write_ref(basedir, "test/hello/0123", 10)
+    catalogue = RefCatalogue(basedir)
+
+    # Refs modified behind the back of the catalogue
+    os.unlink(os.path.join(basedir, "test/hello/0123"))
+    write_ref(basedir, "test/base/4567", 20)
+    assert list_refs(catalogue) == ["test/hello/0123"]
+
+    assert catalogue.rebuild() == 1
+    assert list_refs(catalogue) == ["test/base/4567"]
+    catalogue.close()
+
+
+def test_corrupted(tmpdir):
+    basedir = os.path.join(str(tmpdir), "refs")
+    write_ref(basedir, "test/hello/0123", 10)
+    with open(basedir + ".db", "wb") as f:
+        f.write(b"not a database" * 100)
+
+    catalogue = RefCatalogue(basedir)
+    assert catalogue.list_refs_mtimes() == [(10, "test/hello/0123")]
+    catalogue.close()
+
+
+def test_record_many(tmpdir):
+    basedir = os.path.join(str(tmpdir), "refs")
+    write_ref(basedir, "test/hello/0123", 10)
+    write_ref(basedir, "test/base/4567", 20)
+    catalogue = RefCatalogue(basedir)
+
+    # Used refs are recorded together, refs which disappeared are removed
+    os.utime(os.path.join(basedir, "test/hello/0123"), (30, 30))
+    os.unlink(os.path.join(basedir, "test/base/4567"))
+    write_ref(basedir, "other/base/89ab", 40)
+    catalogue.record_many(["test/hello/0123", "test/base/4567", "other/base/89ab"])
+
+    assert catalogue.list_refs_mtimes() == [(30, "test/hello/0123"), (40, "other/base/89ab")]
+    catalogue.close()
+
+
+class StubMessenger:
+    def __init__(self):
+        self.warnings = []
+
+    def warn(self, brief, *, detail=None):
+        self.warnings.append(brief)
+
+
+def test_deferred_use(tmpdir):
+    basedir = os.path.join(str(tmpdir), "refs")
+    write_ref(basedir, "test/hello/0123", 10)
+    write_ref(basedir, "test/base/4567", 20)
+
+    context = SimpleNamespace(get_cascache=lambda: None, messenger=StubMessenger())
+    cache = AssetCache(context)
+    cache._catalogue = RefCatalogue(basedir)
+
+    # Using a ref does not write to the catalogue
+    os.utime(os.path.join(basedir, "test/hello/0123"), (30, 30))
+    cache.use_ref("test/hello/0123")
+    assert list_refs(cache._catalogue) == ["test/hello/0123", "test/base/4567"]
+
+    cache._flush_used_refs()
+    assert list_refs(cache._catalogue) == ["test/base/4567", "test/hello/0123"]
+
+    # Failing to write to the catalogue is not fatal
+    cache._catalogue.close()
+    cache.use_ref("test/base/4567")
+    cache.release_resources()
+    assert context.messenger.warnings == ["Failed to record the use of 1 refs"]
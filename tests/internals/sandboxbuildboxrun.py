@@ -0,0 +1,20 @@
+import subprocess
+
+from buildstream.sandbox._sandboxbuildboxrun import SandboxBuildBoxRun
+
+
+def test_tee_output(tmpdir):
+    logfile = str(tmpdir.join("log"))
+    output = b"start\n\xff\xfe not utf-8\n" + b"x" * 100000 + b"\nend\n"
+
+    with open(logfile, "w") as log:
+        log.write("before\n")
+
+        # The output is written to the stream and kept
+        with SandboxBuildBoxRun._tee_output(None, log, 1) as (pipe, chunks):
+            subprocess.run(["cat"], input=output, stdout=pipe, check=True)
+
+        assert b"".join(chunks) == output
+
+    with open(logfile, "rb") as f:
+        assert f.read() == b"before\n" + output
@@ -0,0 +1,244 @@
+# Pylint doesn't play well with fixtures and dependency injection from pytest
+# pylint: disable=redefined-outer-name
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from buildstream._messenger import Messenger
+from buildstream._scheduler import scheduler as _scheduler
+from buildstream._scheduler.jobs import JobStatus
+from buildstream._scheduler.jobs.job import ChildJob
+from buildstream._scheduler.resources import ResourceType
+from buildstream._scheduler.scheduler import Scheduler
+from buildstream._signals import TerminateException
+from buildstream._utils import terminate_thread
+
+
+# A queue handing out a fixed list of jobs as resources allow
+class StubQueue:
+    def __init__(self, scheduler, names):
+        self.resources = [ResourceType.PROCESS]
+        self._scheduler = scheduler
+        self._pending = [StubJob(self, name) for name in names]
+
+    def enqueue(self, elements):
+        pass
+
+    def dequeue(self):
+        return []
+
+    def dequeue_ready(self):
+        return False
+
+    def harvest_jobs(self):
+        ready = []
+        while self._pending and self._scheduler.resources.reserve(self.resources):
+            ready.append(self._pending.pop(0))
+        return ready
+
+    # Complete a running job, like Queue._job_done() and Job._parent_child_completed()
+    def complete(self, job):
+        self._scheduler.resources.release(self.resources)
+        self._scheduler.job_completed(job, JobStatus.OK)
+
+
+class StubJob:
+    def __init__(self, queue, name):
+        self.queue = queue
+        self.id = name
+        self.name = name
+        self.action_name = "Build"
+
+    def start(self):
+        pass
+
+
+class StubState:
+    def add_task(self, *args):
+        pass
+
+    def remove_task(self, *args):
+        pass
+
+    def elapsed_time(self):
+        return 0
+
+
+@pytest.fixture
+def scheduler():
+    context = SimpleNamespace(sched_builders=1, sched_fetchers=1, sched_pushers=1)
+    scheduler = Scheduler(context, None, StubState(), None, None)
+    scheduler.loop = asyncio.new_event_loop()
+    yield scheduler
+    scheduler.loop.close()
+
+
+# Start the jobs of a queue in a scheduler
+def start(scheduler, names):
+    queue = StubQueue(scheduler, names)
+    scheduler.queues = [queue]
+    scheduler._sched()
+    run_pending(scheduler)
+    return queue
+
+
+# Run the callbacks scheduled in the loop of the scheduler,
+# and those they schedule
+def run_pending(scheduler):
+    for _ in range(4):
+        scheduler.loop.call_soon(scheduler.loop.stop)
+        scheduler.loop.run_forever()
+
+
+def running(scheduler):
+    return [job.name for job in scheduler._active_jobs]
+
+
+def used_processes(scheduler):
+    return scheduler.resources._used_resources[ResourceType.PROCESS]
+
+
+def test_idle_resources_balanced(scheduler):
+    queue = start(scheduler, ["a", "b"])
+    job_a, job_b = scheduler._active_jobs[0], queue._pending[0]
+    assert running(scheduler) == ["a"]
+
+    # The resources of an idle job are used by another job
+    assert scheduler.job_idle(job_a)
+    run_pending(scheduler)
+    assert running(scheduler) == ["a", "b"]
+    assert used_processes(scheduler) == 1
+
+    # The idle job waits for the other job to complete
+    future = scheduler.job_resume(job_a)
+    run_pending(scheduler)
+    assert not future.done()
+
+    queue.complete(job_b)
+    run_pending(scheduler)
+    assert future.done()
+    assert used_processes(scheduler) == 1
+    assert scheduler._idle_jobs == 0
+
+    queue.complete(job_a)
+    assert used_processes(scheduler) == 0
+
+
+def test_reclaim_before_new_jobs(scheduler):
+    queue = start(scheduler, ["a", "b", "c"])
+    job_a = scheduler._active_jobs[0]
+
+    scheduler.job_idle(job_a)
+    run_pending(scheduler)
+    job_b = scheduler._active_jobs[1]
+    future = scheduler.job_resume(job_a)
+    run_pending(scheduler)
+
+    # The idle job gets the resources of the completed job, not the pending one
+    queue.complete(job_b)
+    run_pending(scheduler)
+    assert future.done()
+    assert running(scheduler) == ["a"]
+
+    queue.complete(job_a)
+    run_pending(scheduler)
+    assert running(scheduler) == ["c"]
+
+
+def test_reclaim_when_terminated(scheduler):
+    queue = start(scheduler, ["a", "b", "c"])
+    job_a = scheduler._active_jobs[0]
+
+    scheduler.job_idle(job_a)
+    run_pending(scheduler)
+    job_b = scheduler._active_jobs[1]
+    future = scheduler.job_resume(job_a)
+
+    # Idle jobs get their resources back to complete, but no new job is started
+    scheduler.terminated = True
+    queue.complete(job_b)
+    run_pending(scheduler)
+    assert future.done()
+    assert running(scheduler) == ["a"]
+
+    queue.complete(job_a)
+    run_pending(scheduler)
+    assert not running(scheduler)
+    assert used_processes(scheduler) == 0
+
+
+def test_max_idle_jobs(scheduler, monkeypatch):
+    monkeypatch.setattr(_scheduler, "_MAX_IDLE_JOBS", 2)
+    queue = start(scheduler, ["a", "b", "c", "d"])
+
+    assert scheduler.job_idle(scheduler._active_jobs[0])
+    run_pending(scheduler)
+    assert scheduler.job_idle(scheduler._active_jobs[1])
+    run_pending(scheduler)
+    assert running(scheduler) == ["a", "b", "c"]
+
+    # The third job keeps its resources while it waits
+    assert not scheduler.job_idle(scheduler._active_jobs[2])
+    run_pending(scheduler)
+    assert running(scheduler) == ["a", "b", "c"]
+    assert scheduler._idle_jobs == 2
+
+    # Once an idle job resumed, another job can be idle
+    future = scheduler.job_resume(scheduler._active_jobs[0])
+    queue.complete(scheduler._active_jobs[2])
+    run_pending(scheduler)
+    assert future.done()
+    assert scheduler.job_idle(scheduler._active_jobs[0])
+    run_pending(scheduler)
+    assert running(scheduler) == ["a", "b", "d"]
+
+
+def test_idle_outside_job(scheduler):
+    with Messenger().idle():
+        pass
+
+    assert scheduler._idle_jobs == 0
+
+
+def test_terminate_idle_job(scheduler):
+    queue = start(scheduler, ["a", "b"])
+    job_a = scheduler._active_jobs[0]
+
+    messenger = Messenger()
+    child = ChildJob("Build", messenger, None, None, 0, 1, None, None)
+    child._idle_cb = lambda: scheduler.job_idle(job_a)
+    child._resume_cb = lambda: scheduler.job_resume(job_a)
+
+    other_started = threading.Event()
+    result = []
+
+    def run_child():
+        messenger.set_idle_handler(child._idle)
+        try:
+            with messenger.idle():
+                other_started.wait()
+        except TerminateException:
+            result.append(used_processes(scheduler))
+
+    thread = threading.Thread(target=run_child)
+    thread.start()
+    while running(scheduler) != ["a", "b"]:
+        run_pending(scheduler)
+    other_started.set()
+
+    # The job is terminated while waiting for its resources
+    while not scheduler._reclaims:
+        run_pending(scheduler)
+    terminate_thread(thread.ident)
+
+    # The termination is only raised once the resources are reserved again
+    queue.complete(scheduler._active_jobs[1])
+    while thread.is_alive():
+        run_pending(scheduler)
+        thread.join(0.1)
+
+    assert result == [1]
+    assert scheduler._idle_jobs == 0
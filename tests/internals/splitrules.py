@@ -0,0 +1,79 @@
+import re
+
+import pytest
+
+from buildstream import utils
+from buildstream._splitrules import SplitRules
+
+
+RULES = {
+    "runtime": ["/usr/bin", "/usr/bin/*", "/usr/lib/lib*.so*", "/usr/libexec", "/usr/libexec/*"],
+    "devel": [
+        "/usr/include",
+        "/usr/include/**",
+        "/usr/lib/lib*.a",
+        "/usr/lib/pkgconfig/*.pc",
+        "/usr/share/aclocal/**",
+    ],
+    "debug": ["/usr/lib/debug", "/usr/lib/debug/**"],
+    "doc": ["/usr/share/doc", "/usr/share/doc/**", "/usr/share/man/man?/*.[0-9]"],
+    "locale": ["/usr/share/locale/**/*.mo", "**/LC_MESSAGES"],
+}
+
+PATHS = [
+    "usr",
+    "usr/bin",
+    "usr/bin/sh",
+    "usr/bin/sub/sh",
+    "usr/include",
+    "usr/include/stdio.h",
+    "usr/include/sys/types.h",
+    "usr/lib",
+    "usr/lib/libc.so",
+    "usr/lib/libc.so.6",
+    "usr/lib/libc.a",
+    "usr/lib/libc.so.a",
+    "usr/lib/sub/libc.so",
+    "usr/lib/pkgconfig/glib.pc",
+    "usr/lib/debug",
+    "usr/lib/debug/usr/bin/sh.debug",
+    "usr/libexec",
+    "usr/share/doc",
+    "usr/share/doc/README",
+    "usr/share/man/man1/sh.1",
+    "usr/share/man/man1/sh.1.gz",
+    "usr/share/locale/de/LC_MESSAGES",
+    "usr/share/locale/de/LC_MESSAGES/sh.mo",
+    "etc/LC_MESSAGES",
+    "etc/passwd",
+]
+
+
+# Match the rules the same way element split rules were matched
+# before, with one regular expression per domain
+def _regex_domains(rules, path):
+    filename = "/" + path
+    domains = set()
+    for domain, globs in rules.items():
+        for glob in globs:
+            if re.match(utils._glob2re(glob), filename):
+                domains.add(domain)
+    return domains
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_match(path):
+    split_rules = SplitRules(RULES)
+    assert split_rules.match(path) == _regex_domains(RULES, path)
+
+
+def test_domains():
+    split_rules = SplitRules(RULES)
+    assert split_rules.domains == list(RULES.keys())
+    assert split_rules.match("usr/lib/libc.so") == {"runtime"}
+    assert split_rules.match("usr/lib/debug/libc.so") == {"debug"}
+    assert split_rules.match("usr/share/locale/de/LC_MESSAGES") == {"locale"}
+    assert split_rules.match("etc/passwd") == set()
+
+    # Equal sets of domains are shared
+    assert split_rules.match("usr/bin/sh") is split_rules.match("usr/bin/ls")
@@ -13,7 +13,7 @@ import pytest
 from buildstream._cas import CASCache
 from buildstream.storage._casbaseddirectory import CasBasedDirectory
 from buildstream.storage._filebaseddirectory import FileBasedDirectory
-from buildstream.storage.directory import _FileType, VirtualDirectoryError
+from buildstream.storage.directory import _DiffType, _FileType, VirtualDirectoryError
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "storage")
 
@@ -341,3 +341,65 @@ def utime_recursively(directory, time):
 def clear_gitkeeps(directory):
     for f in glob.glob(os.path.join(directory, "**", ".gitkeep"), recursive=True):
         os.remove(f)
+
+
+@pytest.mark.datafiles(DATA_DIR)
+def test_import_selected(tmpdir, datafiles):
+    original = os.path.join(str(datafiles), "original")
+    overlay = os.path.join(str(datafiles), "overlay")
+
+    with setup_backend(CasBasedDirectory, str(tmpdir)) as c:
+        c.import_files(original)
+        before = CasBasedDirectory(c.cas_cache, digest=c._get_digest())
+
+        selection = CasBasedDirectory(c.cas_cache)
+        selection.import_files(original, filter_callback=lambda path: path in ("bin", "bin/hello"))
+
+        # Import the selected paths
+        result = CasBasedDirectory(c.cas_cache)
+        result._import_selected(c, selection)
+        assert set(result.list_relative_paths()) == {"bin", "bin/hello"}
+
+        # Import the selected paths and those which were added since
+        c.import_files(overlay)
+        expected = {"bin", "bin/hello"} | (set(c.list_relative_paths()) - set(before.list_relative_paths()))
+        result = CasBasedDirectory(c.cas_cache)
+        result._import_selected(c, selection, original=before)
+        assert set(result.list_relative_paths()) == expected
+
+
+@pytest.mark.parametrize(
+    "directories",
+    [
+        ("merge-base", "merge-add"),
+        ("merge-base", "merge-remove"),
+        ("merge-base", "merge-replace"),
+        ("merge-base", "merge-override-with-directory"),
+        ("merge-base", "merge-override-subdirectory"),
+    ],
+)
+@pytest.mark.datafiles(DATA_DIR)
+def test_diff(tmpdir, datafiles, directories):
+    before = os.path.join(str(datafiles), directories[0])
+    after = os.path.join(str(datafiles), directories[1])
+
+    with setup_backend(CasBasedDirectory, str(tmpdir)) as c:
+        a = CasBasedDirectory(c.cas_cache)
+        a.import_files(before)
+        b = CasBasedDirectory(c.cas_cache)
+        b.import_files(after)
+
+        changes = dict(a._diff(b))
+        assert len(changes) == len(list(a._diff(b)))
+
+        paths_a = set(a.list_relative_paths())
+        paths_b = set(b.list_relative_paths())
+        assert {path for path, change in changes.items() if change == _DiffType.ADDED} == paths_b - paths_a
+        assert {path for path, change in changes.items() if change == _DiffType.REMOVED} == paths_a - paths_b
+
+        for path, change in changes.items():
+            if change == _DiffType.MODIFIED:
+                assert path in paths_a and path in paths_b
+
+        # Identical trees have no differences
+        assert not list(a._diff(a))
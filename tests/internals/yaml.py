@@ -6,6 +6,7 @@ import pytest
 from buildstream import _yaml, Node, ProvenanceInformation, SequenceNode
 from buildstream.exceptions import LoadErrorReason
 from buildstream._exceptions import LoadError
+from buildstream._yamlcache import YamlCache
 
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "yaml",)
@@ -61,6 +62,47 @@ def test_element_provenance(datafiles):
     assert_provenance(filename, 5, 2, loaded.get_sequence("moods").scalar_at(1))
 
 
+@pytest.mark.datafiles(os.path.join(DATA_DIR))
+@pytest.mark.parametrize("filename", ["basics.yaml", "traversal.yaml", "list-of-list.yaml", "roundtrip-test.yaml"])
+def test_yaml_cache(datafiles, tmpdir, filename):
+
+    filename = os.path.join(datafiles.dirname, datafiles.basename, filename)
+    cache = YamlCache(os.path.join(str(tmpdir), "yaml"))
+
+    parsed = _yaml.load(filename, shortname=None, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    cached = _yaml.load(filename, shortname=None, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # The cached tree is identical to the parsed one, including provenance
+    assert cached.strip_node_info() == parsed.strip_node_info()
+    assert str(cached.get_provenance()) == str(parsed.get_provenance())
+    for key, value in cached.items():
+        assert str(value.get_provenance()) == str(parsed.get_node(key).get_provenance())
+
+
+@pytest.mark.datafiles(os.path.join(DATA_DIR))
+def test_yaml_cache_modified(datafiles, tmpdir):
+
+    filename = os.path.join(datafiles.dirname, datafiles.basename, "basics.yaml")
+    cache = YamlCache(os.path.join(str(tmpdir), "yaml"))
+
+    loaded = _yaml.load(filename, shortname=None, cache=cache)
+    assert loaded.get_str("kind") == "pony"
+
+    with open(filename, "a") as f:
+        f.write("extra: value\n")
+
+    loaded = _yaml.load(filename, shortname=None, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert loaded.get_str("extra") == "value"
+
+    # The entry of the previous contents was overwritten
+    entries = [name for _, _, files in os.walk(os.path.join(str(tmpdir), "yaml")) for name in files]
+    assert len(entries) == 1
+
+
 @pytest.mark.datafiles(os.path.join(DATA_DIR))
 def test_mapping_validate_keys(datafiles):
 